@@ -0,0 +1,290 @@
+# ==============================================================================
+# Regression benchmarks for the trie hot paths: build time and peak RSS per
+# engine, per-keystroke latency over replayed typing traces, and bulk
+# throughput of expansion, emoji lookup and punctuation analysis on a
+# multi-megabyte document.
+#
+# Every corpus, trace and document is generated from a fixed seed, so runs on
+# different commits measure exactly the same work. Results are written as JSON
+# (with the git commit) and can be compared against an earlier run:
+#
+#   python benchmarks/hot_paths.py                      # from Backend/
+#   python benchmarks/hot_paths.py --quick
+#   python benchmarks/hot_paths.py --compare benchmarks/results/<earlier>.json
+# ==============================================================================
+
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import string
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+import trie
+from compact_trie import CompactTrie, train_compact_abbreviation_trie, train_compact_emoji_trie
+from dawg import Dawg
+from emoji_data import word_to_emoji
+
+RESULTS_DIR = os.path.join(BACKEND, "benchmarks", "results")
+SEED = 21
+ENGINES = ("dict", "compact", "dawg")
+
+
+# ==============================================================================
+# I. FIXED CORPORA
+# ==============================================================================
+
+def make_corpus(size: int, seed: int = SEED) -> list:
+    # Pronounceable pseudo-words with an English-like length spread, so prefix
+    # fan-out resembles a real dictionary without depending on one.
+    rng = random.Random(seed)
+    consonants, vowels = "bcdfghklmnprstvwz", "aeiou"
+    found = set()
+    while len(found) < size:
+        syllables = rng.choices((1, 2, 3, 4, 5), weights=(8, 30, 34, 20, 8))[0]
+        word = "".join(rng.choice(consonants) + rng.choice(vowels) + rng.choice(("", "", "n", "r", "s", "t"))
+                       for _ in range(syllables))
+        found.add(word)
+    return sorted(found)
+
+
+def make_typing_trace(words: list, keystrokes: int, seed: int = SEED) -> list:
+    # A stream of typed characters: mostly dictionary words, with typos that
+    # are backspaced ("\b") and words separated by spaces.
+    rng = random.Random(seed + 1)
+    trace = []
+    while len(trace) < keystrokes:
+        word = rng.choice(words)
+        for character in word:
+            if rng.random() < 0.04:
+                trace += (rng.choice(string.ascii_lowercase), "\b")
+            trace.append(character)
+        trace.append(" ")
+    return trace[:keystrokes]
+
+
+def make_document(words: list, abbreviations: dict, size: int, seed: int = SEED) -> str:
+    rng = random.Random(seed + 2)
+    short_forms, emoji_words = list(abbreviations), list(word_to_emoji)
+    sentences, length = [], 0
+    while length < size:
+        tokens = []
+        for _ in range(rng.randint(5, 16)):
+            roll = rng.random()
+            if roll < 0.08:
+                tokens.append(rng.choice(short_forms) + rng.choice(("", "", ",", "!")))
+            elif roll < 0.12:
+                tokens.append(rng.choice(emoji_words))
+            else:
+                tokens.append(rng.choice(words))
+        sentence = " ".join(tokens).capitalize() + rng.choice((".", ".", "?", "!", ";")) + rng.choice((" ", " ", "\n"))
+        sentences.append(sentence)
+        length += len(sentence)
+    return "".join(sentences)
+
+
+# ==============================================================================
+# II. MEASUREMENTS
+# ==============================================================================
+
+def build_engine(engine: str, word_list: list):
+    if engine == "dict":
+        return trie.train_trie(trie.create_trie(), word_list)
+    if engine == "compact":
+        return CompactTrie.from_words(word_list)
+    return Dawg.from_words(word_list)
+
+
+def _max_rss_bytes() -> int:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+def _build_in_child(engine: str, size: int) -> dict:
+    word_list = make_corpus(size)
+    before = _max_rss_bytes()
+    started = time.perf_counter()
+    build_engine(engine, word_list)
+    seconds = time.perf_counter() - started
+    return {"seconds": seconds, "words_per_second": size / seconds,
+            "peak_rss_bytes": _max_rss_bytes(), "peak_rss_growth_bytes": _max_rss_bytes() - before}
+
+
+def measure_build(engine: str, size: int) -> dict:
+    # A fresh process per build, so its peak RSS is not inherited from
+    # whatever ran before it.
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(_build_in_child, engine, size).result()
+
+
+def percentiles(samples_ns: list) -> dict:
+    ordered = sorted(samples_ns)
+
+    def at(fraction):
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)] / 1000
+
+    return {"p50_us": at(0.50), "p90_us": at(0.90), "p99_us": at(0.99), "max_us": ordered[-1] / 1000,
+            "mean_us": sum(ordered) / len(ordered) / 1000}
+
+
+def replay_typing(word_engine, emoji_engine, trace: list, cache=None, max_typo_distance: int = 2) -> dict:
+    # What handle_autocomplete does per key: advance the session, then ask for
+    # word and emoji suggestions.
+    session = trie.CompletionSession(word_engine, emoji_engine, cache=cache, max_typo_distance=max_typo_distance)
+    clock = time.perf_counter_ns
+    samples = []
+    for key in trace:
+        started = clock()
+        if key == " ":
+            session.reset()
+        elif key == "\b":
+            session.pop()
+        else:
+            session.push(key)
+        if session.prefix:
+            session.suggestions()
+        samples.append(clock() - started)
+    return percentiles(samples)
+
+
+def throughput(action, size: int) -> dict:
+    started = time.perf_counter()
+    action()
+    seconds = time.perf_counter() - started
+    return {"seconds": seconds, "mb_per_second": size / 2**20 / seconds}
+
+
+def per_call(action, arguments: list) -> dict:
+    clock = time.perf_counter_ns
+    samples = []
+    for argument in arguments:
+        started = clock()
+        action(argument)
+        samples.append(clock() - started)
+    return percentiles(samples)
+
+
+# ==============================================================================
+# III. THE SUITE
+# ==============================================================================
+
+def run_suite(corpus_size: int, keystrokes: int, document_size: int) -> dict:
+    results = {}
+    word_list = make_corpus(corpus_size)
+    abbreviations = trie.load_abbreviations_from_json(os.path.join(BACKEND, "abbreviations.json"))
+
+    print(f"Build ({corpus_size:,} words)")
+    results["build"] = {}
+    for engine in ENGINES:
+        results["build"][engine] = measured = measure_build(engine, corpus_size)
+        print(f"  {engine:<8} {measured['seconds']:7.2f} s  {measured['words_per_second']:>10,.0f} words/s  "
+              f"peak RSS {measured['peak_rss_bytes'] / 2**20:7.1f} MiB")
+
+    emoji_engines = {"dict": trie.train_emoji_trie(trie.create_trie(), word_to_emoji),
+                     "compact": train_compact_emoji_trie(word_to_emoji)}
+    abbreviation_engines = {"dict": trie.train_abbreviation_trie(trie.create_trie(), abbreviations),
+                            "compact": train_compact_abbreviation_trie(abbreviations)}
+    trace = make_typing_trace(word_list, keystrokes)
+
+    print(f"Typing trace ({len(trace):,} keystrokes)")
+    results["typing"] = {}
+    for engine in ENGINES:
+        word_engine = build_engine(engine, word_list)
+        emoji_engine = emoji_engines["dict" if engine == "dict" else "compact"]
+        for label, cache in (("uncached", None), ("cached", trie.SuggestionCache())):
+            key = f"{engine}/{label}"
+            results["typing"][key] = measured = replay_typing(word_engine, emoji_engine, trace, cache)
+            print(f"  {key:<18} p50 {measured['p50_us']:8.1f} us   p99 {measured['p99_us']:8.1f} us")
+
+    document = make_document(word_list, abbreviations, document_size)
+    tokens = document.split()[:20000]
+    prefixes = [token[:3].lower() for token in tokens[:5000]]
+    print(f"Bulk ({len(document) / 2**20:.1f} MiB document)")
+    results["bulk"] = {}
+    for engine in ("dict", "compact"):
+        abbreviation_engine, emoji_engine = abbreviation_engines[engine], emoji_engines[engine]
+        results["bulk"][f"{engine}/expand_abbreviations"] = throughput(
+            lambda: trie.expand_abbreviations_in_sentence(abbreviation_engine, document), len(document))
+        results["bulk"][f"{engine}/search_and_expand"] = per_call(
+            lambda token: trie.search_and_expand(abbreviation_engine, token), tokens)
+        results["bulk"][f"{engine}/autocomplete_emoji"] = per_call(
+            lambda prefix: trie.autocomplete_emoji(emoji_engine, prefix), prefixes)
+    punctuation_trie = trie.train_punctuation_trie(trie.create_trie())
+    results["bulk"]["analyze_sentence_punctuation"] = throughput(
+        lambda: trie.analyze_sentence_punctuation(punctuation_trie, document), len(document))
+    for key, measured in results["bulk"].items():
+        if "mb_per_second" in measured:
+            print(f"  {key:<34} {measured['mb_per_second']:8.2f} MiB/s")
+        else:
+            print(f"  {key:<34} p50 {measured['p50_us']:8.1f} us   p99 {measured['p99_us']:8.1f} us")
+    return results
+
+
+# ==============================================================================
+# IV. RESULTS
+# ==============================================================================
+
+def git_revision() -> str:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=BACKEND,
+                               capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return commit + ("-dirty" if dirty else "")
+
+
+def compare(previous: dict, current: dict):
+    # Prints the change of every timing present in both runs; lower is better.
+    print(f"Compared with {previous['git']} ({previous['timestamp']})")
+    for section in ("build", "typing", "bulk"):
+        for key, measured in current["results"][section].items():
+            before = previous["results"].get(section, {}).get(key)
+            if not before:
+                continue
+            metric = "seconds" if "seconds" in measured and "p50_us" not in measured else "p50_us"
+            if before.get(metric):
+                change = (measured[metric] / before[metric] - 1) * 100
+                print(f"  {section}/{key:<34} {metric:<8} {change:+7.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the trie hot paths.")
+    parser.add_argument("--quick", action="store_true", help="smaller corpus, trace and document")
+    parser.add_argument("--output", help="results file (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    sizes = (20000, 5000, 1 << 20) if args.quick else (200000, 50000, 8 << 20)
+    report = {
+        "git": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": dict(zip(("corpus_size", "keystrokes", "document_size"), sizes), seed=SEED),
+        "results": run_suite(*sizes),
+    }
+
+    path = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}-{report['git']}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {path}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# ==============================================================================
+# Memory and autocomplete latency: nested-dict trie vs. CompactTrie vs. DAWG
+# on the full NLTK corpus.
+#
+# Run from the Backend directory:  python benchmarks/memory_compare.py
+# ==============================================================================
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import data_sources
+import trie
+from compact_trie import CompactTrie
+from dawg import Dawg
+
+
+def measure(label: str, build):
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<14} retained {retained / 2**20:8.1f} MiB   peak {peak / 2**20:8.1f} MiB   build {elapsed:6.2f} s")
+    return result, retained
+
+
+def autocomplete_latency(label: str, engine, prefixes: list):
+    started = time.perf_counter()
+    for prefix in prefixes:
+        trie.autocomplete(engine, prefix)
+    elapsed = time.perf_counter() - started
+    print(f"{label:<14} autocomplete {elapsed / len(prefixes) * 1e6:8.1f} us/prefix")
+
+
+def main():
+    word_list = data_sources.load_words()
+    print(f"Corpus: {len(word_list)} words")
+
+    dict_trie, dict_bytes = measure("dict trie", lambda: trie.train_trie(trie.create_trie(), word_list))
+    compact, compact_bytes = measure("CompactTrie", lambda: CompactTrie.from_words(word_list))
+    dawg, dawg_bytes = measure("DAWG", lambda: Dawg.from_words(word_list))
+
+    print(f"CompactTrie: {len(compact)} nodes, {compact.nbytes() / 2**20:.1f} MiB of node arrays")
+    print(f"DAWG:        {len(dawg)} states, {dawg.nbytes() / 2**20:.1f} MiB of state/edge arrays")
+    print(f"Reduction vs dict trie: CompactTrie {dict_bytes / max(compact_bytes, 1):.1f}x, "
+          f"DAWG {dict_bytes / max(dawg_bytes, 1):.1f}x")
+
+    prefixes = sorted({word[:length].lower() for word in word_list[::50] for length in (2, 3, 4)})
+    for label, engine in (("dict trie", dict_trie), ("CompactTrie", compact), ("DAWG", dawg)):
+        autocomplete_latency(label, engine, prefixes)
+
+
+if __name__ == "__main__":
+    main()
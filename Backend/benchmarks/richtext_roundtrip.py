@@ -0,0 +1,90 @@
+# ==============================================================================
+# Save and load of a ~10 MB styled document in the .tdoc format: encoding the
+# runs, writing and reading the file, rebuilding the formatting model's runs
+# and, when a display is available, inserting and painting it in a Text widget.
+#
+# Run from the Backend directory:  python benchmarks/richtext_roundtrip.py
+# ==============================================================================
+
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import richtext
+from document_model import PieceTable, TextMirror
+from formatting import FormattingModel, StyleRuns
+
+TARGET_CHARS = 10 << 20
+STYLES = ("bold", "italic", "underline", "overstrike", "code", "colorc0392b", "color2980b9")
+
+
+def build_document(seed: int = 20):
+    rng = random.Random(seed)
+    words = ["lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit", "sed", "do"]
+    lines, size = [], 0
+    while size < TARGET_CHARS:
+        line = " ".join(rng.choice(words) for _ in range(rng.randint(6, 14))) + "\n"
+        lines.append(line)
+        size += len(line)
+    content = "".join(lines)
+
+    styles = {style: StyleRuns() for style in STYLES}
+    position = 0
+    while position < len(content):
+        position += rng.randint(20, 400)
+        length = rng.randint(3, 60)
+        styles[rng.choice(STYLES)].add(position, min(position + length, len(content)))
+    return content, {style: list(runs) for style, runs in styles.items()}
+
+
+def timed(label: str, action):
+    started = time.perf_counter()
+    result = action()
+    print(f"{label:<28} {(time.perf_counter() - started) * 1000:9.1f} ms")
+    return result
+
+
+def paint_in_tk(content: str, styles: dict):
+    try:
+        from tkinter import Text, Tk
+        root = Tk()
+    except Exception as error:
+        print(f"Tk paint skipped: {error}")
+        return
+    text = Text(root)
+    document = PieceTable()
+    mirror = TextMirror(text, document)
+    model = FormattingModel(text, mirror)
+    mirror.add_listener(model.on_edit)
+    timed("Tk insert", lambda: text.insert("1.0", content))
+    timed("model load", lambda: model.load(styles))
+    styler = richtext.LazyStyler(text, model)
+    timed("paint first screen", styler.start)
+    timed("paint whole document", lambda: model.paint(0, len(document)))
+    root.destroy()
+
+
+def main():
+    content, styles = timed("generate", build_document)
+    runs = sum(map(len, styles.values()))
+    print(f"Document: {len(content):,} characters, {runs:,} style runs")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "styled" + richtext.EXTENSION)
+        document = PieceTable(content)
+        result = timed("save", lambda: richtext.write_rich_document(path, document.snapshot(), styles))
+        print(f"File size: {result.bytes_written / 2**20:.1f} MiB "
+              f"({(result.bytes_written - len(content.encode('utf-8'))) / runs:.1f} bytes per run)")
+        loaded_content, loaded_styles = timed("load", lambda: richtext.read_rich_document(path))
+        assert loaded_content == content and loaded_styles == {style: runs for style, runs in styles.items() if runs}
+        timed("rebuild runs", lambda: {style: StyleRuns(ranges) for style, ranges in loaded_styles.items()})
+
+    paint_in_tk(content, styles)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@
 
 import os
 import json
+import threading
 from tkinter import *
 from tkinter import filedialog, simpledialog, messagebox, ttk
 from tkinter import font as tkFont
@@ -11,27 +12,42 @@ from tkinter import colorchooser
 from PIL import Image, ImageTk
 from PIL.Image import Resampling
 
+import doc_stats
+import document_model
+import file_loader
+import file_saver
+import formatting
+import journal
+import mmap_viewer
+import perf
+import richtext
+import spellcheck
 import trie
+import trie_artifact
+from dictionary_loader import DictionaryLoader
+from suggestion_worker import SuggestionWorker
 
 
 # ==============================================================================
 # II. INITIAL DATA TRAINING
 #
-# Load and train all necessary data structures (Tries) at startup.
+# The word, abbreviation and emoji tries (three separate tries, each holding
+# one kind of payload) are mapped from a prebuilt artifact on disk, which is
+# only (re)built when it is missing or its data sources have changed. That happens on a background thread once the window is up (see
+# install_dictionaries); until then the tries below are empty, and the editor
+# works without suggestions.
 # ==============================================================================
 
-print("Training all data tries. This may take a moment...")
-main_trie = trie.train_trie(trie.create_trie(), trie.words.words())
+# Store the word dictionary as a minimized DAWG instead of a plain trie.
+USE_DAWG_DICTIONARY = False
 
-emoji_trie = trie.train_emoji_trie(trie.create_trie(), trie.word_to_emoji)
+trie_data = None
+main_trie = trie.create_trie()
+abbreviation_trie = trie.create_trie()
+emoji_trie = trie.create_trie()
 
 punctuation_trie = trie.train_punctuation_trie(trie.create_trie())
 
-abbreviation_data = trie.load_abbreviations_from_json("abbreviations.json")
-for abbr, expansion in abbreviation_data.items():
-    trie.insert_emoji(main_trie, abbr, expansion)
-print("All Tries Ready.")
-
 
 # ==============================================================================
 # III. MAIN WINDOW AND GLOBAL VARIABLES
@@ -46,7 +62,17 @@ master.minsize(800, 600)
 
 # --- GLOBAL VARIABLES ---
 file_name = ""
-autocomplete_window = None
+file_encoding = "utf-8"
+file_newline = "\n"
+loading_job = None
+viewer = None
+styler = None
+journal_mark = 0
+# Mirror of the Text widget's content, kept in sync by a TextMirror (see UI).
+document = document_model.PieceTable()
+completion_session = trie.CompletionSession(main_trie, emoji_trie, cache=trie.suggestion_cache,
+                                            max_typo_distance=2)
+last_insert_position = None
 current_font_family = "Cascada Mono"
 current_font_size = 12
 
@@ -57,8 +83,22 @@ current_font_size = 12
 # Logic for handling autocomplete suggestions and other text analysis tools.
 # ==============================================================================
 
+def record_word_use(word):
+    # Picking a suggestion makes it rank higher next time. The score arrays
+    # are read by lookups on the suggestion thread, so the update runs there
+    # too. The first update of an unscored dictionary allocates its score
+    # arrays (8 bytes per node) and switches completion to ranked order.
+    if USE_DAWG_DICTIONARY:
+        return
+    words = main_trie
+
+    def bump():
+        if trie.search(words, word.lower()):
+            trie.set_word_score(words, word, trie.get_word_score(words, word) + 1)
+    suggestion_worker.update(bump)
+
+
 def on_autocomplete_select(event):
-    global autocomplete_window
     widget = event.widget
     selection_index = widget.curselection()
     if selection_index:
@@ -70,32 +110,135 @@ def on_autocomplete_select(event):
         end_index = text.index("insert")
         text.delete(start_index, end_index)
         text.insert(start_index, value)
-    if autocomplete_window:
-        autocomplete_window.destroy()
-        autocomplete_window = None
+        record_word_use(value)
+        reset_completion_session()
+    suggestion_worker.cancel()
+    hide_autocomplete()
 
 
-def handle_autocomplete(event):
-    global autocomplete_window
-    if autocomplete_window:
-        autocomplete_window.destroy()
-        autocomplete_window = None
-
-    start = text.index("insert-1c wordstart")
-    end = text.index("insert")
-    prefix = text.get(start, end)
-    if len(prefix) < 2:
+def is_word_character(char):
+    return len(char) == 1 and (char.isalnum() or char == "_")
+
+
+def reset_completion_session(event=None):
+    # Called for edits that can change the word under the cursor without a
+    # matching one-character cursor move: pastes, cuts, undo/redo, clicks.
+    global last_insert_position
+    last_insert_position = None
+
+
+def on_document_edit(kind, offset, value):
+    # Every widget edit, however it was made, reaches the model and then here.
+    line = document.position_of(offset)[0]
+    last_line = line + value.count("\n") if kind == "insert" else line
+    spell_checker.mark_dirty(line, last_line)
+
+
+def expand_finished_token(event):
+    # Runs on KeyPress, before a boundary character is inserted, so the token
+    # just finished ends at the cursor. Only a bounded window before the cursor
+    # is read; the document is never rescanned.
+    char = event.char
+    if not live_expansion_enabled.get() or not char:
+        return
+    if not (char.isspace() or char in trie.ABBREVIATION_PUNCTUATION):
+        return
+    # One character more than the limit, so an over-long token is seen as one.
+    before = text.get(f"insert-{trie.MAX_ABBREVIATION_TOKEN + 1}c", INSERT)
+    if not before or before[-1].isspace():
+        return
+    token = before.split()[-1]
+    expansion = trie.live_token_expansion(abbreviation_trie, emoji_trie, token)
+    if expansion is None:
+        return
+    # Resolved through the mirror: Tk 8.6 counts an emoji as two columns, so
+    # "insert-Nc" with code-point lengths can land inside the wrong span.
+    core_start, core_end, replacement = expansion
+    cursor = text_mirror.offset(INSERT)
+    start = text_mirror.index(cursor - len(token) + core_start)
+    end = text_mirror.index(cursor - len(token) + core_end)
+    text.config(autoseparators=False)
+    text.edit_separator()
+    text.replace(start, end, replacement)
+    text.edit_separator()
+    text.config(autoseparators=True)
+    reset_completion_session()
+
+
+def toggle_spell_check():
+    if spell_check_enabled.get() and trie_data is None:
+        status.config(text="Spell checking will start once the dictionaries are loaded")
+    elif spell_check_enabled.get():
+        spell_checker.enable()
+    else:
+        spell_checker.disable()
+
+
+def show_dictionary_progress(message):
+    status.config(text=message)
+
+
+def install_dictionaries(artifact, error, seconds):
+    global trie_data, main_trie, abbreviation_trie, emoji_trie, completion_session
+    if error is not None:
+        status.config(text="Dictionaries unavailable: suggestions and spell checking are off")
+        messagebox.showerror("Dictionaries", f"Could not load the dictionaries:\n{error}")
         return
+    trie_data = artifact
+    main_trie = trie_data["words"]
+    abbreviation_trie = trie_data["abbreviations"]
+    emoji_trie = trie_data["emoji"]
+    trie.suggestion_cache.clear()
+    completion_session = trie.CompletionSession(main_trie, emoji_trie, cache=trie.suggestion_cache,
+                                                max_typo_distance=2)
+    spell_checker.set_word_trie(main_trie)
+    if spell_check_enabled.get():
+        spell_checker.enable()
+    perf.record("startup.load_tries", int(seconds * 1e9), always=True)
+    status.config(text=f"Dictionaries ready ({seconds:.1f} s)")
+
+
+def update_completion_session(event):
+    global last_insert_position
+    insert_index = text.index(INSERT)
+    line, column = map(int, insert_index.split("."))
+    previous = last_insert_position
+    last_insert_position = (line, column)
+
+    if previous is not None and previous[0] == line:
+        if column == previous[1] and not event.char:
+            return
+        if column == previous[1] + 1 and is_word_character(event.char):
+            completion_session.push(event.char)
+            return
+        if column == previous[1] - 1 and event.keysym == "BackSpace" and completion_session.prefix:
+            completion_session.pop()
+            return
+
+    # Cursor jump or anything else we cannot follow one step at a time.
+    completion_session.reset(text.get("insert-1c wordstart", insert_index))
+
 
-    word_suggestions = trie.autocomplete(main_trie, prefix)
-    emoji_suggestions = trie.autocomplete_emoji(emoji_trie, prefix)
-    all_suggestions = word_suggestions + emoji_suggestions
+def hide_autocomplete():
+    autocomplete_window.withdraw()
+
+
+def show_suggestions(all_suggestions):
+    # Runs on the Tk thread with results from the suggestion worker; the popup
+    # is created once at startup and only its contents change here. None means
+    # the lookup failed, which must not leave older suggestions on screen.
     if not all_suggestions:
+        hide_autocomplete()
         return
 
-    autocomplete_window = Toplevel(master)
-    autocomplete_window.wm_overrideredirect(True)
-    autocomplete_window.configure(bg='white', relief='solid', bd=1)
+    autocomplete_listbox.delete(0, END)
+    for suggestion in all_suggestions:
+        if isinstance(suggestion, tuple):
+            display_text = f"{suggestion[0]} {suggestion[1]}"
+            autocomplete_listbox.insert(END, display_text)
+        else:
+            autocomplete_listbox.insert(END, suggestion)
+    autocomplete_listbox.config(height=min(len(all_suggestions), 5))
 
     try:
         bbox = text.bbox(INSERT)
@@ -109,38 +252,94 @@ def handle_autocomplete(event):
     except:
         autocomplete_window.geometry(f"+{master.winfo_x() + 100}+{master.winfo_y() + 100}")
 
-    listbox = Listbox(autocomplete_window, height=min(len(all_suggestions), 5))
-    listbox.pack()
+    autocomplete_window.deiconify()
+    autocomplete_window.lift()
 
-    for suggestion in all_suggestions:
-        if isinstance(suggestion, tuple):
-            display_text = f"{suggestion[0]} {suggestion[1]}"
-            listbox.insert(END, display_text)
-        else:
-            listbox.insert(END, suggestion)
 
-    listbox.bind("<<ListboxSelect>>", on_autocomplete_select)
+@perf.timed("autocomplete.keystroke")
+def handle_autocomplete(event):
+    update_completion_session(event)
+    if len(completion_session.prefix) < 2:
+        suggestion_worker.cancel()
+        hide_autocomplete()
+        return
+
+    task = completion_session.suggestions_task()
+    if perf.enabled:
+        task = perf.timed("autocomplete.suggestions")(task)
+    suggestion_worker.request(task)
+
 
+def show_suggestion_cache_stats():
+    stats = trie.suggestion_cache.stats()
+    messagebox.showinfo("Suggestion Cache", (
+        f"Entries: {stats['size']} / {stats['maxsize']}\n"
+        f"Hits: {stats['hits']}   Misses: {stats['misses']}\n"
+        f"Hit rate: {stats['hit_rate']:.1%}\n"
+        f"Evictions: {stats['evictions']}   Invalidations: {stats['invalidations']}"
+    ))
 
-def show_punctuation_analysis():
 
-    content = text.get("1.0", END)
-    analysis = trie.analyze_sentence_punctuation(punctuation_trie, content)
-    if not analysis:
-        messagebox.showinfo("Punctuation Analysis", "No standard punctuation found.")
+@perf.timed("tools.document_statistics")
+def show_document_statistics():
+    names = {char: trie.search_punctuation(punctuation_trie, char) for char in doc_stats.PUNCTUATION}
+    if viewer is None:
+        stats = doc_stats.analyze_chunks(document.snapshot().iter_chunks())
+        doc_stats.show_stats_dialog(master, stats, names)
         return
-    result_str = "Found Punctuation:\n\n"
-    for char, name in analysis:
-        result_str += f"'{char}' -> {name}\n"
-    messagebox.showinfo("Punctuation Analysis", result_str)
 
+    # In viewer mode the whole mapped file is analyzed on a worker thread.
+    mapped, result = viewer.file, []
+
+    def analyze():
+        try:
+            result.append(doc_stats.analyze_chunks(mapped.iter_chunks()))
+        except ValueError:
+            pass  # The viewer was closed and the mapping with it.
+
+    def wait_for_result():
+        if worker.is_alive():
+            master.after(100, wait_for_result)
+        elif result:
+            status.config(text="Ready")
+            doc_stats.show_stats_dialog(master, result[0], names, f"Statistics: {os.path.basename(mapped.path)}")
 
+    status.config(text="Computing statistics over the mapped file...")
+    worker = threading.Thread(target=analyze, daemon=True)
+    worker.start()
+    wait_for_result()
+
+
+def find_text():
+    needle = simpledialog.askstring("Find", "Find what:", parent=master)
+    if not needle:
+        return
+    if viewer is not None:
+        found = viewer.find_next(needle)
+    else:
+        index = text.search(needle, "insert+1c", stopindex="end") or text.search(needle, "1.0", stopindex="insert")
+        found = bool(index)
+        if found:
+            text.tag_remove(SEL, "1.0", END)
+            text.tag_add(SEL, index, f"{index}+{len(needle)}c")
+            text.mark_set(INSERT, index)
+            text.see(index)
+    if not found:
+        messagebox.showinfo("Find", f"'{needle}' was not found.")
+
+
+@perf.timed("tools.expand_abbreviations")
 def run_abbreviation_expansion():
-    content = text.get("1.0", END)
-    expanded_content = trie.expand_abbreviations_in_sentence(main_trie, content)
-    text.delete("1.0", END)
-    text.insert("1.0", expanded_content)
-    messagebox.showinfo("Expansion Complete", "Abbreviations have been expanded in the text.")
+    edits = list(trie.iter_abbreviation_edits(abbreviation_trie, document.snapshot().iter_chunks()))
+    # Patch only the expanded spans, back to front so earlier offsets stay
+    # valid, as a single undo step.
+    text.config(autoseparators=False)
+    text.edit_separator()
+    for start, end, replacement in reversed(edits):
+        text.replace(text_mirror.index(start), text_mirror.index(end), replacement)
+    text.edit_separator()
+    text.config(autoseparators=True)
+    messagebox.showinfo("Expansion Complete", f"Expanded {len(edits)} abbreviation(s) in the text.")
 
 
 # ==============================================================================
@@ -150,51 +349,257 @@ def run_abbreviation_expansion():
 # ==============================================================================
 
 def new():
-    global file_name
+    global file_name, file_encoding, file_newline
     if messagebox.askquestion(title="Save File", message="Would you like to save this file?") == 'yes':
         save()
+    cancel_loading()
+    close_viewer()
     text.delete("1.0", END)
+    saver.forget()
     file_name = ""
+    file_encoding, file_newline = "utf-8", "\n"
+    edit_journal.mark_clean()
     master.title("Untitled* - Script Editor")
 
 
 def open_file():
-    global file_name
+    global file_name, loading_job
     if messagebox.askquestion(title="Save File", message="Would you like to save before opening?") == 'yes':
         save()
     path = filedialog.askopenfilename()
+    if path and os.path.getsize(path) >= mmap_viewer.VIEWER_THRESHOLD and messagebox.askyesno(
+            "Large File", f"{os.path.basename(path)} is very large. Open it in the read-only viewer instead?"):
+        open_viewer(path)
+        return
+    if path and richtext.is_rich_document(path):
+        open_rich_document(path)
+        return
     if path:
+        cancel_loading()
+        close_viewer()
         file_name = path
         master.title(f"{os.path.basename(file_name)} - Script Editor")
-        text.delete("1.0", END)
-        with open(file_name, 'r') as file:
-            text.insert(INSERT, file.read())
+        loading_job = file_loader.ChunkedLoader(text, path, show_loading_progress, finish_loading)
+        # The file itself is the recovery point for what the loader inserts.
+        edit_journal.paused = True
+        loading_job.start()
+        saver.forget()
+        reset_completion_session()
+
+
+@perf.timed("file.open_rich")
+def open_rich_document(path):
+    global file_name, file_encoding, file_newline, styler
+    # Everything is validated before the editor changes, so a bad file leaves
+    # the open document (and the file a Save would write to) as it was.
+    try:
+        content, styles = richtext.read_rich_document(path, formatting_model.style_names())
+    except (OSError, ValueError) as error:
+        messagebox.showerror("Open File", f"Could not open {os.path.basename(path)}:\n{error}")
+        return
+    cancel_loading()
+    close_viewer()
+    if styler is not None:
+        styler.cancel()
+    edit_journal.paused = True
+    text.config(undo=False)
+    text.delete("1.0", END)
+    text.insert("1.0", content)
+    text.config(undo=True)
+    text.edit_reset()
+    edit_journal.paused = False
+    file_name, file_encoding, file_newline = path, "utf-8", "\n"
+    saver.forget()
+    edit_journal.mark_clean(path, file_encoding)
+
+    # Styles on screen are painted now, the rest over the next event-loop turns.
+    formatting_model.load(styles)
+    styler = richtext.LazyStyler(text, formatting_model)
+    styler.start()
+    reset_completion_session()
+    master.title(f"{os.path.basename(path)} - Script Editor")
+    status.config(text=f"Loaded {os.path.basename(path)}: {len(content):,} characters, "
+                       f"{sum(map(len, styles.values())):,} style runs")
+
+
+def on_styler_edit(kind, offset, value):
+    if styler is not None:
+        styler.on_edit(kind, offset, value)
+
+
+def show_loading_progress(loader):
+    status.config(text=f"Loading {os.path.basename(loader.path)}... {loader.progress():.0%} "
+                       f"({loader.loaded_chars:,} characters)  Esc to cancel")
+
+
+def finish_loading(loader):
+    global loading_job, file_name, file_encoding, file_newline
+    loading_job = None
+    edit_journal.paused = False
+    perf.record("file.load", int(loader.seconds * 1e9))
+    name = os.path.basename(loader.path)
+    if loader.cancelled:
+        # Saving a partial document must never overwrite the original file.
+        file_name = ""
+        master.title(f"{name} (partial) - Script Editor")
+        status.config(text=f"Loading cancelled after {loader.loaded_chars:,} characters")
+    else:
+        file_encoding, file_newline = loader.encoding, loader.newline
+        line_ends = "CRLF" if file_newline == "\r\n" else "CR" if file_newline == "\r" else "LF"
+        status.config(text=f"Loaded {name}: {loader.loaded_chars:,} characters ({loader.encoding}, {line_ends})")
+        if loader.encoding != loader.detected_encoding:
+            messagebox.showwarning("Open File", f"{name} is not valid {loader.detected_encoding} throughout, so it "
+                                                f"was opened as {loader.encoding}. Saving writes it back in "
+                                                f"{loader.encoding}, byte for byte where it was not edited.")
+    edit_journal.mark_clean(file_name, file_encoding)
+
+
+def cancel_loading(event=None):
+    if loading_job is not None:
+        loading_job.cancel()
+
+
+def open_viewer(path=None):
+    global viewer, file_name
+    path = path or filedialog.askopenfilename()
+    if not path:
+        return
+    cancel_loading()
+    close_viewer()
+    edit_journal.paused = True
+    try:
+        viewer = mmap_viewer.MmapViewer(text, scrollbar, path)
+    except (OSError, ValueError) as error:
+        edit_journal.paused = False
+        messagebox.showerror("Viewer", str(error))
+        return
+    edit_journal.mark_clean()
+    # Nothing in viewer mode may be saved back over the file.
+    file_name = ""
+    master.title(f"{os.path.basename(path)} [read-only] - Script Editor")
+    reset_completion_session()
+    poll_viewer_index()
+
+
+def poll_viewer_index():
+    if viewer is None:
+        return
+    viewer.refresh()
+    mapped = viewer.file
+    if mapped.index_complete:
+        status.config(text=f"Viewing {os.path.basename(mapped.path)}: {mapped.line_count():,} lines (read-only)")
+        return
+    status.config(text=f"Indexing {os.path.basename(mapped.path)}... {mapped.indexed_bytes / max(mapped.size, 1):.0%}")
+    master.after(200, poll_viewer_index)
+
+
+def close_viewer():
+    global viewer
+    if viewer is not None:
+        viewer.close()
+        viewer = None
+        edit_journal.paused = False
 
 
 def save():
-    global file_name
+    # Returns True once a save has been queued.
+    global file_name, journal_mark
+    if loading_job is not None:
+        messagebox.showinfo("Save File", "Please wait until the file has finished loading.")
+        return
+    if viewer is not None:
+        messagebox.showinfo("Save File", "Files opened in the viewer are read-only.")
+        return
     if not file_name:
-        path = filedialog.asksaveasfilename(initialfile="Untitled.txt", defaultextension=".txt")
+        path = filedialog.asksaveasfilename(initialfile="Untitled.txt", defaultextension=".txt",
+                                            filetypes=[("Text", "*.txt"), ("Formatted document", "*" + richtext.EXTENSION),
+                                                       ("All files", "*")])
         if not path:
             return
         file_name = path
-    with open(file_name, 'w') as write:
-        write.write(text.get("1.0", END))
-    master.title(f"{os.path.basename(file_name)} - Script Editor")
+    status.config(text=f"Saving {os.path.basename(file_name)}...")
+    journal_mark = edit_journal.edit_count
+    if richtext.is_rich_document(file_name):
+        styles = formatting_model.export()
+        saver.save(file_name, document.snapshot(), "utf-8",
+                   lambda path, snapshot: richtext.write_rich_document(path, snapshot, styles))
+    else:
+        saver.save(file_name, document.snapshot(), file_encoding, newline=file_newline)
+    return True
+
+
+def finish_saving(result):
+    perf.record("file.save", int(result.seconds * 1e9))
+    name = os.path.basename(result.path)
+    if result.error is not None:
+        status.config(text=f"Saving {name} failed")
+        messagebox.showerror("Save File", f"Could not save {name}:\n{result.error}")
+        return
+    master.title(f"{name} - Script Editor")
+    edit_journal.mark_clean(result.path, file_encoding)
+    if edit_journal.edit_count != journal_mark:
+        # Edits made while the save ran are not in the file yet.
+        edit_journal.compact()
+    reused = f", {result.bytes_reused:,} reused" if result.bytes_reused else ""
+    status.config(text=f"Saved {name}: {result.bytes_written:,} bytes{reused} in {result.seconds * 1000:.0f} ms")
 
 
 def close():
-    if messagebox.askquestion(title="Save File", message="Would you like to save before quitting?") == 'yes':
-        save()
+    if viewer is None:
+        answer = messagebox.askyesnocancel(title="Save File", message="Would you like to save before quitting?")
+        if answer is None or (answer and not save()):
+            return
+    # Every save still running must reach the disk before the journal goes. If
+    # one failed, finish_saving has shown why and the editor stays open with
+    # the journal intact; declining to save is the only way to drop edits.
+    master.update_idletasks()
+    if any(result.error is not None for result in saver.wait()):
+        return
+    cancel_loading()
+    close_viewer()
+    saver.stop()
+    edit_journal.stop()
+    suggestion_worker.stop()
+    perf.stop_profile()
+    perf.stop_trace()
     master.quit()
 
 
+def recover_session():
+    # Offers, one at a time, the journals left behind by editors that did not
+    # shut down cleanly. The first one accepted is loaded; any after it stay on
+    # disk and are offered again at the next launch.
+    global file_name, file_encoding, file_newline
+    for directory, lock in journal.claim_orphans():
+        recovered = journal.recover(directory)
+        if recovered is None:
+            journal.remove_session(directory, lock)
+            continue
+        content, name, encoding = recovered
+        label = os.path.basename(name) if name else "Untitled"
+        if not messagebox.askyesno("Recover Unsaved Changes",
+                                   f"The editor did not shut down cleanly. Recover unsaved changes to {label}?"):
+            journal.remove_session(directory, lock)
+            continue
+        file_name, file_encoding = name, encoding
+        file_newline = file_loader.detect_newline(name, encoding) if name else "\n"
+        edit_journal.mark_clean(name, encoding)
+        # The recovered text is not on disk yet, so inserting it starts a new
+        # journal; the old one goes once that is written.
+        text.insert("1.0", content)
+        text.edit_reset()
+        edit_journal.retire(directory, lock)
+        master.title(f"{label} (recovered)* - Script Editor")
+        status.config(text=f"Recovered {len(content):,} characters of unsaved changes")
+        return
+
+
 def cut(): master.event_generate("<<Cut>>")
 def copy(): master.event_generate("<<Copy>>")
 def paste(): master.event_generate("<<Paste>>")
 def select_all(): text.tag_add(SEL, "1.0", END); return "break"
-def undo(): text.edit_undo()
-def redo(): text.edit_redo()
+def undo(): text.edit_undo(); reset_completion_session()
+def redo(): text.edit_redo(); reset_completion_session()
 
 
 # ==============================================================================
@@ -205,21 +610,13 @@ def redo(): text.edit_redo()
 
 def change_font_color():
     color_code = colorchooser.askcolor(title="Choose color")
-    if color_code and color_code[1]:
-        color_tag = f"color{color_code[1].replace('#', '')}"
-        text.tag_config(color_tag, foreground=color_code[1])
-        if text.tag_ranges("sel"):
-            text.tag_add(color_tag, "sel.first", "sel.last")
+    if color_code and color_code[1] and text.tag_ranges("sel"):
+        formatting_model.set_color(color_code[1], "sel.first", "sel.last")
 
 
 def clear_formatting():
     if text.tag_ranges("sel"):
-        tags_to_remove = ["bold", "italic", "underline", "overstrike", "blockquote", "code"]
-        for tag in text.tag_names():
-            if tag.startswith("color"):
-                tags_to_remove.append(tag)
-        for tag in tags_to_remove:
-            text.tag_remove(tag, "sel.first", "sel.last")
+        formatting_model.clear_range("sel.first", "sel.last")
 
 
 def add_bullets():
@@ -239,9 +636,8 @@ def add_numbers():
 
 
 def block_quote():
-    text.tag_config("blockquote", lmargin1=25, lmargin2=25)
     if text.tag_ranges("sel"):
-        text.tag_add("blockquote", "sel.first", "sel.last")
+        formatting_model.apply_range("blockquote", "sel.first", "sel.last")
 
 
 def insert_horizontal_rule():
@@ -249,45 +645,19 @@ def insert_horizontal_rule():
 
 
 def apply_code_style():
-    text.tag_config("code", font=("Courier", 12), background="#f0f0f0")
-    if text.tag_ranges("sel"):
-        text.tag_add("code", "sel.first", "sel.last")
-
-
-def bold():
-    text.tag_config("bold", font=(current_font_family, current_font_size, "bold"))
     if text.tag_ranges("sel"):
-        if "bold" in text.tag_names("sel.first"):
-            text.tag_remove("bold", "sel.first", "sel.last")
-        else:
-            text.tag_add("bold", "sel.first", "sel.last")
-
-
-def italic():
-    text.tag_config("italic", font=(current_font_family, current_font_size, "italic"))
-    if text.tag_ranges("sel"):
-        if "italic" in text.tag_names("sel.first"):
-            text.tag_remove("italic", "sel.first", "sel.last")
-        else:
-            text.tag_add("italic", "sel.first", "sel.last")
+        formatting_model.apply_range("code", "sel.first", "sel.last")
 
 
-def underline():
-    text.tag_config("underline", underline=True)
+def toggle_style(style):
     if text.tag_ranges("sel"):
-        if "underline" in text.tag_names("sel.first"):
-            text.tag_remove("underline", "sel.first", "sel.last")
-        else:
-            text.tag_add("underline", "sel.first", "sel.last")
+        formatting_model.toggle(style, "sel.first", "sel.last")
 
 
-def strike():
-    text.tag_config("overstrike", overstrike=True)
-    if text.tag_ranges("sel"):
-        if "overstrike" in text.tag_names("sel.first"):
-            text.tag_remove("overstrike", "sel.first", "sel.last")
-        else:
-            text.tag_add("overstrike", "sel.first", "sel.last")
+def bold(): toggle_style("bold")
+def italic(): toggle_style("italic")
+def underline(): toggle_style("underline")
+def strike(): toggle_style("overstrike")
 
 
 # ==============================================================================
@@ -362,8 +732,47 @@ scrollbar.pack(side=RIGHT, fill=Y)
 text.pack(side=LEFT, fill=BOTH, expand=True)
 text_frame.pack(side=BOTTOM, fill=BOTH, expand=True)
 
+# --- Autocomplete Popup (created once, then only shown, hidden and refilled) ---
+autocomplete_window = Toplevel(master)
+autocomplete_window.wm_overrideredirect(True)
+autocomplete_window.configure(bg='white', relief='solid', bd=1)
+autocomplete_window.withdraw()
+autocomplete_listbox = Listbox(autocomplete_window, height=5)
+autocomplete_listbox.pack()
+autocomplete_listbox.bind("<<ListboxSelect>>", on_autocomplete_select)
+
+suggestion_worker = SuggestionWorker(master, show_suggestions)
+
+spell_checker = spellcheck.SpellChecker(text, main_trie)
+spell_check_enabled = BooleanVar(value=False)
+live_expansion_enabled = BooleanVar(value=False)
+
+text_mirror = document_model.TextMirror(text, document)
+text_mirror.add_listener(on_document_edit)
+
+saver = file_saver.BackgroundSaver(master, finish_saving)
+text_mirror.add_listener(saver.note_edit)
+
+formatting_model = formatting.FormattingModel(text, text_mirror)
+formatting_model.define("bold", font=(current_font_family, current_font_size, "bold"))
+formatting_model.define("italic", font=(current_font_family, current_font_size, "italic"))
+formatting_model.define("underline", underline=True)
+formatting_model.define("overstrike", overstrike=True)
+formatting_model.define("blockquote", lmargin1=25, lmargin2=25)
+formatting_model.define("code", font=("Courier", 12), background="#f0f0f0")
+text_mirror.add_listener(formatting_model.on_edit)
+text_mirror.add_listener(on_styler_edit)
+
+edit_journal = journal.EditJournal(master, document)
+text_mirror.add_listener(edit_journal.record)
+
 text.focus_set()
 text.bind('<KeyRelease>', handle_autocomplete)
+for sequence in ("<<Paste>>", "<<Cut>>", "<<Undo>>", "<<Redo>>"):
+    text.bind(sequence, reset_completion_session, add="+")
+text.bind("<ButtonRelease-1>", reset_completion_session, add="+")
+text.bind("<KeyPress>", expand_finished_token, add="+")
+master.bind("<Escape>", cancel_loading)
 
 # --- Menu Bar ---
 menu = Menu(master)
@@ -373,7 +782,9 @@ file_menu = Menu(menu, tearoff=0)
 menu.add_cascade(label="File", menu=file_menu)
 file_menu.add_command(label="New", command=new)
 file_menu.add_command(label="Open...", command=open_file)
+file_menu.add_command(label="Open in Viewer...", command=open_viewer)
 file_menu.add_command(label="Save", command=save)
+file_menu.add_command(label="Cancel Loading", command=cancel_loading)
 file_menu.add_separator()
 file_menu.add_command(label="Exit", command=close)
 
@@ -387,14 +798,20 @@ edit_menu.add_command(label="Copy", command=copy)
 edit_menu.add_command(label="Paste", command=paste)
 edit_menu.add_separator()
 edit_menu.add_command(label="Select All", command=select_all)
+edit_menu.add_command(label="Find...", command=find_text)
 
 tools_menu = Menu(menu, tearoff=0)
 menu.add_cascade(label="Tools", menu=tools_menu)
 tools_menu.add_command(label="Expand Abbreviations", command=run_abbreviation_expansion)
-tools_menu.add_command(label="Analyze Punctuation", command=show_punctuation_analysis)
+tools_menu.add_command(label="Document Statistics", command=show_document_statistics)
+tools_menu.add_separator()
+tools_menu.add_checkbutton(label="Check Spelling", variable=spell_check_enabled, command=toggle_spell_check)
+tools_menu.add_checkbutton(label="Expand While Typing", variable=live_expansion_enabled)
 
 help_menu = Menu(menu, tearoff=0)
 menu.add_cascade(label="Help", menu=help_menu)
+help_menu.add_command(label="Suggestion Cache Stats", command=show_suggestion_cache_stats)
+help_menu.add_command(label="Performance", command=lambda: perf.show_panel(master))
 help_menu.add_command(label="About", command=lambda: messagebox.showinfo("About", "Simple Text Editor"))
 
 
@@ -405,4 +822,8 @@ help_menu.add_command(label="About", command=lambda: messagebox.showinfo("About"
 # ==============================================================================
 
 master.protocol("WM_DELETE_WINDOW", close)
+DictionaryLoader(master, show_dictionary_progress, install_dictionaries,
+                 path=trie_artifact.DEFAULT_ARTIFACT_PATH, abbreviations_path="abbreviations.json",
+                 use_dawg=USE_DAWG_DICTIONARY, counts_path=trie_artifact.DEFAULT_COUNTS_PATH).start()
+recover_session()
 master.mainloop()
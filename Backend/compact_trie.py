@@ -0,0 +1,463 @@
+# ==============================================================================
+# I. IMPORTS AND CONSTANTS
+# ==============================================================================
+
+import heapq
+from array import array
+from collections import deque
+
+END_OF_WORD = "*"
+
+# Payload codes stored per node: -1 = not a word, 0 = plain word, k = strings[k-1]
+NO_PAYLOAD = -1
+WORD_PAYLOAD = 0
+
+# What the strings of a trie hold. Each trie holds one kind, so a lookup never
+# has to inspect the value to know what it found.
+STRING_EMOJI = 0
+STRING_EXPANSION = 1
+
+
+class Payload:
+    """Typed view of a trie terminal: word flag, emoji, expansion and score.
+
+    Treated as immutable: payloads are hashed when a DAWG merges equal states.
+    """
+
+    __slots__ = ("is_word", "emoji", "expansion", "score")
+
+    def __init__(self, is_word: bool = False, emoji: str = None, expansion: str = None, score: int = 0):
+        self.is_word = is_word
+        self.emoji = emoji
+        self.expansion = expansion
+        self.score = score
+
+    def __eq__(self, other):
+        if not isinstance(other, Payload):
+            return NotImplemented
+        return (self.is_word, self.emoji, self.expansion, self.score) == \
+            (other.is_word, other.emoji, other.expansion, other.score)
+
+    def __hash__(self) -> int:
+        return hash((self.is_word, self.emoji, self.expansion, self.score))
+
+    def __repr__(self) -> str:
+        return (f"Payload(is_word={self.is_word!r}, emoji={self.emoji!r}, "
+                f"expansion={self.expansion!r}, score={self.score!r})")
+
+
+# Shared by every unscored dictionary word.
+WORD = Payload(is_word=True)
+
+
+# ==============================================================================
+# II. BUILDING THE FLAT ARRAYS
+#
+# Nodes are numbered breadth-first, so the children of node n are the
+# contiguous, label-sorted run first_child[n]..first_child[n+1]. Each node costs
+# three machine integers instead of a Python dict.
+# ==============================================================================
+
+class _PayloadTable:
+    # A frozen trie stores one string per node, of the trie's one string kind,
+    # and scores in a separate array. A Payload that cannot be stored that way
+    # (both strings, or a string of the other kind) is rejected rather than
+    # silently reduced. With string_kind None the first typed string decides.
+    def __init__(self, string_kind: int = None):
+        self.strings = []
+        self.string_kind = string_kind
+        self._ids = {}
+
+    def _kept_string(self, payload: Payload):
+        if payload.emoji is not None and payload.expansion is not None:
+            raise ValueError(f"{payload!r} holds two strings; a frozen trie keeps one per word")
+        if payload.emoji is None and payload.expansion is None:
+            return None
+        kind = STRING_EMOJI if payload.emoji is not None else STRING_EXPANSION
+        if self.string_kind is None:
+            self.string_kind = kind
+        elif kind != self.string_kind:
+            raise ValueError(f"{payload!r} does not match the trie's string kind")
+        return payload.emoji if kind == STRING_EMOJI else payload.expansion
+
+    def code(self, value) -> int:
+        if isinstance(value, Payload):
+            value = self._kept_string(value) or value.is_word
+        if value is None or value is False:
+            return NO_PAYLOAD
+        if not isinstance(value, str):
+            return WORD_PAYLOAD
+        if value not in self._ids:
+            self.strings.append(value)
+            self._ids[value] = len(self.strings)
+        return self._ids[value]
+
+    @staticmethod
+    def score(value) -> int:
+        return value.score if isinstance(value, Payload) else 0
+
+
+def compile_dict_trie(trie: dict, string_kind: int = None):
+    # Returns (labels, first_child, payloads, strings, scores, string_kind);
+    # scores is None unless some Payload carries one.
+    labels = array("I", [0])
+    first_child = array("I")
+    payloads = array("i")
+    scores = array("I")
+    table = _PayloadTable(string_kind)
+
+    queue = deque([trie])
+    next_index = 1
+    while queue:
+        node = queue.popleft()
+        first_child.append(next_index)
+        value = node.get(END_OF_WORD)
+        payloads.append(table.code(value))
+        scores.append(table.score(value))
+
+        children = sorted((char, child) for char, child in node.items() if char != END_OF_WORD)
+        for char, child in children:
+            labels.append(ord(char))
+            queue.append(child)
+        next_index += len(children)
+    first_child.append(next_index)
+
+    kind = STRING_EMOJI if table.string_kind is None else table.string_kind
+    return labels, first_child, payloads, table.strings, scores if any(scores) else None, kind
+
+
+def compile_sorted_items(items: list, scores: dict = None, string_kind: int = None):
+    # items: (word, payload) pairs sorted by word with no duplicate words. Every
+    # queued range shares a prefix of length `depth`; the word equal to that
+    # prefix (if any) sorts first in the range. A word's score comes from
+    # `scores`, else from its Payload. Returns (labels, first_child, payloads,
+    # strings, scores, string_kind); scores is None when there are none.
+    labels = array("I", [0])
+    first_child = array("I")
+    payloads = array("i")
+    word_scores = array("I")
+    table = _PayloadTable(string_kind)
+
+    queue = deque([(0, len(items), 0)])
+    next_index = 1
+    while queue:
+        low, high, depth = queue.popleft()
+        first_child.append(next_index)
+
+        score = 0
+        if low < high and len(items[low][0]) == depth:
+            word, payload = items[low]
+            payloads.append(table.code(payload))
+            score = table.score(payload)
+            if scores is not None:
+                score = scores.get(word, score)
+            low += 1
+        else:
+            payloads.append(NO_PAYLOAD)
+        word_scores.append(score)
+
+        while low < high:
+            char = items[low][0][depth]
+            end = low + 1
+            while end < high and items[end][0][depth] == char:
+                end += 1
+            labels.append(ord(char))
+            queue.append((low, end, depth + 1))
+            next_index += 1
+            low = end
+    first_child.append(next_index)
+
+    if scores is None and not any(word_scores):
+        word_scores = None
+    kind = STRING_EMOJI if table.string_kind is None else table.string_kind
+    return labels, first_child, payloads, table.strings, word_scores, kind
+
+
+def compute_best_scores(first_child, scores, targets=None) -> array:
+    # best[n] is the highest word score anywhere below n. Children always have
+    # higher numbers than their parents, so one reverse sweep is enough.
+    best = array("I", scores)
+    for node in range(len(scores) - 1, -1, -1):
+        value = best[node]
+        for edge in range(first_child[node], first_child[node + 1]):
+            child = targets[edge] if targets is not None else edge
+            if best[child] > value:
+                value = best[child]
+        best[node] = value
+    return best
+
+
+# ==============================================================================
+# III. COMPACT TRIE ENGINE
+#
+# Same lookup operations as the dict-based functions in trie.py, so an instance
+# can be passed anywhere a dict trie is accepted.
+#
+# Words can carry a frequency score. Each node then also records the best score
+# in its subtree, and autocomplete becomes a best-first search that pops the k
+# highest-scoring completions without walking the rest of the subtree.
+# ==============================================================================
+
+class CompactTrie:
+    """Array-backed trie; the structure is immutable, word scores are not."""
+
+    __slots__ = ("labels", "first_child", "payloads", "strings", "scores", "best", "string_kind")
+
+    def __init__(self, labels, first_child, payloads, strings, scores=None, best=None,
+                 string_kind: int = STRING_EMOJI):
+        self.labels = labels
+        self.first_child = first_child
+        self.payloads = payloads
+        self.strings = strings
+        self.string_kind = string_kind
+        self.scores = scores
+        if scores is not None and best is None:
+            best = compute_best_scores(first_child, scores, self._targets())
+        self.best = best
+
+    @classmethod
+    def _compiled(cls, compiled) -> "CompactTrie":
+        labels, first_child, payloads, strings, scores, string_kind = compiled
+        return cls(labels, first_child, payloads, strings, scores, string_kind=string_kind)
+
+    @classmethod
+    def from_dict_trie(cls, trie: dict, string_kind: int = None) -> "CompactTrie":
+        # string_kind None: taken from the trie's typed payloads.
+        return cls._compiled(compile_dict_trie(trie, string_kind))
+
+    @classmethod
+    def from_items(cls, items, scores: dict = None, string_kind: int = None) -> "CompactTrie":
+        merged = {}
+        for word, payload in items:
+            merged[word.lower()] = payload
+        return cls._compiled(compile_sorted_items(sorted(merged.items()), scores, string_kind))
+
+    @classmethod
+    def from_abbreviations(cls, abbreviations: dict) -> "CompactTrie":
+        return cls.from_items(abbreviations.items(), string_kind=STRING_EXPANSION)
+
+    @classmethod
+    def from_words(cls, word_list, scores: dict = None) -> "CompactTrie":
+        return cls.from_items(((word, True) for word in word_list), scores)
+
+    def __len__(self) -> int:
+        return len(self.payloads)
+
+    def nbytes(self) -> int:
+        arrays = (self.labels, self.first_child, self.payloads, self.scores, self.best)
+        return sum(len(a) * a.itemsize for a in arrays if a is not None)
+
+    # --- Node navigation ---
+
+    def _child(self, node: int, character: str) -> int:
+        labels = self.labels
+        code = ord(character)
+        low, end = self.first_child[node], self.first_child[node + 1]
+        high = end
+        while low < high:
+            mid = (low + high) // 2
+            if labels[mid] < code:
+                low = mid + 1
+            else:
+                high = mid
+        if low < end and labels[low] == code:
+            return low
+        return -1
+
+    def _node_at(self, prefix: str) -> int:
+        node = 0
+        for character in prefix:
+            node = self._child(node, character)
+            if node < 0:
+                return -1
+        return node
+
+    def _string(self, payload: int) -> str:
+        return self.strings[payload - 1]
+
+    def _typed_payload(self, node: int):
+        payload = self.payloads[node]
+        if payload == NO_PAYLOAD:
+            return None
+        score = self.scores[node] if self.scores is not None else 0
+        if payload == WORD_PAYLOAD:
+            return Payload(is_word=True, score=score) if score else WORD
+        if self.string_kind == STRING_EXPANSION:
+            return Payload(expansion=self._string(payload), score=score)
+        return Payload(emoji=self._string(payload), score=score)
+
+    def _payload_value(self, node: int):
+        payload = self.payloads[node]
+        if payload == NO_PAYLOAD:
+            return None
+        if payload == WORD_PAYLOAD:
+            return True
+        return self._string(payload)
+
+    def _collect(self, node: int, prefix: str, max_suggestions: int):
+        # Pre-order walk that expands one child at a time, so only the part of
+        # the subtree needed for max_suggestions results is ever visited.
+        first_child, labels, payloads = self.first_child, self.labels, self.payloads
+        targets = self._targets()
+        results = []
+        if payloads[node] != NO_PAYLOAD:
+            results.append((node, prefix))
+        stack = [[first_child[node], first_child[node + 1], prefix]]
+        while stack and len(results) < max_suggestions:
+            frame = stack[-1]
+            edge = frame[0]
+            if edge == frame[1]:
+                stack.pop()
+                continue
+            frame[0] = edge + 1
+            child = targets[edge] if targets is not None else edge
+            word = frame[2] + chr(labels[edge])
+            if payloads[child] != NO_PAYLOAD:
+                results.append((child, word))
+            stack.append([first_child[child], first_child[child + 1], word])
+        return results[:max_suggestions]
+
+    def _targets(self):
+        return None
+
+    def _ranked(self, node: int, prefix: str, max_suggestions: int):
+        # Node entries are keyed by the best score below them and word entries
+        # by their own score, so words pop in descending score order (ties in
+        # alphabetical order) after touching only O(k * depth) nodes.
+        first_child, labels, payloads = self.first_child, self.labels, self.payloads
+        scores, best = self.scores, self.best
+        targets = self._targets()
+        results = []
+        heap = [(-best[node], prefix, 1, node)]
+        while heap and len(results) < max_suggestions:
+            _, word, is_node, current = heapq.heappop(heap)
+            if not is_node:
+                results.append((current, word))
+                continue
+            if payloads[current] != NO_PAYLOAD:
+                heapq.heappush(heap, (-scores[current], word, 0, current))
+            for edge in range(first_child[current], first_child[current + 1]):
+                child = targets[edge] if targets is not None else edge
+                heapq.heappush(heap, (-best[child], word + chr(labels[edge]), 1, child))
+        return results
+
+    def _completions(self, node: int, prefix: str, max_suggestions: int):
+        if self.best is not None:
+            return self._ranked(node, prefix, max_suggestions)
+        return self._collect(node, prefix, max_suggestions)
+
+    # --- Word scores ---
+
+    def _ensure_scores(self):
+        # One-time cost of scoring an unscored trie: two 4-byte arrays per
+        # node, after which autocomplete is ranked.
+        if self.scores is None:
+            self.scores = array("I", bytes(4 * len(self.payloads)))
+            self.best = array("I", self.scores)
+
+    def get_score(self, word: str) -> int:
+        node = self._node_at(word.lower())
+        if node < 0 or self.payloads[node] == NO_PAYLOAD or self.scores is None:
+            return 0
+        return self.scores[node]
+
+    def set_score(self, word: str, score: int):
+        path = [0]
+        for character in word.lower():
+            node = self._child(path[-1], character)
+            if node < 0:
+                raise KeyError(word)
+            path.append(node)
+        if self.payloads[path[-1]] == NO_PAYLOAD:
+            raise KeyError(word)
+
+        self._ensure_scores()
+        self.scores[path[-1]] = score
+        first_child, scores, best = self.first_child, self.scores, self.best
+        for node in reversed(path):
+            value = scores[node]
+            for child in range(first_child[node], first_child[node + 1]):
+                if best[child] > value:
+                    value = best[child]
+            best[node] = value
+
+    def set_scores(self, scores: dict):
+        for word, score in scores.items():
+            try:
+                self.set_score(word, score)
+            except KeyError:
+                pass
+
+    # --- Node-level access for trie.CompletionSession ---
+
+    def root_node(self) -> int:
+        return 0
+
+    def child_node(self, node: int, character: str):
+        child = self._child(node, character)
+        return child if child >= 0 else None
+
+    def is_word_node(self, node: int) -> bool:
+        return self.payloads[node] != NO_PAYLOAD
+
+    def child_items(self, node: int):
+        labels, targets = self.labels, self._targets()
+        for edge in range(self.first_child[node], self.first_child[node + 1]):
+            yield chr(labels[edge]), (targets[edge] if targets is not None else edge)
+
+    def words_from_node(self, node: int, prefix: str, max_suggestions: int = 10):
+        return [word for _, word in self._completions(node, prefix, max_suggestions)]
+
+    def emoji_words_from_node(self, node: int, prefix: str, max_suggestions: int = 10):
+        return [(word, self._payload_value(found)) for found, word in self._completions(node, prefix, max_suggestions)]
+
+    # --- Public operations ---
+
+    def search(self, word: str) -> bool:
+        node = self._node_at(word)
+        return node >= 0 and self.payloads[node] != NO_PAYLOAD
+
+    def starts_with(self, prefix: str) -> bool:
+        return self._node_at(prefix) >= 0
+
+    def autocomplete(self, prefix: str, max_suggestions: int = 10):
+        prefix_lower = prefix.lower()
+        node = self._node_at(prefix_lower)
+        if node < 0:
+            return []
+        return self.words_from_node(node, prefix_lower, max_suggestions)
+
+    def payload(self, word: str):
+        node = self._node_at(word.lower())
+        return self._typed_payload(node) if node >= 0 else None
+
+    def search_emoji(self, word: str) -> str:
+        node = self._node_at(word.lower())
+        if node < 0 or self.payloads[node] <= WORD_PAYLOAD or self.string_kind != STRING_EMOJI:
+            return ''
+        return self._string(self.payloads[node])
+
+    def autocomplete_emoji(self, prefix: str, max_suggestions: int = 10):
+        prefix_lower = prefix.lower()
+        node = self._node_at(prefix_lower)
+        if node < 0:
+            return []
+        return self.emoji_words_from_node(node, prefix_lower, max_suggestions)
+
+    def search_and_expand(self, word: str) -> str:
+        node = self._node_at(word.lower().strip('.,!?;:"\'()[]{}'))
+        if node < 0 or self.payloads[node] <= WORD_PAYLOAD or self.string_kind != STRING_EXPANSION:
+            return word
+        return self._string(self.payloads[node])
+
+
+def train_compact_trie(word_list) -> CompactTrie:
+    return CompactTrie.from_words(word_list)
+
+
+def train_compact_emoji_trie(emoji_mappings: dict) -> CompactTrie:
+    return CompactTrie.from_items(emoji_mappings.items())
+
+
+def train_compact_abbreviation_trie(abbreviations: dict) -> CompactTrie:
+    return CompactTrie.from_abbreviations(abbreviations)
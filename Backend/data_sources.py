@@ -0,0 +1,110 @@
+# ==============================================================================
+# I. IMPORTS AND CONSTANTS
+# ==============================================================================
+
+import json
+import os
+import sys
+import threading
+
+DEFAULT_ABBREVIATIONS_PATH = "abbreviations.json"
+WORDS_SOURCE = "nltk.corpus.words"
+
+
+# ==============================================================================
+# II. LAZILY LOADED DATA SOURCES
+#
+# Nothing here runs at import time: NLTK, its corpus download and the emoji
+# table are only touched the first time a loader is called, and the result is
+# kept for later callers. This is what lets trie.py import in milliseconds,
+# with no network or disk access, in the editor and in headless jobs alike.
+# ==============================================================================
+
+_lock = threading.Lock()
+_loaded = {}
+
+
+def _load_once(name: str, load):
+    with _lock:
+        if name not in _loaded:
+            _loaded[name] = load()
+        return _loaded[name]
+
+
+def _words_corpus():
+    import nltk
+
+    try:
+        nltk.data.find("corpora/words")
+    except LookupError:
+        # Only reached when the corpus is missing from every NLTK data path.
+        nltk.download("words", quiet=True)
+    from nltk.corpus import words
+    return words
+
+
+def words_corpus():
+    # The NLTK corpus reader, for code that used `trie.words`.
+    return _load_once("corpus", _words_corpus)
+
+
+def load_words() -> list:
+    return _load_once("words", lambda: list(words_corpus().words()))
+
+
+def load_emoji_mappings() -> dict:
+    def load():
+        from emoji_data import word_to_emoji
+        return word_to_emoji
+
+    return _load_once("emoji", load)
+
+
+def load_abbreviations(path: str = DEFAULT_ABBREVIATIONS_PATH) -> dict:
+    # Not cached: the file is small and may be edited between builds.
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ==============================================================================
+# III. SOURCE STAMPS
+#
+# Cheap identities for data sources, so a cached build can tell when one has
+# changed without loading it. The word list's stamp finds the NLTK "words"
+# corpus on disk the way NLTK would, without importing NLTK (which is what the
+# cache exists to avoid at startup), and covers every file's size and mtime.
+# ==============================================================================
+
+def _nltk_data_paths() -> list:
+    # NLTK's default search path (nltk.data.path), in its order.
+    paths = [p for p in os.environ.get("NLTK_DATA", "").split(os.pathsep) if p]
+    paths.append(os.path.join(os.path.expanduser("~"), "nltk_data"))
+    if sys.platform.startswith("win"):
+        paths += [os.path.join(sys.prefix, "nltk_data"), os.path.join(sys.prefix, "share", "nltk_data"),
+                  os.path.join(sys.prefix, "lib", "nltk_data"),
+                  os.path.join(os.environ.get("APPDATA", "C:\\"), "nltk_data"),
+                  r"C:\nltk_data", r"D:\nltk_data", r"E:\nltk_data"]
+    else:
+        paths += [os.path.join(sys.prefix, "nltk_data"), os.path.join(sys.prefix, "share", "nltk_data"),
+                  os.path.join(sys.prefix, "lib", "nltk_data"), "/usr/share/nltk_data",
+                  "/usr/local/share/nltk_data", "/usr/lib/nltk_data", "/usr/local/lib/nltk_data"]
+    return paths
+
+
+def words_source_stamp() -> str:
+    # "<path>:<size>:<mtime>;" for each file of the first corpus found, or
+    # "missing" (a later download then changes the stamp).
+    for root in _nltk_data_paths():
+        for candidate in (os.path.join(root, "corpora", "words"), os.path.join(root, "corpora", "words.zip")):
+            if os.path.isdir(candidate):
+                files = sorted(os.path.join(candidate, name) for name in os.listdir(candidate))
+            elif os.path.isfile(candidate):
+                files = [candidate]
+            else:
+                continue
+            stamp = []
+            for path in files:
+                stat = os.stat(path)
+                stamp.append(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns};")
+            return "".join(stamp)
+    return "missing"
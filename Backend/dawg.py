@@ -0,0 +1,159 @@
+# ==============================================================================
+# I. IMPORTS
+# ==============================================================================
+
+from array import array
+from collections import deque
+
+from compact_trie import STRING_EMOJI, CompactTrie, _PayloadTable
+
+
+# ==============================================================================
+# II. INCREMENTAL MINIMIZATION FROM SORTED INPUT
+#
+# Daciuk et al.'s algorithm: words arrive in sorted order, and once a word is
+# inserted every state below the common prefix with the next word can no longer
+# change, so it is either merged with an equivalent registered state or
+# registered itself. Two states are equivalent when they carry the same payload
+# and the same labelled edges to the same targets, so suffixes such as "-ing"
+# or "-ation" are stored once. Payloads take part in equivalence, which keeps
+# the values insert_emoji stores at END_OF_WORD exact.
+# ==============================================================================
+
+class _State:
+    __slots__ = ("edges", "payload")
+
+    def __init__(self):
+        self.edges = {}
+        self.payload = None
+
+    def key(self):
+        return self.payload, tuple((char, id(child)) for char, child in sorted(self.edges.items()))
+
+
+class DawgBuilder:
+    def __init__(self):
+        self.root = _State()
+        self._register = {}
+        self._unchecked = []
+        self._previous_word = ""
+        self._started = False
+
+    def insert(self, word: str, payload=True):
+        if self._started and word <= self._previous_word:
+            raise ValueError(f"DAWG input must be sorted and unique: {word!r} after {self._previous_word!r}")
+
+        common = 0
+        for a, b in zip(word, self._previous_word):
+            if a != b:
+                break
+            common += 1
+        self._minimize(common)
+
+        node = self._unchecked[-1][2] if self._unchecked else self.root
+        for character in word[common:]:
+            child = _State()
+            node.edges[character] = child
+            self._unchecked.append((node, character, child))
+            node = child
+        node.payload = payload
+
+        self._previous_word = word
+        self._started = True
+
+    def _minimize(self, down_to: int):
+        register = self._register
+        while len(self._unchecked) > down_to:
+            parent, character, child = self._unchecked.pop()
+            key = child.key()
+            existing = register.get(key)
+            if existing is None:
+                register[key] = child
+            else:
+                parent.edges[character] = existing
+
+    def finish(self, string_kind: int = None) -> "Dawg":
+        # string_kind None: taken from the typed payloads inserted.
+        self._minimize(0)
+        self._register.clear()
+        labels, first_edge, payloads, strings, targets, string_kind = _freeze(self.root, string_kind)
+        return Dawg(labels, first_edge, payloads, strings, targets, string_kind)
+
+
+def _freeze(root: _State, string_kind: int = None):
+    numbers = {id(root): 0}
+    order = [root]
+    queue = deque([root])
+    while queue:
+        for _, child in sorted(queue.popleft().edges.items()):
+            if id(child) not in numbers:
+                numbers[id(child)] = len(order)
+                order.append(child)
+                queue.append(child)
+
+    labels = array("I")
+    targets = array("I")
+    first_edge = array("I")
+    payloads = array("i")
+    table = _PayloadTable(string_kind)
+    for state in order:
+        if table.score(state.payload):
+            raise TypeError("DAWG dictionaries do not support per-word scores")
+        first_edge.append(len(labels))
+        payloads.append(table.code(state.payload))
+        for char, child in sorted(state.edges.items()):
+            labels.append(ord(char))
+            targets.append(numbers[id(child)])
+    first_edge.append(len(labels))
+
+    kind = STRING_EMOJI if table.string_kind is None else table.string_kind
+    return labels, first_edge, payloads, table.strings, targets, kind
+
+
+# ==============================================================================
+# III. FROZEN DAWG ENGINE
+#
+# Same flat layout as CompactTrie except that edges are stored separately from
+# states: the edges of state s are first_child[s]..first_child[s+1], and each
+# edge has a label and a target state. Lookups and completion are inherited.
+# ==============================================================================
+
+class Dawg(CompactTrie):
+    """Immutable minimized acyclic automaton with CompactTrie's interface."""
+
+    __slots__ = ("targets",)
+
+    def __init__(self, labels, first_child, payloads, strings, targets, string_kind: int = STRING_EMOJI):
+        self.targets = targets
+        super().__init__(labels, first_child, payloads, strings, string_kind=string_kind)
+
+    @classmethod
+    def from_items(cls, items, scores: dict = None, string_kind: int = None) -> "Dawg":
+        if scores:
+            raise TypeError("DAWG dictionaries do not support per-word scores")
+        merged = {}
+        for word, payload in items:
+            merged[word.lower()] = payload
+        builder = DawgBuilder()
+        for word, payload in sorted(merged.items()):
+            builder.insert(word, payload)
+        return builder.finish(string_kind)
+
+    def nbytes(self) -> int:
+        return super().nbytes() + len(self.targets) * self.targets.itemsize
+
+    def _child(self, node: int, character: str) -> int:
+        edge = super()._child(node, character)
+        return self.targets[edge] if edge >= 0 else -1
+
+    def _targets(self):
+        return self.targets
+
+    def set_score(self, word: str, score: int):
+        # A DAWG state is shared by every word with the same suffix language,
+        # so a per-state score would apply to all of them at once.
+        raise TypeError("DAWG dictionaries do not support per-word scores")
+
+
+def train_dawg(word_list) -> Dawg:
+    return Dawg.from_words(word_list)
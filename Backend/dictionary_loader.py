@@ -0,0 +1,58 @@
+# ==============================================================================
+# I. IMPORTS
+# ==============================================================================
+
+import queue
+import threading
+import time
+
+import trie_artifact
+
+
+# ==============================================================================
+# II. LOADING THE DICTIONARIES IN THE BACKGROUND
+#
+# The editor window appears first; the trie artifact is checked, rebuilt if
+# stale (which may mean downloading the word list) and mapped on a daemon
+# thread. Progress messages and the finished artifact are handed back to the
+# Tk thread by polling a queue with `after`, as in SuggestionWorker.
+# on_done(artifact, error, seconds) receives either the TrieArtifact or the
+# exception that stopped the load.
+# ==============================================================================
+
+class DictionaryLoader:
+    def __init__(self, master, on_progress, on_done, poll_ms: int = 50, **load_args):
+        self.master = master
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.poll_ms = poll_ms
+        self.load_args = load_args
+        self._messages = queue.Queue()
+        self._started = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        threading.Thread(target=self._run, name="dictionary-loader", daemon=True).start()
+        self.master.after(self.poll_ms, self._poll)
+
+    def _run(self):
+        try:
+            artifact = trie_artifact.load_or_build(on_progress=lambda message: self._messages.put(("progress", message)),
+                                                   **self.load_args)
+        except Exception as error:
+            self._messages.put(("done", (None, error)))
+        else:
+            self._messages.put(("done", (artifact, None)))
+
+    def _poll(self):
+        while True:
+            try:
+                kind, value = self._messages.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "progress":
+                self.on_progress(value)
+            else:
+                self.on_done(*value, time.perf_counter() - self._started)
+                return
+        self.master.after(self.poll_ms, self._poll)
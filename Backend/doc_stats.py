@@ -0,0 +1,187 @@
+# ==============================================================================
+# I. IMPORTS AND CONSTANTS
+# ==============================================================================
+
+import re
+from collections import Counter
+from tkinter import Toplevel, ttk
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+CHUNK_SIZE = 1 << 20
+PUNCTUATION = ".,!?;:'\"-()"
+CHARACTER_CLASSES = ("letters", "digits", "whitespace", "punctuation", "other")
+
+
+# ==============================================================================
+# II. CLASSIFYING CHARACTERS IN BULK
+#
+# A chunk is encoded to UTF-8 once and every byte is translated to a class
+# marker through a 256-entry table, after which each statistic is a single
+# bytes.count. All of it runs in C, so no Python code executes per character.
+# Bytes of non-ASCII characters translate to "u"; those characters are
+# classified separately (they are rare and usually repeat) and otherwise count
+# as part of a token.
+#
+#   a letter   0 digit   (space) whitespace   ! sentence end   , other punct.   ~ other
+# ==============================================================================
+
+def _classify(character: str) -> str:
+    if character.isalpha():
+        return "a"
+    if character.isdigit():
+        return "0"
+    if character.isspace():
+        return " "
+    if character in ".!?":
+        return "!"
+    if character.isascii() and character.isprintable():
+        return ","
+    return "~"
+
+
+_MARKERS = "".join(_classify(chr(code)) for code in range(128)) + "u" * 128
+_BYTE_CLASSES = _MARKERS.encode("ascii")
+_MARKER_CLASS = {"a": "letters", "0": "digits", " ": "whitespace", "!": "punctuation",
+                 ",": "punctuation", "~": "other"}
+_NON_ASCII = re.compile(r"[^\x00-\x7f]")
+
+# Second-stage tables: markers to "token or not", and the bytes to drop so only
+# counted punctuation and newlines are left to count.
+_TOKENS = bytes.maketrans(b"a0!,~u", b"xxxxxx")
+_UNCOUNTED = bytes(code for code in range(256) if chr(code) not in PUNCTUATION + "\n")
+
+# NumPy is optional: with it, a chunk's classes come from one bincount of its
+# bytes, and words and sentences from two boolean-mask passes.
+if np is not None:
+    _IS_SPACE = np.array([marker == " " for marker in _MARKERS])
+    _IS_END = np.array([marker == "!" for marker in _MARKERS])
+
+
+# ==============================================================================
+# III. STREAMING STATISTICS
+#
+# Words are whitespace-separated tokens and a sentence ends at a run of . ! ?
+# followed by whitespace or the end of the document. Only the class of the last
+# character is carried between chunks, so any chunking gives the same result.
+# ==============================================================================
+
+class DocumentStats:
+    __slots__ = ("characters", "words", "lines", "sentences", "punctuation", "classes", "_last")
+
+    def __init__(self):
+        self.characters = 0
+        self.words = 0
+        self.lines = 1
+        self.sentences = 0
+        self.punctuation = dict.fromkeys(PUNCTUATION, 0)
+        self.classes = dict.fromkeys(CHARACTER_CLASSES, 0)
+        self._last = " "
+
+    def feed(self, chunk: str):
+        if not chunk:
+            return
+        data = chunk.encode("utf-8", "surrogatepass")
+        self.characters += len(chunk)
+
+        counted = data.translate(None, _UNCOUNTED)
+        self.lines += counted.count(b"\n")
+        for character in PUNCTUATION:
+            self.punctuation[character] += counted.count(character.encode("ascii"))
+
+        if np is not None:
+            self._count_array(data)
+        else:
+            self._count_translated(data)
+
+        if not chunk.isascii():
+            for character, count in Counter(_NON_ASCII.findall(chunk)).items():
+                self.classes[_MARKER_CLASS[_classify(character)]] += count
+        self._last = _MARKERS[data[-1]]
+
+    def _count_translated(self, data: bytes):
+        marked = data.translate(_BYTE_CLASSES)
+        classes = self.classes
+        letters, digits, whitespace, other, non_ascii = (marked.count(marker) for marker in (b"a", b"0", b" ", b"~", b"u"))
+        classes["letters"] += letters
+        classes["digits"] += digits
+        classes["whitespace"] += whitespace
+        classes["other"] += other
+        classes["punctuation"] += len(data) - letters - digits - whitespace - other - non_ascii
+
+        joined = self._last.encode("ascii") + marked
+        # Every token starts right after a whitespace marker.
+        self.words += joined.translate(_TOKENS).count(b" x")
+        self.sentences += joined.count(b"! ")
+
+    def _count_array(self, data: bytes):
+        codes = np.frombuffer(data, dtype=np.uint8)
+        for code, count in enumerate(np.bincount(codes, minlength=256)[:128].tolist()):
+            if count:
+                self.classes[_MARKER_CLASS[_MARKERS[code]]] += count
+
+        space = _IS_SPACE[codes]
+        end = _IS_END[codes]
+        previous_space = np.empty_like(space)
+        previous_space[0] = self._last == " "
+        previous_space[1:] = space[:-1]
+        previous_end = np.empty_like(end)
+        previous_end[0] = self._last == "!"
+        previous_end[1:] = end[:-1]
+        self.words += int(np.count_nonzero(previous_space & ~space))
+        self.sentences += int(np.count_nonzero(previous_end & space))
+
+    def finish(self) -> "DocumentStats":
+        if self._last == "!":
+            self.sentences += 1
+            self._last = " "
+        return self
+
+
+def analyze_chunks(chunks) -> DocumentStats:
+    stats = DocumentStats()
+    for chunk in chunks:
+        stats.feed(chunk)
+    return stats.finish()
+
+
+def analyze_file(path: str, encoding: str = "utf-8", chunk_size: int = CHUNK_SIZE) -> DocumentStats:
+    with open(path, "r", encoding=encoding, errors="replace", newline="") as f:
+        return analyze_chunks(iter(lambda: f.read(chunk_size), ""))
+
+
+# ==============================================================================
+# IV. SUMMARY DIALOG
+# ==============================================================================
+
+def show_stats_dialog(master, stats: DocumentStats, punctuation_names: dict = None, title: str = "Document Statistics"):
+    dialog = Toplevel(master)
+    dialog.title(title)
+    dialog.transient(master)
+
+    tree = ttk.Treeview(dialog, columns=("value",), height=16)
+    tree.heading("#0", text="Statistic")
+    tree.heading("value", text="Count")
+    tree.column("value", width=120, anchor="e")
+
+    totals = tree.insert("", "end", text="Totals", open=True)
+    for label, value in (("Characters", stats.characters), ("Words", stats.words),
+                         ("Lines", stats.lines), ("Sentences", stats.sentences)):
+        tree.insert(totals, "end", text=label, values=(f"{value:,}",))
+
+    classes = tree.insert("", "end", text="Character classes", open=True)
+    for name in CHARACTER_CLASSES:
+        tree.insert(classes, "end", text=name.capitalize(), values=(f"{stats.classes[name]:,}",))
+
+    punctuation = tree.insert("", "end", text="Punctuation", open=True)
+    for character, count in sorted(stats.punctuation.items(), key=lambda item: -item[1]):
+        if count:
+            name = (punctuation_names or {}).get(character, "")
+            tree.insert(punctuation, "end", text=f"'{character}'  {name}", values=(f"{count:,}",))
+
+    tree.pack(fill="both", expand=True, padx=8, pady=8)
+    ttk.Button(dialog, text="Close", command=dialog.destroy).pack(pady=(0, 8))
+    return dialog
@@ -0,0 +1,350 @@
+# ==============================================================================
+# I. IMPORTS AND CONSTANTS
+# ==============================================================================
+
+import random
+
+# Loaded text is cut into pieces of at most this many characters, so splitting
+# a piece (and recounting its newlines) never touches more than one chunk.
+MAX_LOADED_PIECE = 1 << 16
+
+# Consecutive typing at the end of a short inserted piece extends that piece
+# instead of adding a new one per keystroke.
+COALESCE_LIMIT = 256
+
+# Tk 8.6 stores text as UTF-16, so a character outside the Basic Multilingual
+# Plane (most emoji) is two index columns there, but one character here.
+_ASTRAL = "\U00010000"
+
+
+def tk_length(text: str, surrogates: bool = True) -> int:
+    # Length of `text` in Tk index units.
+    if not surrogates or text.isascii() or max(text) < _ASTRAL:
+        return len(text)
+    return len(text) + sum(1 for character in text if character >= _ASTRAL)
+
+
+def counts_surrogates(widget) -> bool:
+    return int(widget.tk.call("string", "length", "\U0001F600")) == 2
+
+
+# ==============================================================================
+# II. PERSISTENT PIECE TREE
+#
+# The document is a sequence of pieces, each a (source string, start, length)
+# slice, kept in a treap ordered by document position. Every node also stores
+# the character and newline totals of its subtree, so finding an offset or a
+# line takes O(log n). Nodes are never modified once built: an edit copies the
+# O(log n) nodes on its path and shares the rest, which makes a snapshot of the
+# whole document nothing more than a reference to the current root.
+# ==============================================================================
+
+class _Piece:
+    __slots__ = ("source", "start", "length", "lines", "priority", "left", "right", "size", "total_lines")
+
+    def __init__(self, source, start, length, lines, priority, left, right):
+        self.source = source
+        self.start = start
+        self.length = length
+        self.lines = lines
+        self.priority = priority
+        self.left = left
+        self.right = right
+        self.size = length + (left.size if left else 0) + (right.size if right else 0)
+        self.total_lines = lines + (left.total_lines if left else 0) + (right.total_lines if right else 0)
+
+
+def _new_piece(source: str, start: int, length: int, lines: int = None) -> _Piece:
+    if lines is None:
+        lines = source.count("\n", start, start + length)
+    return _Piece(source, start, length, lines, random.random(), None, None)
+
+
+def _with_children(node: _Piece, left, right) -> _Piece:
+    return _Piece(node.source, node.start, node.length, node.lines, node.priority, left, right)
+
+
+def _merge(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a.priority > b.priority:
+        return _with_children(a, a.left, _merge(a.right, b))
+    return _with_children(b, _merge(a, b.left), b.right)
+
+
+def _split(node, offset: int):
+    # Returns (first `offset` characters, the rest).
+    if node is None:
+        return None, None
+    left_size = node.left.size if node.left else 0
+    if offset <= left_size:
+        first, rest = _split(node.left, offset)
+        return first, _with_children(node, rest, node.right)
+    offset -= left_size
+    if offset >= node.length:
+        first, rest = _split(node.right, offset - node.length)
+        return _with_children(node, node.left, first), rest
+
+    head = _new_piece(node.source, node.start, offset)
+    tail = _new_piece(node.source, node.start + offset, node.length - offset, node.lines - head.lines)
+    return _merge(node.left, head), _merge(tail, node.right)
+
+
+def _extend_piece_ending_at(node, offset: int, text: str):
+    # Appends `text` to the piece that ends exactly at `offset` when that piece
+    # is short and ends at the end of its source; returns None otherwise.
+    if node is None:
+        return None
+    left_size = node.left.size if node.left else 0
+    if offset <= left_size:
+        left = _extend_piece_ending_at(node.left, offset, text)
+        return _with_children(node, left, node.right) if left is not None else None
+    offset -= left_size
+    if offset < node.length:
+        return None
+    if offset == node.length:
+        if node.length >= COALESCE_LIMIT or node.start + node.length != len(node.source):
+            return None
+        source = node.source[node.start:] + text
+        return _Piece(source, 0, len(source), node.lines + text.count("\n"), node.priority, node.left, node.right)
+    right = _extend_piece_ending_at(node.right, offset - node.length, text)
+    return _with_children(node, node.left, right) if right is not None else None
+
+
+def _build(text: str):
+    root = None
+    for start in range(0, len(text), MAX_LOADED_PIECE):
+        root = _merge(root, _new_piece(text, start, min(MAX_LOADED_PIECE, len(text) - start)))
+    return root
+
+
+# ==============================================================================
+# III. READ-ONLY DOCUMENT VIEW
+#
+# Offsets count characters from the start of the document. Lines are numbered
+# from 1 and columns from 0, like Tk text indices.
+# ==============================================================================
+
+class DocumentSnapshot:
+    __slots__ = ("_root",)
+
+    def __init__(self, root=None):
+        self._root = root
+
+    def __len__(self) -> int:
+        return self._root.size if self._root else 0
+
+    def line_count(self) -> int:
+        return (self._root.total_lines if self._root else 0) + 1
+
+    def iter_chunks(self, start: int = 0, end: int = None):
+        if end is None or end > len(self):
+            end = len(self)
+        if start >= end:
+            return
+        stack = []
+        node, base = self._root, 0
+        while stack or node is not None:
+            if node is not None:
+                left_size = node.left.size if node.left else 0
+                if base + left_size > start:
+                    stack.append((node, base))
+                    node = node.left
+                else:
+                    stack.append((node, base))
+                    node = None
+                continue
+            node, base = stack.pop()
+            left_size = node.left.size if node.left else 0
+            piece_start = base + left_size
+            if piece_start >= end:
+                return
+            piece_end = piece_start + node.length
+            if piece_end > start:
+                low = max(start, piece_start) - piece_start
+                high = min(end, piece_end) - piece_start
+                yield node.source[node.start + low:node.start + high]
+            node, base = node.right, piece_end
+
+    def get_text(self, start: int = 0, end: int = None) -> str:
+        return "".join(self.iter_chunks(start, end))
+
+    def line_start(self, line: int) -> int:
+        # Offset just after the (line - 1)-th newline.
+        remaining = line - 1
+        if remaining <= 0:
+            return 0
+        node, base = self._root, 0
+        while node is not None:
+            left_lines = node.left.total_lines if node.left else 0
+            if remaining <= left_lines:
+                node = node.left
+                continue
+            remaining -= left_lines
+            base += node.left.size if node.left else 0
+            if remaining <= node.lines:
+                position = node.start - 1
+                for _ in range(remaining):
+                    position = node.source.find("\n", position + 1)
+                return base + position - node.start + 1
+            remaining -= node.lines
+            base += node.length
+            node = node.right
+        return base
+
+    def offset_of(self, line: int, column: int, surrogates: bool = False) -> int:
+        # With `surrogates`, column counts Tk 8.6 index units (see tk_length).
+        start = self.line_start(line)
+        if surrogates and column:
+            prefix = self.get_text(start, start + column)
+            if not prefix.isascii() and max(prefix) >= _ASTRAL:
+                characters = 0
+                for character in prefix:
+                    if column <= 0:
+                        break
+                    column -= 2 if character >= _ASTRAL else 1
+                    characters += 1
+                column = characters
+        return min(start + column, len(self))
+
+    def position_of(self, offset: int):
+        newlines = 0
+        node, remaining = self._root, offset
+        while node is not None:
+            left_size = node.left.size if node.left else 0
+            if remaining < left_size:
+                node = node.left
+                continue
+            newlines += node.left.total_lines if node.left else 0
+            remaining -= left_size
+            if remaining < node.length:
+                newlines += node.source.count("\n", node.start, node.start + remaining)
+                break
+            newlines += node.lines
+            remaining -= node.length
+            node = node.right
+        line = newlines + 1
+        return line, offset - self.line_start(line)
+
+    def index_of(self, offset: int, surrogates: bool = False) -> str:
+        line, column = self.position_of(offset)
+        if surrogates and column:
+            column = tk_length(self.get_text(offset - column, offset))
+        return f"{line}.{column}"
+
+
+# ==============================================================================
+# IV. EDITABLE PIECE TABLE
+# ==============================================================================
+
+class PieceTable(DocumentSnapshot):
+    __slots__ = ()
+
+    def __init__(self, text: str = ""):
+        super().__init__(_build(text))
+
+    def reset(self, text: str = ""):
+        self._root = _build(text)
+
+    def append_chunk(self, text: str):
+        if text:
+            self._root = _merge(self._root, _build(text))
+
+    def insert(self, offset: int, text: str):
+        if not text:
+            return
+        extended = _extend_piece_ending_at(self._root, offset, text) if len(text) < COALESCE_LIMIT else None
+        if extended is not None:
+            self._root = extended
+            return
+        first, rest = _split(self._root, offset)
+        self._root = _merge(_merge(first, _build(text)), rest)
+
+    def delete(self, offset: int, length: int):
+        if length <= 0:
+            return
+        first, rest = _split(self._root, offset)
+        _, rest = _split(rest, length)
+        self._root = _merge(first, rest)
+
+    def snapshot(self) -> DocumentSnapshot:
+        return DocumentSnapshot(self._root)
+
+
+# ==============================================================================
+# V. KEEPING A TK TEXT WIDGET IN SYNC
+#
+# The widget's Tcl command is renamed and replaced by a Python proxy, the same
+# technique idlelib uses. Every insert, delete and replace -- typed, pasted,
+# programmatic or replayed by undo/redo -- passes through the proxy, which
+# resolves the indices before the edit, lets Tk perform it, then applies the
+# same edit to the PieceTable and notifies listeners with
+# (kind, offset, inserted text or deleted length). Offsets count characters;
+# offset() and index() convert from and to Tk's own column units.
+# ==============================================================================
+
+class TextMirror:
+    def __init__(self, text, document: PieceTable):
+        self.text = text
+        self.document = document
+        self.listeners = []
+        self.surrogates = counts_surrogates(text)
+        document.reset(text.get("1.0", "end-1c"))
+
+        self._widget_command = str(text) + "_mirrored"
+        text.tk.call("rename", str(text), self._widget_command)
+        text.tk.createcommand(str(text), self._dispatch)
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def _call(self, *args):
+        return self.text.tk.call((self._widget_command,) + args)
+
+    def offset(self, index) -> int:
+        line, column = map(int, str(self._call("index", index)).split("."))
+        return self.document.offset_of(line, column, self.surrogates)
+
+    def index(self, offset: int) -> str:
+        return self.document.index_of(offset, self.surrogates)
+
+    def _notify(self, kind: str, offset: int, value):
+        for listener in self.listeners:
+            listener(kind, offset, value)
+
+    def _dispatch(self, command, *args):
+        if command not in ("insert", "delete", "replace") or str(self._call("cget", "-state")) == "disabled":
+            return self._call(command, *args)
+
+        if command == "insert":
+            offset = self.offset(args[0])
+            result = self._call(command, *args)
+            inserted = "".join(args[1::2])
+            self.document.insert(offset, inserted)
+            self._notify("insert", offset, inserted)
+            return result
+
+        if command == "delete":
+            ranges = []
+            for i in range(0, len(args), 2):
+                start = self.offset(args[i])
+                end = self.offset(args[i + 1]) if i + 1 < len(args) else min(start + 1, len(self.document))
+                if end > start:
+                    ranges.append((start, end))
+            result = self._call(command, *args)
+            for start, end in sorted(ranges, reverse=True):
+                self.document.delete(start, end - start)
+                self._notify("delete", start, end - start)
+            return result
+
+        start, end = self.offset(args[0]), self.offset(args[1])
+        result = self._call(command, *args)
+        if end > start:
+            self.document.delete(start, end - start)
+            self._notify("delete", start, end - start)
+        inserted = "".join(args[2::2])
+        self.document.insert(start, inserted)
+        self._notify("insert", start, inserted)
+        return result
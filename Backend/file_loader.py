@@ -0,0 +1,187 @@
+# ==============================================================================
+# I. IMPORTS AND CONSTANTS
+# ==============================================================================
+
+import codecs
+import os
+import time
+
+CHUNK_CHARS = 1 << 18
+DETECT_BYTES = 1 << 16
+FALLBACK_ENCODING = "cp1252"
+# Decodes every byte to one character and encodes it back unchanged, so a file
+# nothing else can decode still saves byte for byte.
+LAST_RESORT_ENCODING = "latin-1"
+
+_BOMS = (
+    (codecs.BOM_UTF32_LE, "utf-32"), (codecs.BOM_UTF32_BE, "utf-32"),
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+# ==============================================================================
+# II. ENCODING DETECTION AND DECODING
+#
+# A byte-order mark decides outright. Otherwise the first DETECT_BYTES are
+# checked as UTF-8 (a sequence cut off at the end of the sample is fine); if
+# they are not valid UTF-8 the file is treated as FALLBACK_ENCODING.
+#
+# Decoding is strict: a byte the detected encoding cannot decode further in
+# makes the file fall back to FALLBACK_ENCODING and then LAST_RESORT_ENCODING,
+# never to U+FFFD, which a later save would write back over the original.
+# Newlines are normalized to \n for the widget; the style the file used is
+# reported so that saving can restore it.
+# ==============================================================================
+
+def detect_encoding(head: bytes) -> str:
+    for bom, encoding in _BOMS:
+        if head.startswith(bom):
+            return encoding
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+    except UnicodeDecodeError:
+        return FALLBACK_ENCODING
+    return "utf-8"
+
+
+def fallback_encoding(encoding: str) -> str:
+    # What to try once `encoding` failed to decode a file.
+    return LAST_RESORT_ENCODING if encoding == FALLBACK_ENCODING else FALLBACK_ENCODING
+
+
+def open_text(path: str, encoding: str = None):
+    # Returns (text file, encoding). The text layer decodes incrementally and
+    # normalizes newlines, so reads never split a character or a \r\n pair.
+    if encoding is None:
+        with open(path, "rb") as f:
+            encoding = detect_encoding(f.read(DETECT_BYTES))
+    return open(path, "r", encoding=encoding, newline=None), encoding
+
+
+def newline_style(f) -> str:
+    # The newline a file read through open_text used; for a file mixing
+    # several, \r\n if it is among them.
+    seen = f.newlines
+    if isinstance(seen, tuple):
+        return "\r\n" if "\r\n" in seen else seen[0]
+    return seen or "\n"
+
+
+def detect_newline(path: str, encoding: str = None) -> str:
+    # From the start of the file only, for a document that was not loaded
+    # from it (a recovered session).
+    try:
+        f, _ = open_text(path, encoding)
+        with f:
+            f.read(DETECT_BYTES)
+            return newline_style(f)
+    except (OSError, UnicodeDecodeError, LookupError):
+        return "\n"
+
+
+def iter_chunks(path: str, chunk_chars: int = CHUNK_CHARS, encoding: str = None):
+    # One streaming pass for readers that cannot start over once they have
+    # handed out text. The encoding is detected from the first DETECT_BYTES;
+    # decoding is strict, so bytes further on that do not fit it raise
+    # ValueError instead of being silently replaced.
+    f, encoding = open_text(path, encoding)
+    with f:
+        try:
+            yield from iter(lambda: f.read(chunk_chars), "")
+        except UnicodeDecodeError as error:
+            raise ValueError(f"{path} is not valid {encoding} ({error.reason}); "
+                             f"pass its encoding explicitly") from error
+
+
+# ==============================================================================
+# III. INCREMENTAL LOADING INTO THE TEXT WIDGET
+#
+# One chunk is appended per event-loop turn, so the first page is on screen
+# (and scrollable) almost at once while the rest streams in. The widget is
+# read-only between chunks, and undo is off for the duration so the load does
+# not also land in the undo stack. A decode error part way through starts the
+# load over in the fallback encoding; detected_encoding keeps what detection
+# said, so the caller can tell the user.
+# ==============================================================================
+
+class ChunkedLoader:
+    def __init__(self, text, path: str, on_progress=None, on_done=None, chunk_chars: int = CHUNK_CHARS):
+        self.text = text
+        self.path = path
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.chunk_chars = chunk_chars
+        self.encoding = None
+        self.detected_encoding = None
+        self.newline = "\n"
+        self.total_bytes = os.path.getsize(path)
+        self.loaded_chars = 0
+        self.seconds = 0.0
+        self.finished = False
+        self.cancelled = False
+        self._file = None
+        self._after = None
+        self._started = None
+
+    def start(self):
+        self._started = time.perf_counter()
+        self._file, self.encoding = open_text(self.path)
+        self.detected_encoding = self.encoding
+        self.text.config(undo=False)
+        self.text.delete("1.0", "end")
+        self.text.config(state="disabled")
+        self._after = self.text.after_idle(self._step)
+
+    def cancel(self):
+        if self.finished:
+            return
+        if self._after is not None:
+            self.text.after_cancel(self._after)
+        self.cancelled = True
+        self._finish()
+
+    def progress(self) -> float:
+        if self.finished:
+            return 1.0
+        if not self.total_bytes or self._file is None:
+            return 0.0
+        return min(self._file.buffer.tell() / self.total_bytes, 1.0)
+
+    def _step(self):
+        self._after = None
+        try:
+            chunk = self._file.read(self.chunk_chars)
+        except UnicodeDecodeError:
+            self._restart(fallback_encoding(self.encoding))
+            return
+        if not chunk:
+            self._finish()
+            return
+        self.text.config(state="normal")
+        self.text.insert("end-1c", chunk)
+        self.text.config(state="disabled")
+        self.loaded_chars += len(chunk)
+        if self.on_progress:
+            self.on_progress(self)
+        self._after = self.text.after(1, self._step)
+
+    def _restart(self, encoding: str):
+        self._file.close()
+        self._file, self.encoding = open_text(self.path, encoding)
+        self.text.config(state="normal")
+        self.text.delete("1.0", "end")
+        self.text.config(state="disabled")
+        self.loaded_chars = 0
+        self._after = self.text.after_idle(self._step)
+
+    def _finish(self):
+        self.finished = True
+        self.seconds = time.perf_counter() - self._started
+        self.newline = newline_style(self._file)
+        self._file.close()
+        self.text.config(state="normal", undo=True)
+        self.text.edit_reset()
+        self.text.edit_modified(False)
+        if self.on_done:
+            self.on_done(self)
@@ -0,0 +1,233 @@
+# ==============================================================================
+# I. IMPORTS AND CONSTANTS
+# ==============================================================================
+
+import bisect
+import codecs
+import contextlib
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+CHECKPOINT_CHARS = 1 << 16
+COPY_BLOCK = 1 << 20
+
+# Encoders for these emit a BOM first, so their output cannot be resumed from
+# the middle of a previous file.
+_BOM_ENCODINGS = ("utf-8-sig", "utf-16", "utf-32")
+
+
+# ==============================================================================
+# II. ATOMIC WRITES WITH PREFIX REUSE
+#
+# A save writes a temp file next to the target, fsyncs it and renames it over
+# the target, so a crash leaves either the old file or the new one, never a
+# truncated mix (atomic_write, which rich documents use too). The text is
+# written exactly as it is in the document, with no trailing newline added,
+# except that each \n is written as `newline`: the style the file was opened
+# with.
+#
+# Each save records (character offset, byte offset) checkpoints roughly every
+# CHECKPOINT_CHARS characters. If nothing before character N has been edited
+# since, and the file on disk is still the one we wrote, the next save copies
+# the bytes up to the last checkpoint before N straight from the old file and
+# only encodes the rest of the document.
+# ==============================================================================
+
+class SavedFile:
+    __slots__ = ("path", "encoding", "newline", "checkpoints", "size", "mtime_ns")
+
+    def __init__(self, path: str, encoding: str, checkpoints: list, newline: str = "\n"):
+        self.path = path
+        self.encoding = encoding
+        self.newline = newline
+        self.checkpoints = checkpoints
+        stat = os.stat(path)
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+
+    def reusable_for(self, path: str, encoding: str, newline: str = "\n") -> bool:
+        if path != self.path or encoding != self.encoding or newline != self.newline or encoding in _BOM_ENCODINGS:
+            return False
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        return stat.st_size == self.size and stat.st_mtime_ns == self.mtime_ns
+
+    def checkpoint_before(self, clean_chars: int):
+        index = bisect.bisect_right(self.checkpoints, (clean_chars, sys.maxsize)) - 1
+        return index, self.checkpoints[index]
+
+
+class SaveResult:
+    __slots__ = ("path", "bytes_written", "bytes_reused", "seconds", "error", "saved")
+
+    def __init__(self, path: str, bytes_written: int = 0, bytes_reused: int = 0, seconds: float = 0.0,
+                 error: Exception = None, saved: SavedFile = None):
+        self.path = path
+        self.bytes_written = bytes_written
+        self.bytes_reused = bytes_reused
+        self.seconds = seconds
+        self.error = error
+        self.saved = saved
+
+
+def _fsync_directory(directory: str):
+    if os.name != "posix":
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+@contextlib.contextmanager
+def atomic_write(path: str):
+    # Yields a binary file next to `path`. On a clean exit it is fsynced, given
+    # the target's mode and renamed over the target; on an error the target is
+    # left alone and the temp file removed.
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            yield out
+            out.flush()
+            os.fsync(out.fileno())
+        if os.path.exists(path):
+            shutil.copymode(path, temp_path)
+        os.replace(temp_path, path)
+        _fsync_directory(directory)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def write_document(path: str, snapshot, encoding: str = "utf-8", previous: SavedFile = None,
+                   clean_chars: int = 0, newline: str = "\n") -> SaveResult:
+    started = time.perf_counter()
+    with atomic_write(path) as out:
+        checkpoints = [(0, 0)]
+        char_offset = byte_offset = 0
+        if previous is not None and clean_chars > 0 and previous.reusable_for(path, encoding, newline):
+            index, (char_offset, byte_offset) = previous.checkpoint_before(min(clean_chars, len(snapshot)))
+            checkpoints = previous.checkpoints[:index + 1]
+            with open(path, "rb") as old:
+                remaining = byte_offset
+                while remaining:
+                    block = old.read(min(COPY_BLOCK, remaining))
+                    if not block:
+                        raise OSError(f"{path} changed while it was being saved")
+                    out.write(block)
+                    remaining -= len(block)
+        reused = byte_offset
+
+        encoder = codecs.getincrementalencoder(encoding)()
+        next_checkpoint = char_offset + CHECKPOINT_CHARS
+        for chunk in snapshot.iter_chunks(char_offset):
+            data = encoder.encode(chunk if newline == "\n" else chunk.replace("\n", newline))
+            out.write(data)
+            char_offset += len(chunk)
+            byte_offset += len(data)
+            if char_offset >= next_checkpoint:
+                checkpoints.append((char_offset, byte_offset))
+                next_checkpoint = char_offset + CHECKPOINT_CHARS
+        data = encoder.encode("", True)
+        out.write(data)
+        byte_offset += len(data)
+
+    return SaveResult(path, byte_offset, reused, time.perf_counter() - started,
+                      saved=SavedFile(path, encoding, checkpoints, newline))
+
+
+# ==============================================================================
+# III. BACKGROUND SAVER
+#
+# Saves run on one writer thread from an immutable document snapshot, so the
+# editor keeps running while the file is written. A save may bring its own
+# `writer(path, snapshot)` (rich documents do) in place of write_document.
+# Completion is reported on the Tk thread by polling a queue with `after`, as
+# in SuggestionWorker.
+# note_edit() is a TextMirror listener that tracks the first offset edited
+# since the last save request.
+# ==============================================================================
+
+class BackgroundSaver:
+    def __init__(self, master, on_done, poll_ms: int = 50):
+        self.master = master
+        self.on_done = on_done
+        self.poll_ms = poll_ms
+        self.pending = 0
+
+        self._saved = None
+        self._dirty_from = 0
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="file-saver", daemon=True)
+        self._thread.start()
+
+    def note_edit(self, kind: str, offset: int, value):
+        if offset < self._dirty_from:
+            self._dirty_from = offset
+
+    def forget(self):
+        # The document was replaced wholesale (new or opened file).
+        self._saved = None
+        self._dirty_from = 0
+
+    def save(self, path: str, snapshot, encoding: str, writer=None, newline: str = "\n"):
+        clean_chars, self._dirty_from = self._dirty_from, sys.maxsize
+        self.pending += 1
+        self._jobs.put((path, snapshot, encoding, newline, clean_chars, writer))
+        if self.pending == 1:
+            self.master.after(self.poll_ms, self._poll)
+
+    def wait(self) -> list:
+        # Blocks until every queued save has finished, reports each through
+        # on_done as usual and returns their results.
+        results = []
+        while self.pending:
+            result = self._results.get()
+            self.pending -= 1
+            self.on_done(result)
+            results.append(result)
+        return results
+
+    def stop(self):
+        # Waits for queued saves to reach the disk.
+        self._jobs.put(None)
+        self._thread.join()
+
+    def _poll(self):
+        while True:
+            try:
+                result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self.pending -= 1
+            self.on_done(result)
+        if self.pending:
+            self.master.after(self.poll_ms, self._poll)
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            path, snapshot, encoding, newline, clean_chars, writer = job
+            try:
+                if writer is None:
+                    result = write_document(path, snapshot, encoding, self._saved, clean_chars, newline)
+                else:
+                    result = writer(path, snapshot)
+            except Exception as error:
+                result = SaveResult(path, error=error)
+            # After a failure nothing on disk is trusted for the next prefix.
+            self._saved = result.saved
+            self._results.put(result)
@@ -0,0 +1,418 @@
+# ==============================================================================
+# I. IMPORTS AND CONSTANTS
+# ==============================================================================
+
+import random
+import re
+
+COLOR_PREFIX = "color"
+_COLOR_STYLE = re.compile(COLOR_PREFIX + "[0-9a-f]{6}")
+
+
+# ==============================================================================
+# II. RELATIVE RUN TREE
+#
+# The runs of one style, in document order, in a treap like the piece tree of
+# document_model. A node stores its run relative to the run before it: the gap
+# since the previous run's end and its own length. Each node also stores the
+# run count and the total gap + length of its subtree, so the absolute
+# position of any run, or the runs around an offset, are found in O(log n).
+# Because positions are relative, an edit only changes the gap or length of
+# the one run it lands in, and every later run moves with it for free. Nodes
+# are never modified once built; an edit copies the O(log n) nodes on its path.
+# ==============================================================================
+
+class _Run:
+    __slots__ = ("gap", "length", "priority", "left", "right", "count", "span")
+
+    def __init__(self, gap, length, priority, left, right):
+        self.gap = gap
+        self.length = length
+        self.priority = priority
+        self.left = left
+        self.right = right
+        self.count = 1 + (left.count if left else 0) + (right.count if right else 0)
+        self.span = gap + length + (left.span if left else 0) + (right.span if right else 0)
+
+
+def _new_run(gap: int, length: int) -> _Run:
+    return _Run(gap, length, random.random(), None, None)
+
+
+def _with_children(node: _Run, left, right) -> _Run:
+    return _Run(node.gap, node.length, node.priority, left, right)
+
+
+def _merge(a, b):
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a.priority > b.priority:
+        return _with_children(a, a.left, _merge(a.right, b))
+    return _with_children(b, _merge(a, b.left), b.right)
+
+
+def _split(node, count: int):
+    # Returns (the first `count` runs, the rest).
+    if node is None:
+        return None, None
+    left_count = node.left.count if node.left else 0
+    if count <= left_count:
+        first, rest = _split(node.left, count)
+        return first, _with_children(node, rest, node.right)
+    first, rest = _split(node.right, count - left_count - 1)
+    return _with_children(node, node.left, first), rest
+
+
+def _build(items: list, low: int, high: int):
+    # A balanced tree over items[low:high] of (gap, length). A parent takes the
+    # highest priority among itself and its children, which keeps heap order.
+    if low >= high:
+        return None
+    middle = (low + high) // 2
+    left, right = _build(items, low, middle), _build(items, middle + 1, high)
+    priority = max(random.random(), left.priority if left else 0.0, right.priority if right else 0.0)
+    gap, length = items[middle]
+    return _Run(gap, length, priority, left, right)
+
+
+def _adjust(node, index: int, gap_delta: int, length_delta: int) -> _Run:
+    left_count = node.left.count if node.left else 0
+    if index < left_count:
+        return _with_children(node, _adjust(node.left, index, gap_delta, length_delta), node.right)
+    if index == left_count:
+        return _Run(node.gap + gap_delta, node.length + length_delta, node.priority, node.left, node.right)
+    return _with_children(node, node.left, _adjust(node.right, index - left_count - 1, gap_delta, length_delta))
+
+
+def _count_before(node, offset: int, by_start: bool, inclusive: bool) -> int:
+    # How many runs start (or end) before `offset`, or at it if `inclusive`:
+    # bisect over the run starts (or ends).
+    count = base = 0
+    while node is not None:
+        left = node.left
+        start = base + (left.span if left else 0) + node.gap
+        key = start if by_start else start + node.length
+        if key < offset or (inclusive and key == offset):
+            count += (left.count if left else 0) + 1
+            base = start + node.length
+            node = node.right
+        else:
+            node = left
+    return count
+
+
+def _run_at(node, index: int):
+    base = 0
+    while True:
+        left = node.left
+        left_count = left.count if left else 0
+        if index < left_count:
+            node = left
+            continue
+        start = base + (left.span if left else 0) + node.gap
+        if index == left_count:
+            return start, start + node.length
+        index -= left_count + 1
+        base = start + node.length
+        node = node.right
+
+
+def _iter_runs(node, base: int = 0):
+    # (start, end) of every run under `node`, whose first gap follows `base`.
+    stack = []
+    while stack or node is not None:
+        while node is not None:
+            stack.append(node)
+            node = node.left
+        node = stack.pop()
+        start = base + node.gap
+        base = start + node.length
+        yield start, base
+        node = node.right
+
+
+# ==============================================================================
+# III. STYLE RUNS
+#
+# The ranges covered by one style (character offsets, end exclusive). Runs
+# never overlap or touch: adding a range merges it with its neighbours, so the
+# tree stays as small as the formatting is fragmented. Every operation costs
+# O(log n) plus the k runs it actually meets, typing included.
+#
+# Edits follow Tk's rule for tags: text inserted strictly inside a run joins
+# it, text inserted at either end of a run does not.
+# ==============================================================================
+
+class StyleRuns:
+    __slots__ = ("_root",)
+
+    def __init__(self, runs=()):
+        # Sorted, separate runs (a loaded document's) are built into a tree in
+        # one pass; anything after the first out-of-order run goes through add().
+        items, rest, last_end = [], [], 0
+        for start, end in runs:
+            if end <= start:
+                continue
+            if not rest and (not items or start > last_end):
+                items.append((start - last_end, end - start))
+                last_end = end
+            else:
+                rest.append((start, end))
+        self._root = _build(items, 0, len(items))
+        for start, end in rest:
+            self.add(start, end)
+
+    def __len__(self) -> int:
+        return self._root.count if self._root else 0
+
+    def __iter__(self):
+        return _iter_runs(self._root)
+
+    def covers(self, offset: int) -> bool:
+        i = _count_before(self._root, offset, False, True)
+        return i < len(self) and _run_at(self._root, i)[0] <= offset
+
+    def overlapping(self, start: int, end: int) -> list:
+        # Runs that share at least one character with [start, end).
+        root = self._root
+        i = _count_before(root, start, False, True)
+        j = _count_before(root, end, True, False)
+        if i >= j:
+            return []
+        _, rest = _split(root, i)
+        middle, _ = _split(rest, j - i)
+        return list(_iter_runs(middle, _run_at(root, i - 1)[1] if i else 0))
+
+    def _replace(self, i: int, j: int, runs: list):
+        # Puts `runs` (absolute, sorted) in place of runs i..j-1, then re-bases
+        # the gap of the run that follows them.
+        root = self._root
+        previous_end = _run_at(root, i - 1)[1] if i else 0
+        old_end = _run_at(root, j - 1)[1] if j else 0
+        first, rest = _split(root, i)
+        _, rest = _split(rest, j - i)
+        end = previous_end
+        for run_start, run_end in runs:
+            first = _merge(first, _new_run(run_start - end, run_end - run_start))
+            end = run_end
+        if rest is not None and old_end != end:
+            rest = _adjust(rest, 0, old_end - end, 0)
+        self._root = _merge(first, rest)
+
+    def add(self, start: int, end: int):
+        if end <= start:
+            return
+        root = self._root
+        i = _count_before(root, start, False, False)
+        j = _count_before(root, end, True, True)
+        if i < j:
+            start = min(start, _run_at(root, i)[0])
+            end = max(end, _run_at(root, j - 1)[1])
+        self._replace(i, j, [(start, end)])
+
+    def remove(self, start: int, end: int):
+        if end <= start:
+            return
+        root = self._root
+        i = _count_before(root, start, False, True)
+        j = _count_before(root, end, True, False)
+        if i >= j:
+            return
+        runs = []
+        first_start, last_end = _run_at(root, i)[0], _run_at(root, j - 1)[1]
+        if first_start < start:
+            runs.append((first_start, start))
+        if last_end > end:
+            runs.append((end, last_end))
+        self._replace(i, j, runs)
+
+    def insert(self, offset: int, length: int):
+        root = self._root
+        if root is None:
+            return
+        i = _count_before(root, offset, True, False)
+        if i and _run_at(root, i - 1)[1] > offset:
+            self._root = _adjust(root, i - 1, 0, length)
+        elif i < len(self):
+            self._root = _adjust(root, i, length, 0)
+
+    def delete(self, offset: int, length: int):
+        end = offset + length
+        self.remove(offset, end)
+        root = self._root
+        i = _count_before(root, end, True, False)
+        if i == len(self):
+            return
+        root = _adjust(root, i, -length, 0)
+        if i:
+            previous_end = _run_at(root, i - 1)[1]
+            start, run_end = _run_at(root, i)
+            if start == previous_end:
+                # The deletion closed the gap between two runs.
+                first, rest = _split(root, i)
+                _, rest = _split(rest, 1)
+                root = _merge(_adjust(first, i - 1, 0, run_end - start), rest)
+        self._root = root
+
+
+# ==============================================================================
+# IV. FORMATTING MODEL FOR THE TEXT WIDGET
+#
+# The model keeps the StyleRuns of every style in use and drives the Tk tags
+# from them: each style is one tag, configured once when it is first used.
+# Colors share a pool of tags, one per distinct color that is actually on
+# screen; a color whose last run is cleared or deleted has its tag deleted, so
+# the number of live tags is bounded by the colors in the document rather than
+# by how many times a color was picked. Colors are exclusive, so recoloring a
+# range removes the previous colors from it.
+#
+# on_edit() is a TextMirror listener and keeps the runs aligned with the text,
+# the same way Tk moves the tags themselves.
+# ==============================================================================
+
+def color_style(color: str) -> str:
+    return COLOR_PREFIX + color.lstrip("#").lower()
+
+
+def is_color_style(style: str) -> bool:
+    return _COLOR_STYLE.fullmatch(style) is not None
+
+
+class FormattingModel:
+    def __init__(self, text, mirror):
+        self.text = text
+        self.mirror = mirror
+        self.document = mirror.document
+        self.styles = {}
+        self._options = {}
+        self._configured = set()
+
+    # --- Tag pool ---
+
+    def define(self, style: str, **options):
+        # Options may change later (e.g. bold after a font change); live tags
+        # are reconfigured, others pick them up when first used.
+        self._options[style] = options
+        if style in self._configured:
+            self.text.tag_configure(style, **options)
+
+    def style_names(self) -> set:
+        # The defined styles, besides pooled colors.
+        return {style for style in self._options if not style.startswith(COLOR_PREFIX)}
+
+    def _runs(self, style: str) -> StyleRuns:
+        runs = self.styles.get(style)
+        if runs is None:
+            runs = self.styles[style] = StyleRuns()
+        if style not in self._configured:
+            if style.startswith(COLOR_PREFIX) and style not in self._options:
+                self._options[style] = {"foreground": "#" + style[len(COLOR_PREFIX):]}
+            self.text.tag_configure(style, **self._options.get(style, {}))
+            self.text.tag_raise(style)
+            self._configured.add(style)
+        return runs
+
+    def _release(self, style: str):
+        # Drops a style whose runs are all gone; pooled color tags are deleted.
+        if self.styles.get(style) is not None and not self.styles[style]:
+            del self.styles[style]
+            if style.startswith(COLOR_PREFIX):
+                self.text.tag_delete(style)
+                self._configured.discard(style)
+                del self._options[style]
+
+    # --- Tk indices ---
+
+    def _offsets(self, first: str, last: str):
+        return self.mirror.offset(first), self.mirror.offset(last)
+
+    def _tag_ranges(self, ranges) -> list:
+        indices = []
+        for start, end in ranges:
+            indices += (self.mirror.index(start), self.mirror.index(end))
+        return indices
+
+    # --- Applying and removing styles (offsets) ---
+
+    def apply(self, style: str, start: int, end: int):
+        if end <= start:
+            return
+        self._runs(style).add(start, end)
+        self.text.tag_add(style, self.mirror.index(start), self.mirror.index(end))
+
+    def paint(self, start: int, end: int):
+        # Tags [start, end) in Tk from the runs, one tag_add call per style.
+        for style, runs in self.styles.items():
+            ranges = [(max(run_start, start), min(run_end, end)) for run_start, run_end in runs.overlapping(start, end)]
+            if ranges:
+                self.text.tag_add(style, *self._tag_ranges(ranges))
+
+    def remove(self, style: str, start: int, end: int):
+        runs = self.styles.get(style)
+        if runs is None or not runs.overlapping(start, end):
+            return
+        runs.remove(start, end)
+        self.text.tag_remove(style, self.mirror.index(start), self.mirror.index(end))
+        self._release(style)
+
+    def clear(self, start: int, end: int):
+        for style in list(self.styles):
+            self.remove(style, start, end)
+
+    def styles_at(self, offset: int) -> list:
+        return [style for style, runs in self.styles.items() if runs.covers(offset)]
+
+    def reset(self):
+        for style in list(self.styles):
+            self.text.tag_remove(style, "1.0", "end")
+            self.styles[style] = StyleRuns()
+            self._release(style)
+
+    def load(self, styles: dict):
+        # Replaces the model's runs without touching Tk; see paint().
+        self.reset()
+        for style, ranges in styles.items():
+            self._runs(style)
+            self.styles[style] = StyleRuns(ranges)
+            self._release(style)
+
+    def export(self) -> dict:
+        # A copy of every style's runs, safe to hand to another thread.
+        return {style: list(runs) for style, runs in self.styles.items()}
+
+    # --- Toolbar commands (Tk indices) ---
+
+    def apply_range(self, style: str, first: str, last: str):
+        self.apply(style, *self._offsets(first, last))
+
+    def toggle(self, style: str, first: str, last: str):
+        start, end = self._offsets(first, last)
+        runs = self.styles.get(style)
+        if runs is not None and runs.covers(start):
+            self.remove(style, start, end)
+        else:
+            self.apply(style, start, end)
+
+    def set_color(self, color: str, first: str, last: str):
+        start, end = self._offsets(first, last)
+        target = color_style(color)
+        for style in list(self.styles):
+            if style.startswith(COLOR_PREFIX) and style != target:
+                self.remove(style, start, end)
+        self.apply(target, start, end)
+
+    def clear_range(self, first: str, last: str):
+        self.clear(*self._offsets(first, last))
+
+    # --- Following the document ---
+
+    def on_edit(self, kind: str, offset: int, value):
+        if kind == "insert":
+            for runs in self.styles.values():
+                runs.insert(offset, len(value))
+            return
+        for style, runs in list(self.styles.items()):
+            runs.delete(offset, value)
+            self._release(style)
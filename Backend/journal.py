@@ -0,0 +1,370 @@
+# ==============================================================================
+# I. IMPORTS AND CONSTANTS
+# ==============================================================================
+
+import os
+import queue
+import shutil
+import struct
+import tempfile
+import threading
+import zlib
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from document_model import PieceTable
+
+
+def _state_directory() -> str:
+    # Per-user application state, independent of the working directory.
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), "AppData", "Local")
+    else:
+        base = os.environ.get("XDG_STATE_HOME") or os.path.join(os.path.expanduser("~"), ".local", "state")
+    return os.path.join(os.path.abspath(base), "text-editor")
+
+
+# Every running editor journals into its own session-* directory under here.
+DEFAULT_JOURNAL_DIR = os.path.join(_state_directory(), "journal")
+SESSION_PREFIX = "session-"
+LOCK_NAME = "session.lock"
+SNAPSHOT_NAME = "snapshot.bin"
+JOURNAL_NAME = "edits.log"
+FLUSH_MS = 1000
+COMPACT_BYTES = 8 << 20
+
+# On-disk layout (little-endian):
+#
+#   snapshot.bin : magic, version, generation, name length, encoding length,
+#                  file name, encoding, then the document text (UTF-8)
+#   edits.log    : magic, generation, then records of
+#                  crc32, kind, offset, count, payload
+#
+# A journal only applies to the snapshot with the same generation. Inserts
+# carry their text (count = payload bytes); deletes carry no payload
+# (count = characters removed). The CRC covers everything after itself, so a
+# record torn by a crash ends replay instead of corrupting the document.
+SNAPSHOT_MAGIC = b"TEDSNAP\0"
+JOURNAL_MAGIC = b"TEDJRNL\0"
+JOURNAL_VERSION = 1
+
+_SNAPSHOT_HEADER = struct.Struct("<8sIQII")
+_JOURNAL_HEADER = struct.Struct("<8sQ")
+_RECORD = struct.Struct("<IBQQ")
+_RECORD_BODY = struct.Struct("<BQQ")
+
+KIND_INSERT = 1
+KIND_DELETE = 2
+
+
+# ==============================================================================
+# II. READING: RECOVERY AFTER A CRASH
+# ==============================================================================
+
+def _read_snapshot(path: str):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, generation, name_size, encoding_size = _SNAPSHOT_HEADER.unpack_from(data, 0)
+    if magic != SNAPSHOT_MAGIC or version != JOURNAL_VERSION:
+        raise ValueError(f"{path} is not a journal snapshot")
+    offset = _SNAPSHOT_HEADER.size
+    file_name = data[offset:offset + name_size].decode("utf-8")
+    offset += name_size
+    encoding = data[offset:offset + encoding_size].decode("ascii")
+    offset += encoding_size
+    return generation, file_name, encoding, data[offset:].decode("utf-8", "surrogatepass")
+
+
+def iter_records(path: str, generation: int):
+    # Yields (kind, offset, text or length) up to the first damaged record.
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return
+    if len(data) < _JOURNAL_HEADER.size or _JOURNAL_HEADER.unpack_from(data, 0) != (JOURNAL_MAGIC, generation):
+        return
+    position = _JOURNAL_HEADER.size
+    while position + _RECORD.size <= len(data):
+        crc, kind, offset, count = _RECORD.unpack_from(data, position)
+        payload_size = count if kind == KIND_INSERT else 0
+        end = position + _RECORD.size + payload_size
+        if end > len(data) or zlib.crc32(data[position + 4:end]) != crc:
+            return
+        if kind == KIND_INSERT:
+            yield kind, offset, data[position + _RECORD.size:end].decode("utf-8", "surrogatepass")
+        else:
+            yield kind, offset, count
+        position = end
+
+
+def recover(directory: str):
+    # Returns (text, file name, encoding) left in a session directory by an
+    # editor that did not shut down cleanly, or None.
+    try:
+        generation, file_name, encoding, text = _read_snapshot(os.path.join(directory, SNAPSHOT_NAME))
+    except (OSError, ValueError, struct.error, UnicodeDecodeError):
+        return None
+    document = PieceTable(text)
+    for kind, offset, value in iter_records(os.path.join(directory, JOURNAL_NAME), generation):
+        if kind == KIND_INSERT:
+            document.insert(offset, value)
+        else:
+            document.delete(offset, value)
+    return document.get_text(), file_name, encoding
+
+
+# ==============================================================================
+# III. WRITING: THE JOURNAL WRITER THREAD
+# ==============================================================================
+
+def _write_replace(path: str, parts):
+    descriptor, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + ".", suffix=".tmp",
+                                             dir=os.path.dirname(path))
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            for part in parts:
+                f.write(part)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+class _JournalWriter:
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.generation = 0
+        self._file = None
+        self.jobs = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="edit-journal", daemon=True)
+        self.thread.start()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _run(self):
+        while True:
+            job = self.jobs.get()
+            try:
+                if job is None:
+                    self._close()
+                    return
+                getattr(self, "_" + job[0])(*job[1:])
+            except OSError:
+                # Autosave must never take the editor down; drop this journal
+                # and start over from the next snapshot.
+                self._close()
+
+    def _records(self, records):
+        if self._file is None:
+            return
+        parts = []
+        for kind, offset, value in records:
+            if kind == KIND_INSERT:
+                payload = value.encode("utf-8", "surrogatepass")
+                body = _RECORD_BODY.pack(kind, offset, len(payload)) + payload
+            else:
+                body = _RECORD_BODY.pack(kind, offset, value)
+            parts.append(struct.pack("<I", zlib.crc32(body)))
+            parts.append(body)
+        self._file.write(b"".join(parts))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _compact(self, snapshot, file_name: str, encoding: str):
+        self._close()
+        os.makedirs(self.directory, exist_ok=True)
+        self.generation += 1
+        name, encoding_name = file_name.encode("utf-8"), encoding.encode("ascii")
+        header = _SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, JOURNAL_VERSION, self.generation, len(name), len(encoding_name))
+        body = (chunk.encode("utf-8", "surrogatepass") for chunk in snapshot.iter_chunks())
+        _write_replace(self._path(SNAPSHOT_NAME), [header, name, encoding_name, *body])
+        _write_replace(self._path(JOURNAL_NAME), [_JOURNAL_HEADER.pack(JOURNAL_MAGIC, self.generation)])
+        self._file = open(self._path(JOURNAL_NAME), "ab")
+
+    def _discard(self):
+        self._close()
+        for name in (JOURNAL_NAME, SNAPSHOT_NAME):
+            if os.path.exists(self._path(name)):
+                os.unlink(self._path(name))
+
+    def _retire(self, directory: str, lock):
+        remove_session(directory, lock)
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+# ==============================================================================
+# IV. ONE JOURNAL PER EDITOR INSTANCE
+#
+# Each editor journals into a fresh session directory and holds an OS lock on
+# the lock file inside it for as long as it runs. The OS drops the lock when
+# the process exits, however it exits, so a session directory whose lock can
+# be taken belongs to an editor that is gone: that is what recovery offers.
+# A running editor's journal is never touched by another instance.
+# ==============================================================================
+
+class SessionLock:
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._file = None
+
+    def acquire(self) -> bool:
+        f = open(os.path.join(self.directory, LOCK_NAME), "a+b")
+        try:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        except OSError:
+            f.close()
+            return False
+        self._file = f
+        return True
+
+    def release(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def new_session(root: str = DEFAULT_JOURNAL_DIR):
+    # Returns (directory, held SessionLock) for a new editor instance.
+    os.makedirs(root, exist_ok=True)
+    directory = tempfile.mkdtemp(prefix=f"{SESSION_PREFIX}{os.getpid()}-", dir=root)
+    lock = SessionLock(directory)
+    if not lock.acquire():
+        raise OSError(f"could not lock the new journal session {directory}")
+    return directory, lock
+
+
+def claim_orphans(root: str = DEFAULT_JOURNAL_DIR):
+    # Yields (directory, held SessionLock) for every session whose editor has
+    # exited. Sessions are claimed one at a time, as the caller asks for them.
+    try:
+        names = sorted(os.listdir(root))
+    except OSError:
+        return
+    for name in names:
+        directory = os.path.join(root, name)
+        if not name.startswith(SESSION_PREFIX) or not os.path.isdir(directory):
+            continue
+        lock = SessionLock(directory)
+        try:
+            claimed = lock.acquire()
+        except OSError:
+            continue
+        if claimed:
+            yield directory, lock
+
+
+def remove_session(directory: str, lock: SessionLock = None):
+    if lock is not None:
+        lock.release()
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+# ==============================================================================
+# V. EDIT JOURNAL FOR THE EDITOR
+#
+# record() is a TextMirror listener: per keystroke it only appends a tuple to a
+# list. Every FLUSH_MS the batch goes to the writer thread, which appends it to
+# the log with one write and one fsync. Once the log has grown by about
+# COMPACT_BYTES, the current document snapshot replaces it. After a save or a
+# fresh document there is nothing to recover, so the files are deleted and the
+# next edit writes a new base snapshot (which already includes that edit).
+# ==============================================================================
+
+class EditJournal:
+    def __init__(self, master, document, directory: str = None, flush_ms: int = FLUSH_MS,
+                 compact_bytes: int = COMPACT_BYTES, root: str = DEFAULT_JOURNAL_DIR):
+        # Without a directory, a new locked session is started under root and
+        # removed again on a clean stop().
+        self._lock = None
+        if directory is None:
+            directory, self._lock = new_session(root)
+        self.directory = directory
+        self.master = master
+        self.document = document
+        self.flush_ms = flush_ms
+        self.compact_bytes = compact_bytes
+        self.paused = False
+        self.edit_count = 0
+        self.file_name = ""
+        self.encoding = "utf-8"
+
+        self._writer = _JournalWriter(directory)
+        self._pending = []
+        self._pending_bytes = 0
+        self._logged_bytes = 0
+        self._flush_after = None
+        self._needs_base = True
+
+    def record(self, kind: str, offset: int, value):
+        if self.paused:
+            return
+        self.edit_count += 1
+        if self._needs_base:
+            self.compact()
+            return
+        if kind == "insert":
+            self._pending.append((KIND_INSERT, offset, value))
+            self._pending_bytes += _RECORD.size + len(value)
+        else:
+            self._pending.append((KIND_DELETE, offset, value))
+            self._pending_bytes += _RECORD.size
+        if self._logged_bytes + self._pending_bytes >= self.compact_bytes:
+            self.compact()
+        elif self._flush_after is None:
+            self._flush_after = self.master.after(self.flush_ms, self.flush)
+
+    def flush(self):
+        self._flush_after = None
+        if self._pending:
+            self._writer.jobs.put(("records", self._pending))
+            self._logged_bytes += self._pending_bytes
+            self._pending, self._pending_bytes = [], 0
+
+    def compact(self):
+        self._cancel_flush()
+        self._pending, self._pending_bytes = [], 0
+        self._logged_bytes = 0
+        self._needs_base = False
+        self._writer.jobs.put(("compact", self.document.snapshot(), self.file_name, self.encoding))
+
+    def mark_clean(self, file_name: str = "", encoding: str = "utf-8"):
+        self.file_name, self.encoding = file_name, encoding
+        self._cancel_flush()
+        self._pending, self._pending_bytes = [], 0
+        self._needs_base = True
+        self._writer.jobs.put(("discard",))
+
+    def retire(self, directory: str, lock: SessionLock):
+        # Removes another session's journal once everything queued before this
+        # call (such as the snapshot of text recovered from it) is on disk.
+        self._writer.jobs.put(("retire", directory, lock))
+
+    def stop(self):
+        # Clean shutdown: whatever was unsaved was declined, so nothing is kept.
+        self.mark_clean()
+        self._writer.jobs.put(None)
+        self._writer.thread.join()
+        if self._lock is not None:
+            remove_session(self.directory, self._lock)
+            self._lock = None
+
+    def _cancel_flush(self):
+        if self._flush_after is not None:
+            self.master.after_cancel(self._flush_after)
+            self._flush_after = None
@@ -0,0 +1,209 @@
+# ==============================================================================
+# I. IMPORTS AND CONSTANTS
+# ==============================================================================
+
+import bisect
+import codecs
+import mmap
+import os
+import re
+import threading
+from array import array
+
+from file_loader import DETECT_BYTES, detect_encoding
+
+INDEX_BLOCK = 1 << 22
+STATS_BLOCK = 1 << 20
+WINDOW_MARGIN = 200
+VIEWER_THRESHOLD = 64 << 20
+
+_NEWLINE = re.compile(b"\n")
+
+
+# ==============================================================================
+# II. MAPPED FILE WITH A BACKGROUND LINE INDEX
+#
+# The file is never read into memory as a whole. A daemon thread records the
+# byte offset of every line start in an array, one block at a time; readers
+# use whatever prefix of the index exists so far. Only encodings in which
+# b"\n" is always a newline (UTF-8, cp1252 and the like) can be indexed.
+# ==============================================================================
+
+class MappedFile:
+    def __init__(self, path: str):
+        self.path = path
+        self.size = os.path.getsize(path)
+        self._file = open(path, "rb")
+        self.map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else b""
+        self.encoding = detect_encoding(self.map[:DETECT_BYTES])
+        if self.encoding in ("utf-16", "utf-32"):
+            self._close_mapping()
+            raise ValueError(f"{os.path.basename(path)} is {self.encoding}; the viewer needs an 8-bit line encoding")
+        # The BOM is skipped by hand, so slices decode with the plain codec.
+        self._skip = len(codecs.BOM_UTF8) if self.encoding == "utf-8-sig" else 0
+        self.codec = "utf-8" if self._skip else self.encoding
+
+        self.line_starts = array("Q", [self._skip])
+        self.indexed_bytes = self._skip
+        self.index_complete = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._build_index, name="line-index", daemon=True)
+        self._thread.start()
+
+    def _build_index(self):
+        position = self.indexed_bytes
+        while position < self.size and not self._closed:
+            block = self.map[position:position + INDEX_BLOCK]
+            self.line_starts.extend(position + match.end() for match in _NEWLINE.finditer(block))
+            position += len(block)
+            self.indexed_bytes = position
+        self.index_complete = True
+
+    def close(self):
+        self._closed = True
+        self._thread.join()
+        self._close_mapping()
+
+    def _close_mapping(self):
+        if isinstance(self.map, mmap.mmap):
+            self.map.close()
+        self._file.close()
+
+    # --- Lines ---
+
+    def line_count(self) -> int:
+        # Complete lines indexed so far. Until the index is done, the text after
+        # the last indexed line start may still be cut mid-line.
+        count = len(self.line_starts)
+        if not self.index_complete or (count > 1 and self.line_starts[-1] == self.size):
+            count -= 1
+        return count
+
+    def estimated_line_count(self) -> int:
+        if self.index_complete or self.indexed_bytes <= self._skip:
+            return max(self.line_count(), 1)
+        return max(int(len(self.line_starts) * self.size / self.indexed_bytes), 1)
+
+    def read_lines(self, first: int, last: int) -> str:
+        # Lines first..last-1 (0-based), decoded.
+        starts = self.line_starts
+        if first >= len(starts):
+            return ""
+        start = starts[first]
+        end = starts[last] if last < len(starts) else self.size
+        return self.map[start:end].decode(self.codec, errors="replace")
+
+    def line_of(self, byte_offset: int) -> int:
+        return bisect.bisect_right(self.line_starts, byte_offset) - 1
+
+    # --- Whole-file operations on the mapping ---
+
+    def find(self, needle: str, start: int = 0) -> int:
+        # Byte offset of the next match at or after `start`, or -1.
+        return self.map.find(needle.encode(self.codec, errors="replace"), start)
+
+    def iter_chunks(self, block: int = STATS_BLOCK):
+        decoder = codecs.getincrementaldecoder(self.encoding)(errors="replace")
+        for position in range(0, self.size, block):
+            chunk = decoder.decode(self.map[position:position + block])
+            if chunk:
+                yield chunk
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+
+
+# ==============================================================================
+# III. WINDOWED VIEW IN THE TEXT WIDGET
+#
+# The Text widget only ever holds the lines around the viewport plus
+# WINDOW_MARGIN lines on each side. The scrollbar is driven by the position in
+# the whole file; when the viewport nears either edge of the window, the window
+# is refilled around it.
+# ==============================================================================
+
+class MmapViewer:
+    def __init__(self, text, scrollbar, path: str, margin: int = WINDOW_MARGIN):
+        self.text = text
+        self.scrollbar = scrollbar
+        self.margin = margin
+        self.file = MappedFile(path)
+        self.window_start = 0
+        self.window_end = 0
+        self._saved_commands = (scrollbar.cget("command"), text.cget("yscrollcommand"))
+
+        scrollbar.config(command=self.yview)
+        text.config(yscrollcommand=self._on_text_scroll)
+        self._load_window(0)
+
+    def close(self):
+        scroll_command, yscroll_command = self._saved_commands
+        self.scrollbar.config(command=scroll_command)
+        self.text.config(yscrollcommand=yscroll_command, state="normal")
+        self.text.delete("1.0", "end")
+        self.file.close()
+
+    def _load_window(self, top_line: int):
+        available = self.file.line_count()
+        top_line = max(0, min(top_line, available - 1))
+        start = max(0, top_line - self.margin)
+        end = min(available, top_line + 3 * self.margin)
+        self.window_start, self.window_end = start, end
+
+        self.text.config(state="normal")
+        self.text.delete("1.0", "end")
+        self.text.insert("1.0", self.file.read_lines(start, end))
+        self.text.config(state="disabled")
+        self.text.yview(f"{top_line - start + 1}.0")
+
+    def _top_line(self) -> int:
+        return self.window_start + int(self.text.index("@0,0").split(".")[0]) - 1
+
+    def _on_text_scroll(self, first, last):
+        top = self._top_line()
+        visible = int(self.text.index(f"@0,{self.text.winfo_height()}").split(".")[0]) - 1
+        near_start = self.window_start > 0 and top - self.window_start < self.margin // 2
+        near_end = self.window_start + visible > self.window_end - self.margin // 2 and \
+            self.window_end < self.file.line_count()
+        if near_start or near_end:
+            self._load_window(top)
+            return
+
+        total = self.file.estimated_line_count()
+        height = max(self.window_start + visible - top, 1)
+        self.scrollbar.set(top / total, min((top + height) / total, 1.0))
+
+    def refresh(self):
+        # Called periodically while the index is still growing: fills a window
+        # that was cut short by the index, and lets the scrollbar thumb settle.
+        if self.window_end - self.window_start < 3 * self.margin and self.window_end < self.file.line_count():
+            self._load_window(self._top_line())
+        else:
+            self._on_text_scroll(*self.text.yview())
+
+    def yview(self, *args):
+        if args and args[0] == "moveto":
+            self.goto_line(int(float(args[1]) * self.file.estimated_line_count()))
+        else:
+            self.text.yview(*args)
+
+    def goto_line(self, line: int):
+        if self.window_start + self.margin // 2 <= line < self.window_end - 2 * self.margin:
+            self.text.yview(f"{line - self.window_start + 1}.0")
+        else:
+            self._load_window(line)
+
+    def find_next(self, needle: str) -> bool:
+        # Searches the mapping from just after the top visible line.
+        start = self.file.line_starts[min(self._top_line() + 1, len(self.file.line_starts) - 1)]
+        found = self.file.find(needle, start)
+        if found < 0:
+            found = self.file.find(needle, 0)
+        if found < 0:
+            return False
+        line = self.file.line_of(found)
+        self.goto_line(line)
+        row = line - self.window_start + 1
+        self.text.tag_remove("sel", "1.0", "end")
+        self.text.tag_add("sel", f"{row}.0", f"{row}.end")
+        return True
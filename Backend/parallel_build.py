@@ -0,0 +1,245 @@
+# ==============================================================================
+# I. IMPORTS AND CONSTANTS
+# ==============================================================================
+
+import contextlib
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+import trie_artifact
+from compact_trie import CompactTrie, compile_sorted_items
+
+FLUSH_LINES = 1 << 18
+
+
+# ==============================================================================
+# II. STREAMING THE INPUT INTO FIRST-CHARACTER BUCKETS
+#
+# Input files hold one term per line, optionally followed by a tab and a
+# frequency count; terms may contain spaces. Lines are read one at a time and
+# appended to a temp file per (lower-cased) first character, so the word list
+# is never held in memory as a whole. Every word of a bucket shares its first
+# character, so each bucket's words are a subtree of the root and duplicates
+# can only meet inside one bucket.
+# ==============================================================================
+
+def parse_line(line: str):
+    # Returns (term, count or None), or None for a blank line.
+    term, count = line.rstrip("\r\n"), None
+    if "\t" in term:
+        head, tail = term.rsplit("\t", 1)
+        if tail.strip().isdigit():
+            term, count = head, int(tail)
+    term = term.strip().lower()
+    return (term, count) if term else None
+
+
+def shard_words(paths, directory: str, stdin_digest=None):
+    # Returns ({first character: bucket path}, {first character: bytes}, lines read).
+    # Lines read from stdin also go into stdin_digest, a hashlib object, since
+    # there is no file to fingerprint afterwards.
+    buckets, sizes, pending = {}, {}, {}
+    buffered = read = 0
+
+    def flush():
+        for char, lines in pending.items():
+            if char not in buckets:
+                buckets[char] = os.path.join(directory, f"{ord(char):x}.txt")
+            with open(buckets[char], "a", encoding="utf-8") as f:
+                f.writelines(lines)
+            sizes[char] = sizes.get(char, 0) + sum(map(len, lines))
+        pending.clear()
+
+    for path in paths:
+        # "-" reads standard input, which is not ours to close.
+        if path == "-":
+            source = contextlib.nullcontext(sys.stdin)
+        else:
+            source = open(path, "r", encoding="utf-8", errors="replace")
+        with source as f:
+            for line in f:
+                if path == "-" and stdin_digest is not None:
+                    stdin_digest.update(line.encode("utf-8", "surrogateescape"))
+                parsed = parse_line(line)
+                if parsed is None:
+                    continue
+                term, count = parsed
+                pending.setdefault(term[0], []).append(f"{term}\t{'' if count is None else count}\n")
+                read += 1
+                buffered += 1
+                if buffered >= FLUSH_LINES:
+                    flush()
+                    buffered = 0
+    flush()
+    return buckets, sizes, read
+
+
+def plan_shards(sizes: dict, jobs: int) -> list:
+    # Groups buckets into at most `jobs` runs of consecutive first characters
+    # of roughly equal size. Consecutive runs keep the merge a concatenation.
+    chars = sorted(sizes)
+    target = sum(sizes.values()) / max(jobs, 1)
+    shards, current, current_size = [], [], 0
+    for char in chars:
+        current.append(char)
+        current_size += sizes[char]
+        if current_size >= target and len(shards) < jobs - 1:
+            shards.append(current)
+            current, current_size = [], 0
+    if current:
+        shards.append(current)
+    return shards
+
+
+# ==============================================================================
+# III. BUILDING SHARDS IN WORKER PROCESSES
+#
+# A worker reads its buckets, merges duplicate terms (the last count wins, as
+# in CompactTrie.from_items) and compiles them with compile_sorted_items. The
+# result is a complete trie of its own, whose root's children are the shard's
+# first characters, plus whether any of its lines carried a count: the merged
+# trie keeps scores only if some shard saw one.
+# ==============================================================================
+
+def build_shard(bucket_paths: list):
+    terms, saw_counts = {}, False
+    for path in bucket_paths:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                term, count = line.rstrip("\n").rsplit("\t", 1)
+                if count:
+                    terms[term], saw_counts = int(count), True
+                else:
+                    terms[term] = terms.get(term, 0)
+    items = sorted((term, True) for term in terms)
+    labels, first_child, payloads, _, scores, _ = compile_sorted_items(items, terms)
+    return labels, first_child, payloads, scores, len(terms), saw_counts
+
+
+def _levels(first_child) -> list:
+    # (start, end) node ranges of each BFS level. The children of a run of
+    # consecutive nodes are themselves a run, so each level follows from the
+    # one above it.
+    levels, start, end = [], 0, 1
+    while start < end:
+        levels.append((start, end))
+        start, end = first_child[start], first_child[end]
+    return levels
+
+
+# ==============================================================================
+# IV. MERGING SHARDS LEVEL BY LEVEL
+#
+# Nodes are numbered breadth-first in label order, so level d of the merged
+# trie is level d of every shard, one after another in shard order: shards hold
+# disjoint, increasing first characters. Only the shard roots are merged into
+# one. A node keeps its position within its shard's block, so its first_child
+# entry only moves by the shift of its children's block: one constant per
+# shard and level.
+# ==============================================================================
+
+def merge_shards(shards: list, with_scores: bool) -> CompactTrie:
+    shard_levels = [_levels(shard[1]) for shard in shards]
+    depth = max(len(levels) for levels in shard_levels)
+    for levels, shard in zip(shard_levels, shards):
+        node_count = len(shard[2])
+        levels += [(node_count, node_count)] * (depth + 1 - len(levels))
+
+    # Where each shard's block of each level starts in the merged numbering.
+    offsets = [[0] * (depth + 1) for _ in shards]
+    position = 1
+    for level in range(1, depth + 1):
+        for s, levels in enumerate(shard_levels):
+            offsets[s][level] = position
+            position += levels[level][1] - levels[level][0]
+    total = position
+
+    labels, first_child = array("I", [0]), array("I", [1])
+    payloads, scores = array("i", [-1]), array("I", [0])
+    for level in range(1, depth + 1):
+        for s, (shard_labels, shard_first_child, shard_payloads, shard_scores, _, _) in enumerate(shards):
+            start, end = shard_levels[s][level]
+            if start == end:
+                continue
+            labels.extend(shard_labels[start:end])
+            payloads.extend(shard_payloads[start:end])
+            scores.extend(shard_scores[start:end])
+            if level < depth:
+                shift = offsets[s][level + 1] - shard_levels[s][level + 1][0]
+                first_child.extend(child + shift for child in shard_first_child[start:end])
+            else:
+                first_child.extend([total] * (end - start))
+    first_child.append(total)
+    return CompactTrie(labels, first_child, payloads, [], scores if with_scores else None)
+
+
+# ==============================================================================
+# V. THE PIPELINE
+# ==============================================================================
+
+def parallel_build(paths: list, jobs: int = None, on_progress=None, stdin_digest=None):
+    # Returns (CompactTrie, stats dict).
+    report = on_progress or (lambda message: None)
+    jobs = jobs or os.cpu_count() or 1
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="trie-shards-") as directory:
+        buckets, sizes, read = shard_words(paths, directory, stdin_digest)
+        sharded = time.perf_counter()
+        plan = plan_shards(sizes, jobs)
+        report(f"Read {read:,} terms into {len(buckets)} buckets; building {len(plan)} shards on {jobs} processes")
+
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            shards = list(pool.map(build_shard, [[buckets[char] for char in shard] for shard in plan]))
+        built = time.perf_counter()
+
+    with_scores = any(shard[5] for shard in shards)
+    result = merge_shards(shards, with_scores) if shards else CompactTrie.from_items([])
+    finished = time.perf_counter()
+    unique = sum(shard[4] for shard in shards)
+    stats = {"terms_read": read, "unique_terms": unique, "shards": len(plan), "nodes": len(result),
+             "shard_seconds": sharded - started, "build_seconds": built - sharded,
+             "merge_seconds": finished - built, "seconds": finished - started,
+             "words_per_second": read / max(finished - started, 1e-9)}
+    return result, stats
+
+
+def input_fingerprint(paths: list, stdin_digest=None) -> bytes:
+    # Files are identified by path, size and mtime; stdin by the digest of what
+    # shard_words read from it.
+    digest = hashlib.sha256(f"format:{trie_artifact.ARTIFACT_VERSION};parallel".encode("utf-8"))
+    for path in paths:
+        if path == "-":
+            digest.update(b"-:" + (stdin_digest.digest() if stdin_digest is not None else b"") + b";")
+            continue
+        stat = os.stat(path)
+        digest.update(f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns};".encode("utf-8"))
+    return digest.digest()
+
+
+def main(argv: list = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Build a dictionary artifact from large word lists in parallel.")
+    parser.add_argument("inputs", nargs="+", help="word list files: one term per line, optional tab and count")
+    parser.add_argument("--output", default=os.path.join("build", "custom_words.bin"))
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: one per core)")
+    args = parser.parse_args(argv)
+
+    stdin_digest = hashlib.sha256()
+    words_trie, stats = parallel_build(args.inputs, args.jobs, print, stdin_digest)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    trie_artifact.write_artifact(args.output, input_fingerprint(args.inputs, stdin_digest), {"words": words_trie})
+    print(f"{stats['unique_terms']:,} unique terms, {stats['nodes']:,} nodes in {stats['seconds']:.2f} s "
+          f"(shard {stats['shard_seconds']:.2f} s, build {stats['build_seconds']:.2f} s, "
+          f"merge {stats['merge_seconds']:.2f} s): {stats['words_per_second']:,.0f} words/s")
+    print(f"Artifact written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,239 @@
+# ==============================================================================
+# I. IMPORTS AND CONSTANTS
+# ==============================================================================
+
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from tkinter import BooleanVar, Text, Toplevel, filedialog, ttk
+
+WINDOW = 2048
+
+# Timing is off unless TEXT_EDITOR_PERF is set or the panel turns it on. While
+# it is off, a timed function costs one global lookup and one extra call.
+enabled = bool(os.environ.get("TEXT_EDITOR_PERF"))
+
+
+# ==============================================================================
+# II. ROLLING HISTOGRAMS
+#
+# Each named span keeps its last WINDOW durations (in nanoseconds) in a ring
+# buffer, from which percentiles are computed only when someone looks, plus
+# running totals over the whole session. Recording is a deque append and a few
+# additions, so it is safe to leave on while typing.
+# ==============================================================================
+
+class Histogram:
+    __slots__ = ("samples", "count", "total_ns", "max_ns")
+
+    def __init__(self, window: int = WINDOW):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, duration_ns: int):
+        self.samples.append(duration_ns)
+        self.count += 1
+        self.total_ns += duration_ns
+        if duration_ns > self.max_ns:
+            self.max_ns = duration_ns
+
+    def percentile(self, fraction: float) -> float:
+        # Milliseconds, over the recent window.
+        ordered = sorted(self.samples)
+        if not ordered:
+            return 0.0
+        return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)] / 1e6
+
+    def summary(self) -> dict:
+        return {"count": self.count, "mean_ms": self.total_ns / max(self.count, 1) / 1e6,
+                "p50_ms": self.percentile(0.50), "p90_ms": self.percentile(0.90),
+                "p99_ms": self.percentile(0.99), "max_ms": self.max_ns / 1e6}
+
+
+histograms = {}
+_trace_file = None
+_trace_lock = threading.Lock()
+
+
+def record(name: str, duration_ns: int, always: bool = False):
+    # `always` records one-off events (startup) even while timing is off.
+    if not (enabled or always):
+        return
+    histogram = histograms.get(name)
+    if histogram is None:
+        histogram = histograms[name] = Histogram()
+    histogram.add(duration_ns)
+    if _trace_file is not None:
+        line = json.dumps({"t": time.time(), "span": name, "ms": duration_ns / 1e6,
+                           "thread": threading.current_thread().name})
+        with _trace_lock:
+            if _trace_file is not None:
+                _trace_file.write(line + "\n")
+
+
+def timed(name: str):
+    def decorate(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return function(*args, **kwargs)
+            started = time.perf_counter_ns()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter_ns() - started)
+        return wrapper
+    return decorate
+
+
+class span:
+    # `with perf.span("name"):` times a block, for code that is not a function.
+    __slots__ = ("name", "always", "started")
+
+    def __init__(self, name: str, always: bool = False):
+        self.name = name
+        self.always = always
+
+    def __enter__(self):
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        record(self.name, time.perf_counter_ns() - self.started, self.always)
+
+
+def summaries() -> dict:
+    return {name: histogram.summary() for name, histogram in sorted(histograms.items())}
+
+
+def reset():
+    histograms.clear()
+
+
+# ==============================================================================
+# III. JSONL TRACE AND PROFILER CAPTURE
+# ==============================================================================
+
+def start_trace(path: str):
+    global _trace_file
+    stop_trace()
+    _trace_file = open(path, "a", encoding="utf-8", buffering=1 << 16)
+
+
+def stop_trace():
+    global _trace_file
+    with _trace_lock:
+        if _trace_file is not None:
+            _trace_file.close()
+            _trace_file = None
+
+
+def tracing() -> bool:
+    return _trace_file is not None
+
+
+_profiler = None
+
+
+def start_profile():
+    global _profiler
+    if _profiler is None:
+        _profiler = cProfile.Profile()
+        _profiler.enable()
+
+
+def stop_profile(path: str = None, limit: int = 30) -> str:
+    # Stops the capture and returns the top functions by cumulative time; the
+    # raw stats are also dumped to `path` (for snakeviz and friends) if given.
+    global _profiler
+    if _profiler is None:
+        return ""
+    profiler, _profiler = _profiler, None
+    profiler.disable()
+    if path:
+        profiler.dump_stats(path)
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(limit)
+    return output.getvalue()
+
+
+def profiling() -> bool:
+    return _profiler is not None
+
+
+# ==============================================================================
+# IV. PERFORMANCE PANEL
+# ==============================================================================
+
+def show_panel(master, refresh_ms: int = 1000):
+    dialog = Toplevel(master)
+    dialog.title("Performance")
+    dialog.transient(master)
+
+    columns = ("count", "mean", "p50", "p90", "p99", "max")
+    tree = ttk.Treeview(dialog, columns=columns, height=12)
+    tree.heading("#0", text="Span")
+    tree.column("#0", width=240)
+    for column in columns:
+        tree.heading(column, text=column if column == "count" else f"{column} (ms)")
+        tree.column(column, width=80, anchor="e")
+    tree.pack(fill="both", expand=True, padx=8, pady=8)
+
+    controls = ttk.Frame(dialog)
+    controls.pack(fill="x", padx=8)
+    timing = BooleanVar(master=dialog, value=enabled)
+    trace = BooleanVar(master=dialog, value=tracing())
+    profile = BooleanVar(master=dialog, value=profiling())
+    output = Text(dialog, height=12, wrap="none", font=("Courier", 9))
+
+    def set_timing():
+        global enabled
+        enabled = timing.get()
+
+    def set_trace():
+        if trace.get():
+            path = filedialog.asksaveasfilename(parent=dialog, initialfile="perf-trace.jsonl",
+                                                defaultextension=".jsonl")
+            if path:
+                start_trace(path)
+            else:
+                trace.set(False)
+        else:
+            stop_trace()
+
+    def set_profile():
+        if profile.get():
+            start_profile()
+            return
+        report = stop_profile()
+        output.delete("1.0", "end")
+        output.insert("1.0", report)
+        output.pack(fill="both", expand=True, padx=8, pady=(0, 8))
+
+    def redraw():
+        tree.delete(*tree.get_children())
+        for name, summary in summaries().items():
+            tree.insert("", "end", text=name, values=(
+                f"{summary['count']:,}", *(f"{summary[key]:.2f}" for key in
+                                          ("mean_ms", "p50_ms", "p90_ms", "p99_ms", "max_ms"))))
+
+    def refresh():
+        if dialog.winfo_exists():
+            redraw()
+            dialog.after(refresh_ms, refresh)
+
+    ttk.Checkbutton(controls, text="Record timings", variable=timing, command=set_timing).pack(side="left")
+    ttk.Checkbutton(controls, text="Write JSONL trace", variable=trace, command=set_trace).pack(side="left", padx=8)
+    ttk.Checkbutton(controls, text="Profile (cProfile)", variable=profile, command=set_profile).pack(side="left")
+    ttk.Button(controls, text="Reset", command=lambda: reset() or redraw()).pack(side="right")
+    ttk.Button(dialog, text="Close", command=dialog.destroy).pack(pady=8)
+    refresh()
+    return dialog
@@ -0,0 +1,144 @@
+# ==============================================================================
+# I. IMPORTS AND CONSTANTS
+# ==============================================================================
+
+import json
+import os
+import time
+
+from file_saver import SaveResult, atomic_write
+from formatting import is_color_style
+
+EXTENSION = ".tdoc"
+FORMAT_NAME = "text-editor-document"
+FORMAT_VERSION = 1
+PAINT_CHARS = 1 << 16
+
+# A .tdoc file is UTF-8 JSON:
+#
+#   {"format": FORMAT_NAME, "version": 1, "text": "...",
+#    "styles": {"bold": [gap, length, gap, length, ...], "colorff0000": [...]}}
+#
+# Each style's runs are delta-encoded: `gap` is the distance from the end of
+# the previous run (or 0) to the start of this one, `length` the run's length.
+# Small numbers keep the file compact for the long, fragmented run lists of a
+# heavily styled document.
+
+
+# ==============================================================================
+# II. ENCODING STYLE RUNS
+# ==============================================================================
+
+def encode_runs(runs) -> list:
+    deltas, previous_end = [], 0
+    for start, end in runs:
+        deltas += (start - previous_end, end - start)
+        previous_end = end
+    return deltas
+
+
+def decode_runs(deltas: list) -> list:
+    if not isinstance(deltas, list) or len(deltas) % 2 or any(
+            value.__class__ is not int or value < 0 for value in deltas):
+        raise ValueError("style runs must be pairs of non-negative integers")
+    runs, position = [], 0
+    for i in range(0, len(deltas), 2):
+        start = position + deltas[i]
+        position = start + deltas[i + 1]
+        runs.append((start, position))
+    return runs
+
+
+# ==============================================================================
+# III. READING AND WRITING DOCUMENTS
+# ==============================================================================
+
+def is_rich_document(path: str) -> bool:
+    return path.lower().endswith(EXTENSION)
+
+
+def read_rich_document(path: str, style_names=()):
+    # Returns (text, {style: [(start, end), ...]}). Styles must be among
+    # `style_names` or pooled colors; anything wrong with the file raises
+    # ValueError before the caller has touched the editor.
+    name = os.path.basename(path)
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if not isinstance(data, dict) or data.get("format") != FORMAT_NAME:
+        raise ValueError(f"{name} is not a {EXTENSION} document")
+    if data.get("version") != FORMAT_VERSION:
+        raise ValueError(f"{name} uses unsupported version {data.get('version')}")
+    content, encoded = data.get("text", ""), data.get("styles", {})
+    if not isinstance(content, str) or not isinstance(encoded, dict):
+        raise ValueError(f"{name} is malformed: expected text and a map of styles")
+    styles = {}
+    for style, deltas in encoded.items():
+        if style not in style_names and not is_color_style(style):
+            raise ValueError(f"{name} uses unknown style {style!r}")
+        runs = styles[style] = decode_runs(deltas)
+        if runs and runs[-1][1] > len(content):
+            raise ValueError(f"{name} has styles past the end of its text")
+    return content, styles
+
+
+def write_rich_document(path: str, snapshot, styles: dict) -> SaveResult:
+    # `styles` maps style names to (start, end) runs, as exported by the
+    # FormattingModel. The file is replaced atomically, like a plain save.
+    started = time.perf_counter()
+    data = {"format": FORMAT_NAME, "version": FORMAT_VERSION, "text": snapshot.get_text(),
+            "styles": {style: encode_runs(runs) for style, runs in styles.items() if runs}}
+    encoded = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8", "surrogatepass")
+    with atomic_write(path) as f:
+        f.write(encoded)
+    return SaveResult(path, len(encoded), seconds=time.perf_counter() - started)
+
+
+# ==============================================================================
+# IV. LAZY STYLING AFTER A LOAD
+#
+# A loaded document's runs go straight into the FormattingModel, but Tk tags
+# are painted region by region: first the PAINT_CHARS around the viewport, so
+# what is on screen is styled at once, then the rest of the document one
+# region per event-loop turn. Each region is one tag_add call per style. An
+# edit before painting is done only moves the first unpainted offset with the
+# text, as the model has already moved its runs: painting carries on lazily,
+# and a delete cannot pull unpainted runs back into the part counted as done.
+# ==============================================================================
+
+class LazyStyler:
+    def __init__(self, text, model, region_chars: int = PAINT_CHARS):
+        self.text = text
+        self.model = model
+        self.region_chars = region_chars
+        self.next_offset = 0
+        self.finished = False
+        self._after = None
+
+    def start(self):
+        top = self.model.mirror.offset("@0,0")
+        self.model.paint(max(0, top - self.region_chars // 2), top + self.region_chars)
+        self._after = self.text.after_idle(self._step)
+
+    def cancel(self):
+        if self._after is not None:
+            self.text.after_cancel(self._after)
+            self._after = None
+        self.finished = True
+
+    def on_edit(self, kind: str, offset: int, value):
+        if self.finished or offset >= self.next_offset:
+            return
+        if kind == "insert":
+            self.next_offset += len(value)
+        else:
+            self.next_offset = max(offset, self.next_offset - value)
+
+    def _step(self):
+        end = self.next_offset + self.region_chars
+        self.model.paint(self.next_offset, end)
+        self.next_offset = end
+        if end >= len(self.model.document):
+            self._after = None
+            self.finished = True
+        else:
+            self._after = self.text.after(1, self._step)
@@ -0,0 +1,183 @@
+# ==============================================================================
+# I. IMPORTS AND CONSTANTS
+# ==============================================================================
+
+import re
+from tkinter import Menu
+
+import trie
+from document_model import counts_surrogates, tk_length
+
+WORD_PATTERN = re.compile(r"[A-Za-z]+")
+MISSPELLED_TAG = "misspelled"
+
+
+# ==============================================================================
+# II. TOKENIZING AND CHECKING
+# ==============================================================================
+
+def should_check(token: str) -> bool:
+    # Single letters and all-caps acronyms are never flagged.
+    return len(token) > 1 and not token.isupper()
+
+
+def find_misspellings(word_trie, content: str, known: dict = None):
+    # Yields (start, end, token) for every unknown word in `content`. `known`
+    # memoizes dictionary lookups across calls, since documents repeat the same
+    # words constantly.
+    if known is None:
+        known = {}
+    for match in WORD_PATTERN.finditer(content):
+        token = match.group()
+        if not should_check(token):
+            continue
+        lookup = token.lower()
+        found = known.get(lookup)
+        if found is None:
+            found = known[lookup] = trie.search(word_trie, lookup)
+        if not found:
+            yield match.start(), match.end(), token
+
+
+# ==============================================================================
+# III. SPELL CHECKER FOR THE TEXT WIDGET
+#
+# The full-document scan runs in slices of `chunk_lines` lines scheduled with
+# `after`, so the event loop keeps running between slices and a multi-megabyte
+# document never freezes the editor. After that, edits only mark their lines
+# dirty and a debounced recheck rescans just those lines; an edit spanning more
+# than a slice (a paste, an opened file) falls back to a sliced full scan.
+# ==============================================================================
+
+class SpellChecker:
+    def __init__(self, text, word_trie, chunk_lines: int = 200, recheck_delay_ms: int = 300):
+        self.text = text
+        self.word_trie = word_trie
+        self.chunk_lines = chunk_lines
+        self.recheck_delay_ms = recheck_delay_ms
+        self.enabled = False
+        self.ignored = set()
+        self._known = {}
+        self._dirty_lines = set()
+        self._scan_after = None
+        self._recheck_after = None
+        self._surrogates = counts_surrogates(text)
+
+        text.tag_configure(MISSPELLED_TAG, underline=True, foreground="#c0392b")
+        self._menu = Menu(text, tearoff=0)
+        text.tag_bind(MISSPELLED_TAG, "<Button-3>", self._show_suggestions)
+
+    # --- Turning checking on and off ---
+
+    def enable(self):
+        self.enabled = True
+        self.scan_all()
+
+    def set_word_trie(self, word_trie):
+        # Swaps in a new dictionary (e.g. once it has finished loading).
+        self.word_trie = word_trie
+        self._known.clear()
+        if self.enabled:
+            self.scan_all()
+
+    def disable(self):
+        self.enabled = False
+        for after_id in (self._scan_after, self._recheck_after):
+            if after_id is not None:
+                self.text.after_cancel(after_id)
+        self._scan_after = self._recheck_after = None
+        self._dirty_lines.clear()
+        self.text.tag_remove(MISSPELLED_TAG, "1.0", "end")
+
+    # --- Scanning ---
+
+    def scan_all(self):
+        if self._scan_after is not None:
+            self.text.after_cancel(self._scan_after)
+        self._scan_after = self.text.after_idle(self._scan_chunk, 1)
+
+    def _scan_chunk(self, first_line: int):
+        self._scan_after = None
+        if not self.enabled:
+            return
+        last_line = int(self.text.index("end-1c").split(".")[0])
+        end_line = min(first_line + self.chunk_lines, last_line + 1)
+        self.check_lines(first_line, end_line - 1)
+        if end_line <= last_line:
+            self._scan_after = self.text.after(1, self._scan_chunk, end_line)
+
+    def check_lines(self, first_line: int, last_line: int):
+        start, end = f"{first_line}.0", f"{last_line}.end"
+        self.text.tag_remove(MISSPELLED_TAG, start, end)
+        content = self.text.get(start, end)
+        ranges = []
+        # "+Nc" counts Tk index units, which differ from offsets after an emoji.
+        wide = self._surrogates and not content.isascii()
+        last = units = 0
+        for word_start, word_end, token in find_misspellings(self.word_trie, content, self._known):
+            if token.lower() not in self.ignored:
+                if wide:
+                    units += tk_length(content[last:word_start])
+                    last = word_start
+                    word_start, word_end = units, units + word_end - word_start
+                ranges.append(f"{start}+{word_start}c")
+                ranges.append(f"{start}+{word_end}c")
+        if ranges:
+            # One tag_add call for the whole slice instead of one per word.
+            self.text.tag_add(MISSPELLED_TAG, *ranges)
+
+    # --- Incremental rechecking ---
+
+    def mark_dirty(self, first_line: int, last_line: int = None):
+        if not self.enabled:
+            return
+        if last_line is not None and last_line - first_line >= self.chunk_lines:
+            self.scan_all()
+            return
+        self._dirty_lines.update(range(first_line, (last_line or first_line) + 1))
+        if self._recheck_after is not None:
+            self.text.after_cancel(self._recheck_after)
+        self._recheck_after = self.text.after(self.recheck_delay_ms, self._recheck_dirty)
+
+    def _recheck_dirty(self):
+        self._recheck_after = None
+        last_line = int(self.text.index("end-1c").split(".")[0])
+        for line in sorted(self._dirty_lines):
+            if line <= last_line:
+                self.check_lines(line, line)
+        self._dirty_lines.clear()
+
+    # --- Suggestions ---
+
+    def suggestions_for(self, word: str, max_suggestions: int = 5):
+        return trie.spelling_suggestions(self.word_trie, word, 2 if len(word) > 4 else 1, max_suggestions)
+
+    def _show_suggestions(self, event):
+        index = self.text.index(f"@{event.x},{event.y}")
+        start = self.text.index(f"{index} wordstart")
+        end = self.text.index(f"{index} wordend")
+        word = self.text.get(start, end)
+
+        self._menu.delete(0, "end")
+        suggestions = self.suggestions_for(word)
+        for suggestion in suggestions:
+            if word[:1].isupper():
+                suggestion = suggestion.capitalize()
+            self._menu.add_command(label=suggestion,
+                                   command=lambda s=suggestion: self._replace(start, end, s))
+        if not suggestions:
+            self._menu.add_command(label="(no suggestions)", state="disabled")
+        self._menu.add_separator()
+        self._menu.add_command(label="Ignore Word", command=lambda: self._ignore(word))
+        self._menu.tk_popup(event.x_root, event.y_root)
+        return "break"
+
+    def _replace(self, start: str, end: str, replacement: str):
+        self.text.edit_separator()
+        self.text.delete(start, end)
+        self.text.insert(start, replacement)
+        self.text.edit_separator()
+
+    def _ignore(self, word: str):
+        self.ignored.add(word.lower())
+        self.scan_all()
@@ -0,0 +1,114 @@
+# ==============================================================================
+# I. IMPORTS AND CONSTANTS
+# ==============================================================================
+
+import queue
+import threading
+
+_DROPPED = object()
+
+
+# ==============================================================================
+# II. DEBOUNCED BACKGROUND SUGGESTION WORKER
+#
+# Keystrokes call request() on the Tk thread. The request only becomes a job
+# after `delay_ms` without another keystroke, jobs run on one background
+# thread, and results are handed back to the Tk thread by polling a queue from
+# master.after (Tk itself must never be touched from the worker).
+#
+# Every request bumps a generation counter. A job or result whose generation is
+# no longer current is dropped, so a fast typist only ever pays for the last
+# prefix and never sees suggestions for an older one. A task that raises is
+# delivered as None, so the caller can clear what it showed for older input.
+#
+# update() queues a task that changes what the lookups read (word scores). It
+# runs on the same thread, between lookups, so the data is never changed
+# while a lookup is reading it, and it is never debounced or dropped.
+# ==============================================================================
+
+class SuggestionWorker:
+    def __init__(self, master, deliver, delay_ms: int = 40, poll_ms: int = 10):
+        self.master = master
+        self.deliver = deliver
+        self.delay_ms = delay_ms
+        self.poll_ms = poll_ms
+
+        self._generation = 0
+        self._pending_after = None
+        self._polling = False
+        self._outstanding = 0
+        self._jobs = queue.Queue()
+        self._results = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="suggestion-worker", daemon=True)
+        self._thread.start()
+
+    # --- Tk thread ---
+
+    def request(self, task):
+        self._generation += 1
+        generation = self._generation
+        if self._pending_after is not None:
+            self.master.after_cancel(self._pending_after)
+        self._pending_after = self.master.after(self.delay_ms, lambda: self._submit(generation, task))
+
+    def cancel(self):
+        self._generation += 1
+        if self._pending_after is not None:
+            self.master.after_cancel(self._pending_after)
+            self._pending_after = None
+
+    def update(self, task):
+        self._jobs.put((None, task))
+
+    def stop(self):
+        self.cancel()
+        self._jobs.put(None)
+
+    def _submit(self, generation: int, task):
+        self._pending_after = None
+        self._outstanding += 1
+        self._jobs.put((generation, task))
+        if not self._polling:
+            self._polling = True
+            self.master.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        latest = _DROPPED
+        while True:
+            try:
+                generation, result = self._results.get_nowait()
+            except queue.Empty:
+                break
+            self._outstanding -= 1
+            if generation == self._generation:
+                latest = result
+
+        if latest is not _DROPPED:
+            self.deliver(latest)
+        if self._outstanding > 0:
+            self.master.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    # --- Worker thread ---
+
+    def _run(self):
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            generation, task = job
+            if generation is None:
+                try:
+                    task()
+                except Exception:
+                    pass
+                continue
+            if generation != self._generation:
+                self._results.put((generation, _DROPPED))
+                continue
+            try:
+                result = task()
+            except Exception:
+                result = None
+            self._results.put((generation, result))
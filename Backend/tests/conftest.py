@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import trie  # noqa: E402
+from compact_trie import CompactTrie  # noqa: E402
+
+WORDS = ["cat", "car", "cart", "care", "dog", "door", "apple", "apply"]
+
+
+@pytest.fixture(params=["dict", "compact"])
+def word_trie(request):
+    # The same small dictionary in both engines.
+    if request.param == "dict":
+        return trie.train_trie(trie.create_trie(), WORDS)
+    return CompactTrie.from_words(WORDS)
+
+
+@pytest.fixture
+def dict_word_trie():
+    return trie.train_trie(trie.create_trie(), WORDS)
+
+
+class FakeMaster:
+    # Stands in for the Tk root: `after` callbacks run only when the test
+    # says so, either once (run_timers) or until none are left (settle).
+    def __init__(self):
+        self.timers = {}
+        self.next_id = 0
+
+    def after(self, ms, callback):
+        self.next_id += 1
+        self.timers[self.next_id] = callback
+        return self.next_id
+
+    def after_cancel(self, timer):
+        self.timers.pop(timer, None)
+
+    def run_timers(self):
+        timers, self.timers = self.timers, {}
+        for callback in timers.values():
+            callback()
+
+    def settle(self, timeout: float = 2.0):
+        # For callbacks that wait on a background thread.
+        deadline = time.monotonic() + timeout
+        self.run_timers()
+        while self.timers and time.monotonic() < deadline:
+            time.sleep(0.005)
+            self.run_timers()
+
+
+@pytest.fixture
+def master():
+    return FakeMaster()
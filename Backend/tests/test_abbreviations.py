@@ -0,0 +1,54 @@
+import trie
+
+ABBREVIATIONS = {"brb": "be right back", "omg": "oh my god"}
+
+
+def apply_edits(text, edits):
+    rebuilt, last = [], 0
+    for start, end, replacement in edits:
+        rebuilt += (text[last:start], replacement)
+        last = end
+    return "".join(rebuilt) + text[last:]
+
+
+def test_streaming_expansion_matches_whole_text():
+    abbreviations = trie.train_abbreviation_trie(trie.create_trie(), ABBREVIATIONS)
+    sentence = "OMG, brb!\tok  (brb) brbx"
+    expected = "oh my god, be right back!\tok  (be right back) brbx"
+    assert trie.expand_abbreviations_in_sentence(abbreviations, sentence) == expected
+    for split in range(len(sentence) + 1):
+        edits = list(trie.iter_abbreviation_edits(abbreviations, (sentence[:split], sentence[split:])))
+        assert apply_edits(sentence, edits) == expected
+
+
+def test_whitespace_is_preserved_and_long_tokens_are_skipped():
+    abbreviations = trie.train_abbreviation_trie(trie.create_trie(), ABBREVIATIONS)
+    long_token = "b" * (trie.MAX_ABBREVIATION_TOKEN + 10)
+    text = "  brb\r\n\n\t" + long_token + " omg  brb  "
+    chunks = [text[i:i + 5] for i in range(0, len(text), 5)]
+    edits = list(trie.iter_abbreviation_edits(abbreviations, chunks))
+    assert len(edits) == 3
+    assert apply_edits(text, edits) == "  be right back\r\n\n\t" + long_token + " oh my god  be right back  "
+
+
+def test_live_token_expansion():
+    abbreviations = trie.train_abbreviation_trie(trie.create_trie(), {"brb": "be right back"})
+    emoji = trie.train_emoji_trie(trie.create_trie(), {"happy": "😊", "brb": "🏃"})
+    assert trie.live_token_expansion(abbreviations, emoji, "(brb),") == (1, 4, "be right back")
+    assert trie.live_token_expansion(abbreviations, emoji, "Happy!") == (0, 5, "😊")
+    assert trie.live_token_expansion(abbreviations, None, "happy") is None
+    assert trie.live_token_expansion(abbreviations, emoji, "hello") is None
+    assert trie.live_token_expansion(abbreviations, emoji, "...") is None
+    assert trie.live_token_expansion(abbreviations, emoji, "b" * (trie.MAX_ABBREVIATION_TOKEN + 1)) is None
+
+
+def test_output_does_not_depend_on_chunk_boundaries():
+    abbreviations = trie.train_abbreviation_trie(trie.create_trie(), ABBREVIATIONS)
+    lookup = lambda core: trie.search_and_expand(abbreviations, core)
+    limit = trie.MAX_ABBREVIATION_TOKEN
+    text = "(" * 300 + "brb) ok " + "(" * (limit - 4) + "brb) omg"
+    whole = "".join(trie.iter_replaced_chunks(lookup, [text]))
+    assert whole == "(" * 300 + "brb) ok " + "(" * (limit - 4) + "be right back) oh my god"
+    for split in range(0, len(text) + 1, 7):
+        assert "".join(trie.iter_replaced_chunks(lookup, [text[:split], text[split:]])) == whole
+    assert trie.live_token_expansion(abbreviations, None, "(" * 300 + "brb)") is None
@@ -0,0 +1,101 @@
+import pytest
+
+from compact_trie import WORD, CompactTrie, Payload, compile_dict_trie
+
+WORDS = ["the", "then", "there", "thing", "Think", "apple", "app"]
+
+
+def build_dict_trie(items):
+    root = {}
+    for word, payload in items:
+        node = root
+        for character in word.lower():
+            node = node.setdefault(character, {})
+        node["*"] = payload
+    return root
+
+
+def test_lookup_operations():
+    compact = CompactTrie.from_words(WORDS)
+    assert compact.search("then")
+    assert not compact.search("th")
+    assert compact.starts_with("th")
+    assert not compact.starts_with("tx")
+    assert compact.autocomplete("TH") == ["the", "then", "there", "thing", "think"]
+    assert compact.autocomplete("th", 2) == ["the", "then"]
+    assert compact.autocomplete("zz") == []
+
+
+def test_payload_operations():
+    compact = CompactTrie.from_items([("happy", "😊"), ("lol", "laughing out loud"), ("hello", True)])
+    assert compact.search_emoji("Happy") == "😊"
+    assert compact.search_emoji("hello") == ""
+    assert compact.autocomplete_emoji("h") == [("happy", "😊"), ("hello", True)]
+    assert compact.search_and_expand("lol!") == "lol!"
+
+    abbreviations = CompactTrie.from_abbreviations({"lol": "laughing out loud"})
+    assert abbreviations.search_and_expand("lol!") == "laughing out loud"
+    assert abbreviations.search_and_expand("hello,") == "hello,"
+    assert abbreviations.search_emoji("lol") == ""
+
+
+def test_frozen_payloads_keep_scores_and_reject_what_cannot_round_trip():
+    items = [("happy", Payload(emoji="😊", score=7)), ("hello", Payload(is_word=True, score=3)), ("hi", WORD)]
+    for compact in (CompactTrie.from_items(items), CompactTrie.from_dict_trie(build_dict_trie(items))):
+        assert [compact.payload(word) for word, _ in items] == [payload for _, payload in items]
+        assert compact.autocomplete("h") == ["happy", "hello", "hi"]
+    assert CompactTrie.from_items([("brb", Payload(expansion="be right back"))]).search_and_expand("brb") == \
+        "be right back"
+    with pytest.raises(ValueError):
+        CompactTrie.from_items([("x", Payload(emoji="😊", expansion="ex"))])
+    with pytest.raises(ValueError):
+        CompactTrie.from_dict_trie(build_dict_trie([("a", Payload(emoji="😊")), ("b", Payload(expansion="bee"))]))
+
+
+def test_sorted_build_matches_dict_compilation():
+    items = [(w, True) for w in WORDS] + [("brb", "be right back")]
+    from_items = CompactTrie.from_items(items)
+    from_dict = CompactTrie.from_dict_trie(build_dict_trie(items))
+    assert list(from_items.labels) == list(from_dict.labels)
+    assert list(from_items.first_child) == list(from_dict.first_child)
+    assert list(from_items.payloads) == list(from_dict.payloads)
+    assert compile_dict_trie({})[1].tolist() == [1, 1]
+
+
+def test_ranked_autocomplete_uses_scores():
+    compact = CompactTrie.from_words(WORDS, {"there": 50, "think": 40, "then": 5})
+    assert compact.autocomplete("th", 3) == ["there", "think", "then"]
+    assert compact.autocomplete("th") == ["there", "think", "then", "the", "thing"]
+
+
+def test_scores_can_be_updated_at_runtime():
+    compact = CompactTrie.from_words(WORDS)
+    assert compact.autocomplete("th", 2) == ["the", "then"]
+    compact.set_score("thing", 7)
+    assert compact.autocomplete("th", 2) == ["thing", "the"]
+    assert compact.get_score("thing") == 7
+    compact.set_score("thing", 0)
+    assert compact.autocomplete("th", 2) == ["the", "then"]
+    with pytest.raises(KeyError):
+        compact.set_score("thi", 3)
+
+
+def test_completion_session_node_protocol():
+    compact = CompactTrie.from_words(WORDS)
+    node = compact.root_node()
+    for character in "th":
+        node = compact.child_node(node, character)
+    assert compact.words_from_node(node, "th", 2) == ["the", "then"]
+    assert compact.child_node(node, "x") is None
+
+
+def test_typed_payloads():
+    words = CompactTrie.from_words(WORDS, {"then": 4})
+    assert words.payload("the") is WORD
+    assert words.payload("then") == Payload(is_word=True, score=4)
+    assert words.payload("th") is None
+
+    abbreviations = CompactTrie.from_abbreviations({"BRB": "be right back"})
+    assert abbreviations.payload("brb") == Payload(expansion="be right back")
+    assert abbreviations.search_and_expand("brb,") == "be right back"
+    assert not CompactTrie.from_items([("happy", "😊")]).payload("happy").expansion
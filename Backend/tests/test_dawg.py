@@ -0,0 +1,53 @@
+import pytest
+
+import trie_artifact
+from compact_trie import STRING_EXPANSION, CompactTrie, Payload
+from dawg import Dawg, DawgBuilder
+
+WORDS = ["tap", "taps", "tapping", "top", "tops", "topping", "walk", "walking", "talk", "talking"]
+
+
+def test_matches_compact_trie():
+    dawg = Dawg.from_words(WORDS)
+    compact = CompactTrie.from_words(WORDS)
+    for prefix in ["t", "ta", "top", "w", "x", ""]:
+        assert dawg.autocomplete(prefix, 20) == compact.autocomplete(prefix, 20)
+    assert dawg.search("topping")
+    assert not dawg.search("topp")
+
+
+def test_shares_suffixes():
+    dawg = Dawg.from_words(WORDS)
+    compact = CompactTrie.from_words(WORDS)
+    assert len(dawg) < len(compact) // 2
+
+
+def test_payloads_are_kept_distinct():
+    dawg = Dawg.from_items([("happy", "😊"), ("sappy", "😢"), ("hi", True)])
+    assert dawg.search_emoji("happy") == "😊"
+    assert dawg.search_emoji("sappy") == "😢"
+    assert dawg.search_and_expand("happy.") == "happy."
+    assert dawg.search_emoji("hi") == ""
+
+
+def test_builder_requires_sorted_input():
+    builder = DawgBuilder()
+    builder.insert("b")
+    with pytest.raises(ValueError):
+        builder.insert("a")
+
+
+def test_typed_payloads_and_expansions_survive_mapping(tmp_path):
+    assert hash(Payload(expansion="be right back")) == hash(Payload(expansion="be right back"))
+    dawg = Dawg.from_items([("brb", Payload(expansion="be right back")), ("gtg", Payload(expansion="got to go"))])
+    assert dawg.string_kind == STRING_EXPANSION
+    assert dawg.search_and_expand("brb") == "be right back" and dawg.search_emoji("brb") == ""
+    with pytest.raises(ValueError):
+        Dawg.from_items([("brb", Payload(expansion="be right back")), ("smile", Payload(emoji="😄"))])
+
+    abbreviations = Dawg.from_abbreviations({"brb": "be right back", "afaik": "as far as i know"})
+    path = str(tmp_path / "tries.bin")
+    trie_artifact.write_artifact(path, b"\0" * 32, {"abbreviations": abbreviations})
+    mapped = trie_artifact.TrieArtifact(path)["abbreviations"]
+    assert isinstance(mapped, Dawg) and mapped.string_kind == STRING_EXPANSION
+    assert mapped.payload("afaik") == Payload(expansion="as far as i know")
@@ -0,0 +1,24 @@
+from doc_stats import analyze_chunks
+
+TEXT = "Hello, world! This is 3.14 text.\n  Second line?  naïve 😀 ok...\n\nEnd"
+
+
+def test_counts_match_reference():
+    stats = analyze_chunks([TEXT])
+    assert stats.characters == len(TEXT)
+    assert stats.words == len(TEXT.split())
+    assert stats.lines == TEXT.count("\n") + 1
+    assert stats.sentences == 4
+    assert stats.punctuation["."] == 5
+    assert stats.punctuation[","] == 1
+    assert stats.classes["digits"] == 3
+    assert stats.classes["other"] == 1
+    assert sum(stats.classes.values()) == len(TEXT)
+
+
+def test_result_does_not_depend_on_chunking():
+    whole = analyze_chunks([TEXT])
+    for size in (1, 2, 5, 17):
+        parts = analyze_chunks(TEXT[i:i + size] for i in range(0, len(TEXT), size))
+        assert (parts.words, parts.sentences, parts.lines, parts.classes, parts.punctuation) == \
+            (whole.words, whole.sentences, whole.lines, whole.classes, whole.punctuation)
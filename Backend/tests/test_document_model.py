@@ -0,0 +1,122 @@
+import random
+
+import document_model
+from document_model import PieceTable
+
+
+def test_edits_match_plain_string(monkeypatch):
+    monkeypatch.setattr(document_model, "MAX_LOADED_PIECE", 5)
+    rng = random.Random(7)
+    expected = "first line\nsecond\n\nfourth line here"
+    table = PieceTable(expected)
+    for _ in range(500):
+        if rng.random() < 0.6 or not expected:
+            offset = rng.randint(0, len(expected))
+            inserted = rng.choice(["a", "bc\n", "\n", "some longer text\nwith a break"])
+            table.insert(offset, inserted)
+            expected = expected[:offset] + inserted + expected[offset:]
+        else:
+            offset = rng.randint(0, len(expected) - 1)
+            length = rng.randint(1, 4)
+            table.delete(offset, length)
+            expected = expected[:offset] + expected[offset + length:]
+    assert table.get_text() == expected
+    assert table.get_text(3, 40) == expected[3:40]
+    assert table.line_count() == expected.count("\n") + 1
+
+
+def test_line_and_offset_conversion():
+    table = PieceTable("ab\ncde\n\nf")
+    assert table.position_of(0) == (1, 0)
+    assert table.position_of(4) == (2, 1)
+    assert table.position_of(7) == (3, 0)
+    assert table.index_of(8) == "4.0"
+    assert table.offset_of(2, 1) == 4
+    assert table.offset_of(9, 0) == len(table)
+
+
+def test_snapshots_are_unaffected_by_later_edits():
+    table = PieceTable("hello world")
+    snapshot = table.snapshot()
+    table.insert(5, ",")
+    table.delete(0, 1)
+    assert snapshot.get_text() == "hello world"
+    assert table.get_text() == "ello, world"
+
+
+class FakeTk8:
+    # Just enough of a Tk 8.6 text widget for TextMirror: the text is held as
+    # UTF-16 code units, so an emoji is two index columns, as in real Tk.
+    def __init__(self):
+        self.units = []
+        self.commands = {}
+
+    def createcommand(self, name, function):
+        self.commands[name] = function
+
+    def _offset(self, index):
+        lines = "".join(self.units).split("\n")
+        if index == "end":
+            return len(self.units)
+        line, column = map(int, index.split("."))
+        return sum(len(text) + 1 for text in lines[:line - 1]) + min(column, len(lines[line - 1]))
+
+    def _index(self, offset):
+        before = "".join(self.units[:offset]).split("\n")
+        return f"{len(before)}.{len(before[-1])}"
+
+    def call(self, *args):
+        if len(args) == 1 and isinstance(args[0], tuple):
+            args = args[0]
+        if args[0] == "string":
+            return len(args[2].encode("utf-16-le")) // 2
+        if args[0] == "rename":
+            return ""
+        command, *args = args[1:]
+        if command == "cget":
+            return "normal"
+        if command == "index":
+            return self._index(self._offset(args[0]))
+        if command == "insert":
+            at = self._offset(args[0])
+            encoded = "".join(args[1::2]).encode("utf-16-le")
+            self.units[at:at] = [encoded[i:i + 2].decode("utf-16-le", "surrogatepass")
+                                 for i in range(0, len(encoded), 2)]
+        elif command == "delete":
+            start = self._offset(args[0])
+            end = self._offset(args[1]) if len(args) > 1 else start + 1
+            del self.units[start:end]
+        return ""
+
+    def text(self):
+        return "".join(self.units).encode("utf-16-le", "surrogatepass").decode("utf-16-le")
+
+
+class FakeText:
+    def __init__(self):
+        self.tk = FakeTk8()
+
+    def __str__(self):
+        return ".text"
+
+    def get(self, start, end):
+        return self.tk.text()
+
+    def widget(self, *args):
+        return self.tk.commands[".text"](*args)
+
+
+def test_mirror_counts_emoji_as_two_tk_columns():
+    text, table = FakeText(), PieceTable()
+    mirror = document_model.TextMirror(text, table)
+    assert mirror.surrogates
+    text.widget("insert", "1.0", "ab😀\nline two")
+    text.widget("insert", "1.4", "c")           # typed right after the emoji
+    text.widget("insert", "1.5", "d😀e")
+    assert table.get_text() == text.tk.text() == "ab😀cd😀e\nline two"
+    assert mirror.offset("1.8") == 6 and mirror.index(6) == "1.8"
+    text.widget("delete", "1.2", "1.4")         # the first emoji
+    text.widget("delete", "1.6")                # the "e" after the second one
+    assert table.get_text() == text.tk.text() == "abcd😀\nline two"
+    assert table.index_of(5, surrogates=True) == "1.6" and table.index_of(5) == "1.5"
+    assert document_model.tk_length("a😀b") == 4 and document_model.tk_length("a😀b", False) == 3
@@ -0,0 +1,42 @@
+import codecs
+
+import pytest
+
+from file_loader import DETECT_BYTES, detect_encoding, detect_newline, iter_chunks
+
+
+def test_detect_encoding():
+    assert detect_encoding(codecs.BOM_UTF8 + b"abc") == "utf-8-sig"
+    assert detect_encoding(codecs.BOM_UTF16_LE + b"a\0") == "utf-16"
+    assert detect_encoding("naïve".encode("utf-8")) == "utf-8"
+    # A multi-byte character cut off at the end of the sample is still UTF-8.
+    assert detect_encoding("naïve".encode("utf-8")[:3]) == "utf-8"
+    assert detect_encoding("naïve".encode("cp1252")) == "cp1252"
+
+
+def test_chunks_keep_characters_and_newlines_whole(tmp_path):
+    path = tmp_path / "sample.txt"
+    path.write_bytes("héllo\r\nwörld\r\n".encode("utf-8"))
+    chunks = list(iter_chunks(str(path), 3))
+    assert "".join(chunks) == "héllo\nwörld\n"
+    assert all(len(chunk) <= 3 for chunk in chunks)
+
+
+def test_streamed_bytes_past_the_sample_fail_instead_of_being_replaced(tmp_path):
+    path = tmp_path / "legacy.txt"
+    head = b"plain ascii\n" * (DETECT_BYTES // 12 + 1)
+    path.write_bytes(head + "café\n".encode("cp1252"))
+    assert detect_encoding(head) == "utf-8"
+    with pytest.raises(ValueError):
+        "".join(iter_chunks(str(path)))
+    assert "".join(iter_chunks(str(path), encoding="cp1252")).endswith("café\n")
+
+
+def test_newline_style_is_reported(tmp_path):
+    path = tmp_path / "dos.txt"
+    path.write_bytes(b"one\r\ntwo\r\n")
+    assert detect_newline(str(path)) == "\r\n"
+    path.write_bytes(b"one\ntwo")
+    assert detect_newline(str(path)) == "\n"
+    path.write_bytes(b"no newline")
+    assert detect_newline(str(path)) == "\n"
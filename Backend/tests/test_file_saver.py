@@ -0,0 +1,80 @@
+import os
+
+import document_model
+import file_saver
+from document_model import PieceTable
+from file_saver import write_document
+
+
+def test_save_is_exact_and_reuses_clean_prefix(tmp_path, monkeypatch):
+    monkeypatch.setattr(document_model, "MAX_LOADED_PIECE", 16)
+    monkeypatch.setattr(file_saver, "CHECKPOINT_CHARS", 10)
+    path = str(tmp_path / "notes.txt")
+    document = PieceTable("".join(f"línea {i}\n" for i in range(50)))
+
+    first = write_document(path, document.snapshot())
+    assert first.bytes_reused == 0
+    with open(path, encoding="utf-8", newline="") as f:
+        assert f.read() == document.get_text()
+
+    document.insert(300, "edited")
+    second = write_document(path, document.snapshot(), previous=first.saved, clean_chars=300)
+    assert 0 < second.bytes_reused <= len(document.get_text(0, 300).encode("utf-8"))
+    with open(path, encoding="utf-8", newline="") as f:
+        assert f.read() == document.get_text()
+    assert os.listdir(tmp_path) == ["notes.txt"]
+
+
+def test_failed_save_leaves_original(tmp_path):
+    path = str(tmp_path / "notes.txt")
+    write_document(path, PieceTable("original").snapshot())
+    try:
+        write_document(path, PieceTable("smile 😀").snapshot(), "cp1252")
+    except UnicodeEncodeError:
+        pass
+    with open(path, encoding="utf-8") as f:
+        assert f.read() == "original"
+    assert os.listdir(tmp_path) == ["notes.txt"]
+
+
+def test_crlf_files_are_saved_with_crlf(tmp_path, monkeypatch):
+    monkeypatch.setattr(document_model, "MAX_LOADED_PIECE", 16)
+    monkeypatch.setattr(file_saver, "CHECKPOINT_CHARS", 8)
+    path = str(tmp_path / "dos.txt")
+    document = PieceTable("".join(f"line {i}\n" for i in range(20)))
+    first = write_document(path, document.snapshot(), newline="\r\n")
+    with open(path, "rb") as f:
+        assert f.read() == document.get_text().replace("\n", "\r\n").encode("utf-8")
+
+    document.insert(100, "more\n")
+    second = write_document(path, document.snapshot(), previous=first.saved, clean_chars=100, newline="\r\n")
+    assert second.bytes_reused > 0
+    with open(path, "rb") as f:
+        assert f.read() == document.get_text().replace("\n", "\r\n").encode("utf-8")
+    # A different newline style cannot reuse the old bytes.
+    assert not second.saved.reusable_for(path, "utf-8", "\n")
+
+
+def test_wait_reports_every_queued_save(tmp_path, master):
+    reported = []
+    saver = file_saver.BackgroundSaver(master, reported.append)
+    good, bad = str(tmp_path / "good.txt"), str(tmp_path / "missing" / "bad.txt")
+    saver.save(good, PieceTable("kept").snapshot(), "utf-8")
+    saver.save(bad, PieceTable("lost").snapshot(), "utf-8")
+    results = saver.wait()
+    saver.stop()
+    assert [result.path for result in results] == [good, bad] and reported == results
+    assert results[0].error is None and isinstance(results[1].error, OSError)
+    assert saver.pending == 0 and saver.wait() == []
+
+
+def test_failed_atomic_write_leaves_the_target_alone(tmp_path):
+    path = tmp_path / "kept.txt"
+    path.write_bytes(b"original")
+    try:
+        with file_saver.atomic_write(str(path)) as f:
+            f.write(b"partial")
+            raise RuntimeError("disk full")
+    except RuntimeError:
+        pass
+    assert path.read_bytes() == b"original" and os.listdir(tmp_path) == ["kept.txt"]
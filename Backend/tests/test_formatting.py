@@ -0,0 +1,67 @@
+import random
+
+from formatting import StyleRuns
+
+
+def runs_of(flags):
+    runs, start = [], None
+    for i, flag in enumerate(flags + [False]):
+        if flag and start is None:
+            start = i
+        elif not flag and start is not None:
+            runs.append((start, i))
+            start = None
+    return runs
+
+
+def test_style_runs_match_a_per_character_model():
+    rng = random.Random(19)
+    for _ in range(200):
+        flags = [False] * 40
+        runs = StyleRuns()
+        for _ in range(30):
+            start = rng.randrange(len(flags) + 1)
+            end = min(len(flags), start + rng.randrange(8))
+            action = rng.choice(("add", "remove", "insert", "delete"))
+            if action == "add":
+                runs.add(start, end)
+                flags[start:end] = [True] * (end - start)
+            elif action == "remove":
+                runs.remove(start, end)
+                flags[start:end] = [False] * (end - start)
+            elif action == "insert":
+                joins = 0 < start < len(flags) and flags[start - 1] and flags[start]
+                runs.insert(start, 3)
+                flags[start:start] = [joins] * 3
+            else:
+                runs.delete(start, end - start)
+                del flags[start:end]
+            assert list(runs) == runs_of(flags)
+        offset = rng.randrange(len(flags) + 1)
+        assert runs.covers(offset) == (offset < len(flags) and flags[offset])
+        assert runs.overlapping(10, 20) == [run for run in runs_of(flags) if run[1] > 10 and run[0] < 20]
+
+
+def test_construction_from_sorted_and_unsorted_runs():
+    assert list(StyleRuns([(0, 2), (5, 9), (12, 13)])) == [(0, 2), (5, 9), (12, 13)]
+    assert list(StyleRuns([(5, 9), (0, 2), (9, 10), (1, 3), (20, 20)])) == [(0, 3), (5, 10)]
+    assert len(StyleRuns()) == 0 and not StyleRuns().covers(0)
+
+
+def nodes(node, found):
+    if node is not None:
+        found.add(id(node))
+        nodes(node.left, found)
+        nodes(node.right, found)
+    return found
+
+
+def test_an_edit_only_rebuilds_one_path():
+    runs = StyleRuns((i * 10, i * 10 + 5) for i in range(20000))
+    before = nodes(runs._root, set())
+    kept = runs._root      # keeps the old nodes (and their ids) alive
+    runs.insert(3, 2)
+    runs.delete(100, 1)
+    assert len(nodes(runs._root, set()) - before) < 200
+    assert runs.overlapping(199985, 200010) == [(199981, 199986), (199991, 199996)]
+    assert kept is not runs._root
@@ -0,0 +1,22 @@
+import trie
+
+
+def test_fuzzy_autocomplete_and_spelling(word_trie):
+    assert "cart" in trie.fuzzy_autocomplete(word_trie, "cqr", 1)
+    assert trie.fuzzy_autocomplete(word_trie, "", 1) == []
+    assert trie.spelling_suggestions(word_trie, "dorr")[:1] == ["door"]
+    assert "dog" not in trie.spelling_suggestions(word_trie, "dog")
+
+
+def test_edit_kinds_and_distance_limit(word_trie):
+    distances = {path: distance for distance, path, _ in trie.fuzzy_matches(word_trie, "aplpe", 2)}
+    assert distances["apple"] == 1                  # adjacent swap
+    assert trie.spelling_suggestions(word_trie, "dgo")[:1] == ["dog"]
+    assert trie.spelling_suggestions(word_trie, "cartt")[:1] == ["cart"]
+    assert trie.spelling_suggestions(word_trie, "zzzzz") == []
+    # From two edits up the first letter is trusted.
+    assert "cart" not in trie.spelling_suggestions(word_trie, "xart", 2)
+
+
+def test_default_typo_distance_grows_with_the_prefix():
+    assert [trie.default_typo_distance("x" * n) for n in (2, 3, 5, 6, 9)] == [0, 1, 1, 2, 2]
@@ -0,0 +1,84 @@
+import os
+
+import journal
+from document_model import PieceTable
+from journal import EditJournal, recover
+
+
+def edit(document, edits, kind, offset, value):
+    if kind == "insert":
+        document.insert(offset, value)
+    else:
+        document.delete(offset, value)
+    edits.record(kind, offset, value)
+
+
+def crash(edits):
+    # Drains the writer without the clean-shutdown discard.
+    edits._writer.jobs.put(None)
+    edits._writer.thread.join()
+
+
+def test_recovers_snapshot_plus_journal_and_stops_at_torn_record(tmp_path, master):
+    directory = str(tmp_path)
+    document = PieceTable()
+    edits = EditJournal(master, document, directory)
+    edits.mark_clean("notes.txt", "cp1252")
+    edit(document, edits, "insert", 0, "hello world")
+    edit(document, edits, "insert", 5, ",")
+    edit(document, edits, "delete", 6, 6)
+    edit(document, edits, "insert", 6, " there ✓")
+    master.run_timers()
+    crash(edits)
+    assert recover(directory) == (document.get_text(), "notes.txt", "cp1252")
+
+    with open(os.path.join(directory, journal.JOURNAL_NAME), "r+b") as f:
+        f.truncate(os.path.getsize(f.name) - 2)
+    assert recover(directory)[0] == "hello,"
+
+
+def test_compaction_and_clean_shutdown(tmp_path, master):
+    directory = str(tmp_path)
+    document = PieceTable()
+    edits = EditJournal(master, document, directory, compact_bytes=200)
+    for i in range(40):
+        edit(document, edits, "insert", len(document), f"line {i}\n")
+        master.run_timers()
+    edits.flush()
+    crash(edits)
+    assert os.path.getsize(os.path.join(directory, journal.JOURNAL_NAME)) < 400
+    assert recover(directory)[0] == document.get_text()
+
+    edits = EditJournal(master, document, directory)
+    edits.stop()
+    assert recover(directory) is None
+
+
+def test_each_instance_has_its_own_session(tmp_path, master):
+    root = str(tmp_path)
+    first_document, second_document = PieceTable(), PieceTable()
+    first = EditJournal(master, first_document, root=root)
+    second = EditJournal(master, second_document, root=root)
+    assert first.directory != second.directory and os.path.isabs(journal.DEFAULT_JOURNAL_DIR)
+    edit(first_document, first, "insert", 0, "first instance")
+    edit(second_document, second, "insert", 0, "second instance")
+    master.run_timers()
+    crash(first)
+    crash(second)
+
+    # Both editors still run, so neither journal can be claimed.
+    assert list(journal.claim_orphans(root)) == []
+
+    first._lock.release()          # the first editor's process exits
+    orphans = list(journal.claim_orphans(root))
+    assert [directory for directory, _ in orphans] == [first.directory]
+    assert recover(first.directory)[0] == "first instance"
+    journal.remove_session(*orphans[0])
+    assert not os.path.exists(first.directory)
+    assert recover(second.directory)[0] == "second instance"
+
+    third = EditJournal(master, PieceTable(), root=root)
+    third.stop()
+    assert not os.path.exists(third.directory)
+    assert os.listdir(root) == [os.path.basename(second.directory)]
+    assert not any(name.endswith(".tmp") for name in os.listdir(second.directory))
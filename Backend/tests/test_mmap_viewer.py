@@ -0,0 +1,22 @@
+import codecs
+
+import mmap_viewer
+from mmap_viewer import MappedFile
+
+
+def test_line_index_reads_and_search(tmp_path, monkeypatch):
+    monkeypatch.setattr(mmap_viewer, "INDEX_BLOCK", 64)
+    path = tmp_path / "log.txt"
+    lines = [f"entry {i} naïve\n" for i in range(500)]
+    path.write_bytes(codecs.BOM_UTF8 + "".join(lines).encode("utf-8") + b"last")
+
+    mapped = MappedFile(str(path))
+    mapped._thread.join()
+    try:
+        assert mapped.line_count() == 501
+        assert mapped.read_lines(0, 2) == lines[0] + lines[1]
+        assert mapped.read_lines(499, 501) == lines[499] + "last"
+        assert mapped.line_of(mapped.find("entry 321 ")) == 321
+        assert "".join(mapped.iter_chunks(100)) == "".join(lines) + "last"
+    finally:
+        mapped.close()
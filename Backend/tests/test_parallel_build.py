@@ -0,0 +1,65 @@
+import io
+import random
+import sys
+
+import parallel_build
+import trie_artifact
+from compact_trie import CompactTrie
+
+
+def test_parallel_build_matches_single_process_build(tmp_path, monkeypatch):
+    monkeypatch.setattr(parallel_build, "FLUSH_LINES", 50)
+    rng = random.Random(24)
+    words = ["".join(rng.choice("abcdeé") for _ in range(rng.randint(1, 7))) for _ in range(2000)]
+    words += ["new york", "Apple", "apple"]
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"words{i}.txt"
+        path.write_text("\n".join(words[i::3]) + "\n\n", encoding="utf-8")
+        paths.append(str(path))
+
+    built, stats = parallel_build.parallel_build(paths, jobs=3)
+    expected = CompactTrie.from_words(words)
+    assert stats["terms_read"] == len(words) and stats["unique_terms"] == len({w.lower() for w in words})
+    assert (built.labels, built.first_child, built.payloads) == \
+        (expected.labels, expected.first_child, expected.payloads)
+    assert built.scores is None
+    assert built.search("new york") and not built.search("new")
+
+
+def test_counts_become_scores(tmp_path):
+    path = tmp_path / "counts.txt"
+    path.write_text("cat\t5\ncar\t9\ncart\n", encoding="utf-8")
+    built, _ = parallel_build.parallel_build([str(path)], jobs=2)
+    expected = CompactTrie.from_words(["cat", "car", "cart"], {"cat": 5, "car": 9})
+    assert built.scores == expected.scores and built.best == expected.best
+
+
+def test_only_one_shard_needs_counts(tmp_path):
+    path = tmp_path / "counts.txt"
+    path.write_text("apple\nant\navocado\nzebra\t4\nzoo\n", encoding="utf-8")
+    built, stats = parallel_build.parallel_build([str(path)], jobs=2)
+    assert stats["shards"] == 2
+    expected = CompactTrie.from_words(["apple", "ant", "avocado", "zebra", "zoo"], {"zebra": 4})
+    assert built.scores == expected.scores
+
+
+def test_standard_input_is_read_but_not_closed(tmp_path, monkeypatch):
+    stdin = io.StringIO("one\ntwo\t3\n")
+    monkeypatch.setattr(sys, "stdin", stdin)
+    buckets, _, read = parallel_build.shard_words(["-"], str(tmp_path))
+    assert read == 2 and sorted(buckets) == ["o", "t"]
+    assert not stdin.closed
+
+
+def test_cli_builds_an_artifact_from_standard_input(tmp_path, monkeypatch, capsys):
+    output = str(tmp_path / "stdin.bin")
+    monkeypatch.setattr(sys, "stdin", io.StringIO("apple\nbanana\t3\n"))
+    assert parallel_build.main(["-", "--output", output, "--jobs", "1"]) == 0
+    assert trie_artifact.TrieArtifact(output)["words"].search("banana")
+    _, first = trie_artifact.read_header(output)
+
+    monkeypatch.setattr(sys, "stdin", io.StringIO("apple\ncherry\n"))
+    parallel_build.main(["-", "--output", output, "--jobs", "1"])
+    assert trie_artifact.read_header(output)[1] != first
+    assert "Artifact written" in capsys.readouterr().out
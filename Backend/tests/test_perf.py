@@ -0,0 +1,39 @@
+import json
+
+import perf
+
+
+def test_timed_spans_record_only_when_enabled(tmp_path, monkeypatch):
+    monkeypatch.setattr(perf, "histograms", {})
+
+    @perf.timed("work")
+    def work(value):
+        return value * 2
+
+    monkeypatch.setattr(perf, "enabled", False)
+    assert work(2) == 4
+    assert perf.summaries() == {}
+
+    monkeypatch.setattr(perf, "enabled", True)
+    trace = tmp_path / "trace.jsonl"
+    perf.start_trace(str(trace))
+    for value in range(10):
+        work(value)
+    with perf.span("block"):
+        pass
+    perf.stop_trace()
+
+    summary = perf.summaries()
+    assert summary["work"]["count"] == 10 and summary["block"]["count"] == 1
+    assert summary["work"]["p50_ms"] <= summary["work"]["p99_ms"] <= summary["work"]["max_ms"]
+    lines = [json.loads(line) for line in trace.read_text().splitlines()]
+    assert [line["span"] for line in lines] == ["work"] * 10 + ["block"]
+
+
+def test_histogram_window_rolls():
+    histogram = perf.Histogram(window=4)
+    for duration in (1e6, 2e6, 3e6, 4e6, 100e6):
+        histogram.add(int(duration))
+    assert histogram.count == 5
+    assert histogram.percentile(0.0) == 2.0
+    assert histogram.summary()["max_ms"] == 100.0
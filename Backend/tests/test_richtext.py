@@ -0,0 +1,106 @@
+import json
+import os
+
+import pytest
+
+from document_model import PieceTable
+from richtext import (FORMAT_NAME, FORMAT_VERSION, LazyStyler, decode_runs, encode_runs, read_rich_document,
+                      write_rich_document)
+
+
+def test_runs_are_delta_encoded():
+    runs = [(3, 7), (7, 8), (20, 25)]
+    assert encode_runs(runs) == [3, 4, 0, 1, 12, 5]
+    assert decode_runs(encode_runs(runs)) == runs
+    with pytest.raises(ValueError):
+        decode_runs([1, -2])
+
+
+def test_document_round_trip(tmp_path):
+    path = str(tmp_path / "notes.tdoc")
+    document = PieceTable("Bold, red and plain ✓\n" * 3)
+    styles = {"bold": [(0, 4), (22, 26)], "colorff0000": [(6, 9)], "italic": []}
+    result = write_rich_document(path, document.snapshot(), styles)
+    assert result.error is None and result.bytes_written > 0
+
+    content, loaded = read_rich_document(path, {"bold", "italic"})
+    assert content == document.get_text()
+    assert loaded == {"bold": [(0, 4), (22, 26)], "colorff0000": [(6, 9)]}
+
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"format": "something-else"}')
+    with pytest.raises(ValueError):
+        read_rich_document(path)
+
+
+@pytest.mark.parametrize("data", [
+    {"text": 42},
+    {"text": "abc", "styles": ["bold"]},
+    {"text": "abc", "styles": {"bold": "0,1"}},
+    {"text": "abc", "styles": {"bold": [0, True]}},
+    {"text": "abc", "styles": {"sel": [0, 1]}},
+    {"text": "abc", "styles": {"colorzz0000": [0, 1]}},
+    {"text": "abc", "styles": {"bold": [2, 2]}},
+])
+def test_malformed_documents_raise_value_error(tmp_path, data):
+    path = tmp_path / "bad.tdoc"
+    path.write_text(json.dumps({"format": FORMAT_NAME, "version": FORMAT_VERSION, **data}), encoding="utf-8")
+    with pytest.raises(ValueError):
+        read_rich_document(str(path), {"bold", "italic"})
+
+
+def test_known_and_color_styles_are_accepted(tmp_path):
+    path = str(tmp_path / "ok.tdoc")
+    write_rich_document(path, PieceTable("abcdef").snapshot(), {"italic": [(0, 2)], "color00ff7f": [(3, 6)]})
+    assert read_rich_document(path, {"bold", "italic"})[1] == {"italic": [(0, 2)], "color00ff7f": [(3, 6)]}
+    with pytest.raises(ValueError):
+        read_rich_document(path)
+
+
+def test_save_keeps_the_file_mode(tmp_path):
+    path = tmp_path / "shared.tdoc"
+    path.write_text("", encoding="utf-8")
+    os.chmod(path, 0o640)
+    write_rich_document(str(path), PieceTable("text").snapshot(), {})
+    assert os.stat(path).st_mode & 0o777 == 0o640
+    assert os.listdir(tmp_path) == ["shared.tdoc"]
+
+
+class FakeModel:
+    def __init__(self, length):
+        self.document = "x" * length
+        self.painted = []
+
+    def paint(self, start, end):
+        self.painted.append((start, end))
+
+
+class FakeTimers:
+    def after(self, ms, callback):
+        return "after#1"
+
+    def after_cancel(self, handle):
+        pass
+
+
+def test_edits_before_the_painted_offset_shift_it():
+    # [0, 30) is painted; a bold run at (40, 50) moves to (20, 30) when the
+    # first 20 characters are deleted, so painting must resume at 10, lazily.
+    model = FakeModel(100)
+    styler = LazyStyler(FakeTimers(), model, region_chars=30)
+    styler._step()
+    assert styler.next_offset == 30
+    model.document = model.document[20:]
+    styler.on_edit("delete", 0, 20)
+    assert styler.next_offset == 10 and not styler.finished and len(model.painted) == 1
+    styler.on_edit("delete", 5, 10)         # reaches past the painted part
+    assert styler.next_offset == 5
+    styler.on_edit("insert", 2, "abc")
+    styler.on_edit("insert", 40, "after")   # in the unpainted part: nothing to move
+    assert styler.next_offset == 8
+    model.document = "x" * 73
+    styler._step()
+    styler._step()
+    assert model.painted[1:] == [(8, 38), (38, 68)] and not styler.finished
+    styler._step()
+    assert styler.finished and len(model.painted) == 4
@@ -0,0 +1,17 @@
+import spellcheck
+import trie
+
+
+def test_find_misspellings(word_trie):
+    found = list(spellcheck.find_misspellings(word_trie, "The catt sat by the door, NASA a"))
+    assert [token for _, _, token in found] == ["The", "catt", "sat", "by", "the"]
+
+
+def test_offsets_and_memoized_lookups(word_trie):
+    content = "Dog cta\nCat cta"
+    known = {}
+    found = list(spellcheck.find_misspellings(word_trie, content, known))
+    assert found == [(4, 7, "cta"), (12, 15, "cta")]
+    assert known == {"dog": True, "cta": False, "cat": True}
+    known["cta"] = True             # an ignored word
+    assert list(spellcheck.find_misspellings(word_trie, content, known)) == []
@@ -0,0 +1,55 @@
+import trie
+
+def test_suggestion_cache_hits_and_invalidates(dict_word_trie):
+    cache = trie.SuggestionCache(maxsize=2)
+    word_trie = dict_word_trie
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return trie.autocomplete(word_trie, "ca")
+
+    assert cache.get_or_compute(word_trie, "words", "ca", 10, compute) == cache.get_or_compute(
+        word_trie, "words", "CA", 10, compute)
+    assert len(calls) == 1 and cache.stats()["hits"] == 1
+    cache.invalidate(word_trie)
+    cache.get_or_compute(word_trie, "words", "ca", 10, compute)
+    assert len(calls) == 2
+
+
+def test_least_recently_used_entry_is_evicted(dict_word_trie):
+    cache = trie.SuggestionCache(maxsize=2)
+    word_trie = dict_word_trie
+
+    def lookup(prefix):
+        return cache.get_or_compute(word_trie, "words", prefix, 10, lambda: trie.autocomplete(word_trie, prefix))
+
+    lookup("ca")
+    lookup("do")
+    lookup("ca")        # "do" is now the least recently used
+    lookup("ap")
+    assert cache.stats()["evictions"] == 1
+    lookup("ca")
+    lookup("do")
+    stats = cache.stats()
+    assert (stats["size"], stats["hits"], stats["misses"]) == (2, 2, 4)
+    assert stats["hit_rate"] == 2 / 6
+
+
+def test_inserting_a_word_invalidates_cached_results(dict_word_trie):
+    word_trie = dict_word_trie
+    assert trie.cached_autocomplete(word_trie, "do") == ["dog", "door"]
+    trie.insert(word_trie, "dot")
+    assert trie.cached_autocomplete(word_trie, "do") == trie.autocomplete(word_trie, "do")
+    assert "dot" in trie.cached_autocomplete(word_trie, "do")
+
+
+def test_bulk_builds_invalidate_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(trie.suggestion_cache, "invalidate", calls.append)
+    word_trie = trie.train_trie(trie.create_trie(), ["cat", "dog"])
+    trie.train_emoji_trie(word_trie, {"happy": "😊", "sad": "😢"})
+    trie.train_abbreviation_trie(trie.create_trie(), {"brb": "be right back", "btw": "by the way"})
+    assert len(calls) == 3
+    trie.insert(word_trie, "dot")
+    assert len(calls) == 4 and trie.search(word_trie, "dot") and trie.search_emoji(word_trie, "sad") == "😢"
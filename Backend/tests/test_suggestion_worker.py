@@ -0,0 +1,60 @@
+import threading
+
+from suggestion_worker import SuggestionWorker
+
+
+def make_worker(master):
+    delivered = []
+    return SuggestionWorker(master, delivered.append), delivered
+
+
+def test_requests_are_debounced_to_the_last_one(master):
+    worker, delivered = make_worker(master)
+    ran = []
+    for prefix in ("ca", "car", "cart"):
+        worker.request(lambda prefix=prefix: ran.append(prefix) or [prefix])
+    assert len(master.timers) == 1
+    master.settle()
+    assert ran == ["cart"] and delivered == [["cart"]]
+    worker.stop()
+
+
+def test_results_of_an_older_generation_are_dropped(master):
+    worker, delivered = make_worker(master)
+    worker.request(lambda: ["old"])
+    master.run_timers()                 # submitted to the worker thread
+    worker.request(lambda: ["new"])     # newer keystroke before the result is polled
+    master.settle()
+    assert delivered == [["new"]]
+
+    worker.request(lambda: ["gone"])
+    worker.cancel()
+    master.settle()
+    assert delivered == [["new"]]
+    worker.stop()
+
+
+def test_a_failing_task_delivers_none(master):
+    worker, delivered = make_worker(master)
+    worker.request(lambda: ["ok"])
+    master.settle()
+
+    def fail():
+        raise RuntimeError("lookup failed")
+
+    worker.request(fail)
+    master.settle()
+    assert delivered == [["ok"], None]
+    worker.stop()
+
+
+def test_updates_run_on_the_worker_thread_in_order(master):
+    worker, delivered = make_worker(master)
+    events = []
+    worker.update(lambda: events.append(("update", threading.current_thread().name)))
+    worker.update(lambda: 1 / 0)        # a failed update is dropped
+    worker.request(lambda: events.append(("lookup", threading.current_thread().name)) or ["ok"])
+    master.settle()
+    assert events == [("update", "suggestion-worker"), ("lookup", "suggestion-worker")]
+    assert delivered == [["ok"]]
+    worker.stop()
@@ -0,0 +1,93 @@
+import io
+import os
+import random
+import sys
+
+import textproc_cli
+import trie
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ABBREVIATIONS = os.path.join(BACKEND, "abbreviations.json")
+
+
+def test_streamed_expansion_matches_whole_text_expansion(tmp_path):
+    textproc_cli.load_tries(ABBREVIATIONS)
+    rng = random.Random(25)
+    tokens = ["lol", "(btw,", "brb!", "happy", "word", "x" * 300, "fyi.", "\n", "  "]
+    text = " ".join(rng.choice(tokens) for _ in range(3000))
+    path = tmp_path / "in.txt"
+    path.write_text(text, encoding="utf-8")
+
+    output = io.StringIO()
+    read = textproc_cli.transform("expand", str(path), output, chunk_chars=7)
+    abbreviations = trie.train_abbreviation_trie(trie.create_trie(), trie.load_abbreviations_from_json(ABBREVIATIONS))
+    assert read == len(text)
+    assert output.getvalue() == trie.expand_abbreviations_in_sentence(abbreviations, text)
+    assert "(by the way," in output.getvalue() and "x" * 300 in output.getvalue()
+
+
+def test_emoji_and_expansion_together():
+    textproc_cli.load_tries(ABBREVIATIONS)
+    lookup = textproc_cli.make_lookup("expand", with_emoji=True)
+    assert "".join(trie.iter_replaced_chunks(lookup, ["lol so hap", "py!"])) == "laughing out loud so 😊!"
+
+
+def test_files_in_parallel(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"doc{i}.txt"
+        path.write_text(f"brb, file {i}. Done?\n", encoding="utf-8")
+        paths.append(str(path))
+    out = tmp_path / "out"
+    assert textproc_cli.main(["expand", *paths, "--output-dir", str(out), "--jobs", "2",
+                              "--abbreviations", ABBREVIATIONS]) == 0
+    assert (out / "doc2.txt").read_text(encoding="utf-8") == "be right back, file 2. Done?\n"
+
+    results = list(textproc_cli.run("punctuation", paths, jobs=2, abbreviations_path=ABBREVIATIONS))
+    assert [result["path"] for result in results] == paths
+    assert results[0]["punctuation"] == {"comma": 1, "period": 1, "question": 1}
+
+
+def test_replaced_chunks_are_streamed_and_match_the_edits():
+    textproc_cli.load_tries(ABBREVIATIONS)
+    lookup = textproc_cli.make_lookup("expand")
+    chunks = ["idk what ", "brb means, ", "btw", "? "] + ["plain words "] * 1000
+    consumed = []
+
+    def source():
+        for chunk in chunks:
+            consumed.append(chunk)
+            yield chunk
+
+    output = trie.iter_replaced_chunks(lookup, source())
+    first = next(piece for piece in output if piece)
+    assert first and len(consumed) == 1
+    text = first + "".join(output)
+
+    expected, last = [], 0
+    whole = "".join(chunks)
+    for start, end, replacement in trie.iter_token_edits(lookup, chunks):
+        expected += [whole[last:start], replacement]
+        last = end
+    assert text == "".join(expected) + whole[last:]
+    assert text.startswith("I don't know what be right back means, by the way?")
+
+
+def test_stdout_is_utf8_and_undecodable_input_fails_cleanly(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "note.txt"
+    path.write_text("so happy\n", encoding="utf-8")
+    raw = io.BytesIO()
+    monkeypatch.setattr(sys, "stdout", io.TextIOWrapper(raw, encoding="ascii"))
+    assert textproc_cli.main(["emoji", str(path), "--abbreviations", ABBREVIATIONS]) == 0
+    sys.stdout.flush()
+    assert raw.getvalue().decode("utf-8") == "so 😊\n"
+
+    legacy = tmp_path / "legacy.txt"
+    legacy.write_bytes(b"brb\n" * 20000 + "café brb\n".encode("cp1252"))
+    out = tmp_path / "out"
+    assert textproc_cli.main(["expand", str(legacy), "--output-dir", str(out),
+                              "--abbreviations", ABBREVIATIONS]) == 1
+    assert "not valid utf-8" in capsys.readouterr().err and os.listdir(out) == []
+    assert textproc_cli.main(["expand", str(legacy), "--output-dir", str(out), "--encoding", "cp1252",
+                              "--abbreviations", ABBREVIATIONS]) == 0
+    assert (out / "legacy.txt").read_text(encoding="utf-8").endswith("café be right back\n")
@@ -1,8 +1,23 @@
+import trie
+from benchmarks import hot_paths
 
-n=5
-x=0
-for i in range(n):
-    for j in range(n):
-        x+=1
 
-print(x)
+def test_benchmark_corpora_are_reproducible():
+    words = hot_paths.make_corpus(500)
+    assert words == hot_paths.make_corpus(500) and len(set(words)) == 500
+    assert hot_paths.make_typing_trace(words, 300) == hot_paths.make_typing_trace(words, 300)
+    assert hot_paths.make_corpus(500, seed=1) != words
+
+
+def test_engines_agree_on_the_benchmarked_hot_paths():
+    words = hot_paths.make_corpus(2000)
+    engines = {engine: hot_paths.build_engine(engine, words) for engine in hot_paths.ENGINES}
+    prefixes = sorted({word[:2] for word in words})[:40] + ["zzz"]
+    for engine in engines.values():
+        assert all(trie.search(engine, word) for word in words[::50])
+        assert [trie.autocomplete(engine, prefix) for prefix in prefixes] == \
+            [trie.autocomplete(engines["dict"], prefix) for prefix in prefixes]
+
+    trace = hot_paths.make_typing_trace(words, 400)
+    latency = hot_paths.replay_typing(engines["compact"], None, trace)
+    assert 0 < latency["p50_us"] <= latency["p99_us"] <= latency["max_us"]
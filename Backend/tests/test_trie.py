@@ -0,0 +1,31 @@
+import os
+import subprocess
+import sys
+
+import trie
+
+
+def test_import_has_no_side_effects():
+    code = "import sys, trie; print('nltk' in sys.modules, 'emoji_data' in sys.modules)"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.abspath(trie.__file__)))
+    assert result.stdout.split() == ["False", "False"]
+
+
+def test_completion_session_push_pop_and_typo_fallback(word_trie):
+    session = trie.CompletionSession(word_trie, max_typo_distance=1)
+    for character in "Car":
+        session.push(character)
+    assert session.prefix == "car"
+    assert set(session.word_suggestions()) == {"car", "cart", "care"}
+    session.pop()
+    session.push("x")
+    assert "cat" in session.word_suggestions() or "car" in session.word_suggestions()
+    session.reset("ap")
+    assert set(session.suggestions()) == {"apple", "apply"}
+
+
+def test_load_word_counts_skips_malformed_lines(tmp_path):
+    path = tmp_path / "counts.txt"
+    path.write_text("the\t120\n45 Cat\ncat 5\n\nno count\n7 8 9\nword x\n  dog   3  \n", encoding="utf-8")
+    assert trie.load_word_counts(str(path)) == {"the": 120, "cat": 50, "dog": 3}
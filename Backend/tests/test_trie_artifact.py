@@ -0,0 +1,72 @@
+import json
+
+import data_sources
+import trie_artifact
+from compact_trie import STRING_EXPANSION, CompactTrie
+from dawg import Dawg
+
+WORDS = ["the", "then", "there", "thing", "apple", "app"]
+
+
+def test_write_and_map_round_trip(tmp_path):
+    path = str(tmp_path / "tries.bin")
+    words = CompactTrie.from_words(WORDS, {"then": 7, "apple": 3})
+    tries = {"words": words, "dawg": Dawg.from_words(WORDS),
+             "abbreviations": CompactTrie.from_abbreviations({"brb": "be right back"}),
+             "emoji": {"h": {"a": {"p": {"p": {"y": {"*": "😊"}}}}}}}
+    trie_artifact.write_artifact(path, b"f" * 32, tries)
+
+    assert trie_artifact.read_header(path) == (trie_artifact.ARTIFACT_VERSION, b"f" * 32)
+    artifact = trie_artifact.TrieArtifact(path)
+    mapped = artifact["words"]
+    assert (list(mapped.labels), list(mapped.first_child), list(mapped.payloads), list(mapped.scores)) == \
+        (list(words.labels), list(words.first_child), list(words.payloads), list(words.scores))
+    assert mapped.autocomplete("th") == words.autocomplete("th")
+    assert artifact["dawg"].search("there") and not artifact["dawg"].search("ther")
+    assert artifact["abbreviations"].string_kind == STRING_EXPANSION
+    assert artifact["abbreviations"].search_and_expand("brb") == "be right back"
+    assert artifact["emoji"].search_emoji("happy") == "😊"
+
+
+def test_load_or_build_rebuilds_only_when_stale(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_sources, "load_words", lambda: list(WORDS))
+    path = str(tmp_path / "tries.bin")
+    abbreviations = tmp_path / "abbreviations.json"
+    abbreviations.write_text(json.dumps({"brb": "be right back"}), encoding="utf-8")
+    builds, messages = [], []
+    original = trie_artifact.build_artifact
+    monkeypatch.setattr(trie_artifact, "build_artifact", lambda *args: builds.append(args) or original(*args))
+
+    def load():
+        return trie_artifact.load_or_build(path, str(abbreviations), on_progress=messages.append)
+
+    assert load()["words"].search("there")
+    assert len(builds) == 1 and "missing or stale" in messages[0]
+    load()
+    assert len(builds) == 1
+
+    abbreviations.write_text(json.dumps({"brb": "be right back", "btw": "by the way"}), encoding="utf-8")
+    assert load()["abbreviations"].search_and_expand("btw") == "by the way"
+    assert len(builds) == 2
+
+
+def test_fingerprint_follows_the_word_corpus(tmp_path, monkeypatch):
+    corpus = tmp_path / "nltk_data" / "corpora" / "words"
+    corpus.mkdir(parents=True)
+    (corpus / "en").write_text("apple\n", encoding="utf-8")
+    monkeypatch.setenv("NLTK_DATA", str(tmp_path / "nltk_data"))
+    abbreviations = tmp_path / "abbreviations.json"
+    abbreviations.write_text("{}", encoding="utf-8")
+
+    before = trie_artifact.source_fingerprint(str(abbreviations))
+    assert trie_artifact.source_fingerprint(str(abbreviations)) == before
+    (corpus / "en").write_text("apple\nbanana\n", encoding="utf-8")
+    assert trie_artifact.source_fingerprint(str(abbreviations)) != before
+
+
+def test_artifact_is_written_through_a_unique_temp_file(tmp_path):
+    path = str(tmp_path / "tries.bin")
+    trie_artifact.write_artifact(path, b"a" * 32, {"words": CompactTrie.from_words(WORDS)})
+    trie_artifact.write_artifact(path, b"b" * 32, {"words": CompactTrie.from_words(WORDS)})
+    assert trie_artifact.read_header(path)[1] == b"b" * 32
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["tries.bin"]
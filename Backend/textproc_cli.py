@@ -0,0 +1,220 @@
+# ==============================================================================
+# Headless bulk text processing: abbreviation expansion, emoji substitution and
+# punctuation analysis over files or stdin, without the editor.
+#
+#   python textproc_cli.py expand notes.txt > expanded.txt
+#   python textproc_cli.py expand --emoji corpus/*.txt --output-dir out --jobs 8
+#   cat notes.txt | python textproc_cli.py emoji -
+#   python textproc_cli.py punctuation corpus/*.txt > punctuation.jsonl
+# ==============================================================================
+
+# ==============================================================================
+# I. IMPORTS AND CONSTANTS
+# ==============================================================================
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import data_sources
+import trie
+import trie_artifact
+from compact_trie import train_compact_abbreviation_trie, train_compact_emoji_trie
+from file_loader import CHUNK_CHARS, iter_chunks
+
+COMMANDS = ("expand", "emoji", "punctuation")
+
+
+# ==============================================================================
+# II. TRIES, LOADED ONCE PER PROCESS
+#
+# Workers load their tries in the pool initializer rather than per file. With
+# --artifact the abbreviation and emoji sections are memory-mapped from the
+# editor's build/tries.bin, so every worker shares the same pages; otherwise
+# they are compiled from abbreviations.json and the emoji table, which takes a
+# few milliseconds and needs neither NLTK nor the word dictionary.
+# ==============================================================================
+
+_tries = {}
+
+
+def load_tries(abbreviations_path: str = data_sources.DEFAULT_ABBREVIATIONS_PATH, artifact_path: str = None):
+    if artifact_path:
+        artifact = trie_artifact.TrieArtifact(artifact_path)
+        _tries.update(abbreviations=artifact["abbreviations"], emoji=artifact["emoji"])
+    else:
+        _tries.update(
+            abbreviations=train_compact_abbreviation_trie(data_sources.load_abbreviations(abbreviations_path)),
+            emoji=train_compact_emoji_trie(data_sources.load_emoji_mappings()))
+    _tries["punctuation"] = trie.train_punctuation_trie(trie.create_trie())
+
+
+def make_lookup(command: str, with_emoji: bool = False):
+    # lookup(core) for trie.iter_replaced_chunks, which streams the same token
+    # edits the editor applies. As when typing, an abbreviation wins over an
+    # emoji for the same word.
+    abbreviations, emoji = _tries["abbreviations"], _tries["emoji"]
+    if command == "emoji":
+        return lambda core: trie.search_emoji(emoji, core) or core
+    if not with_emoji:
+        return lambda core: trie.search_and_expand(abbreviations, core)
+
+    def lookup(core):
+        replacement = trie.search_and_expand(abbreviations, core)
+        if replacement == core:
+            replacement = trie.search_emoji(emoji, core) or core
+        return replacement
+    return lookup
+
+
+# ==============================================================================
+# III. STREAMING ONE INPUT
+#
+# Input is read in CHUNK_CHARS pieces and every piece of output is written as
+# soon as it is final, so memory stays flat however large a file is. Text
+# output goes to a temp file next to the destination and is renamed into place
+# once complete, so a failed or interrupted job never leaves half a file.
+# Each file is read once: its encoding comes from its first bytes (or
+# --encoding), and a file that turns out not to be in it fails with a
+# ValueError rather than being mangled.
+# ==============================================================================
+
+def _iter_input(path: str, chunk_chars: int, encoding: str = None):
+    if path == "-":
+        return iter(lambda: sys.stdin.read(chunk_chars), "")
+    return iter_chunks(path, chunk_chars, encoding)
+
+
+def transform(command: str, path: str, output, with_emoji: bool = False, chunk_chars: int = CHUNK_CHARS,
+              encoding: str = None) -> int:
+    # Writes the processed text to `output`; returns the characters read.
+    read = 0
+
+    def chunks():
+        nonlocal read
+        for chunk in _iter_input(path, chunk_chars, encoding):
+            read += len(chunk)
+            yield chunk
+
+    output.writelines(trie.iter_replaced_chunks(make_lookup(command, with_emoji), chunks()))
+    return read
+
+
+def count_punctuation(path: str, chunk_chars: int = CHUNK_CHARS, encoding: str = None) -> dict:
+    # Punctuation marks are single characters, so chunks can be counted alone.
+    counts, read = Counter(), 0
+    for chunk in _iter_input(path, chunk_chars, encoding):
+        read += len(chunk)
+        counts.update(name for _, name in trie.analyze_sentence_punctuation(_tries["punctuation"], chunk))
+    return {"path": path, "characters": read, "punctuation": dict(sorted(counts.items()))}
+
+
+def output_path(path: str, output_dir: str) -> str:
+    return os.path.join(output_dir, "stdin.txt" if path == "-" else os.path.basename(path))
+
+
+def process_file(command: str, path: str, output_dir: str = None, with_emoji: bool = False,
+                 chunk_chars: int = CHUNK_CHARS, encoding: str = None) -> dict:
+    # Runs in a worker. Text results go to output_dir, or back to the parent
+    # when there is none; punctuation results are always returned.
+    started = time.perf_counter()
+    if command == "punctuation":
+        result = count_punctuation(path, chunk_chars, encoding)
+    else:
+        destination = output_path(path, output_dir)
+        temp_path = destination + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8", newline="\n") as f:
+                read = transform(command, path, f, with_emoji, chunk_chars, encoding)
+            os.replace(temp_path, destination)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        result = {"path": path, "output": destination, "characters": read}
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+# ==============================================================================
+# IV. MANY FILES IN PARALLEL
+#
+# Files are the unit of work: each is streamed start to finish by one worker,
+# so no cross-process merging of partial tokens is needed. Results are handed
+# back in input order as each file completes.
+# ==============================================================================
+
+def run(command: str, paths: list, output_dir: str = None, jobs: int = None, with_emoji: bool = False,
+        abbreviations_path: str = data_sources.DEFAULT_ABBREVIATIONS_PATH, artifact_path: str = None,
+        chunk_chars: int = CHUNK_CHARS, encoding: str = None):
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(paths)))
+    work = [(command, path, output_dir, with_emoji, chunk_chars, encoding) for path in paths]
+    if jobs == 1 or "-" in paths:
+        # stdin cannot be shared with a worker; one input needs no pool.
+        load_tries(abbreviations_path, artifact_path)
+        for arguments in work:
+            yield process_file(*arguments)
+        return
+    with ProcessPoolExecutor(max_workers=jobs, initializer=load_tries,
+                             initargs=(abbreviations_path, artifact_path)) as pool:
+        yield from pool.map(process_file, *zip(*work))
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Process text files without the editor.")
+    parser.add_argument("command", choices=COMMANDS,
+                        help="expand abbreviations, substitute emoji, or count punctuation")
+    parser.add_argument("inputs", nargs="+", help="text files, or - for stdin")
+    parser.add_argument("--output-dir", help="write one processed file per input here (default: stdout)")
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: one per core)")
+    parser.add_argument("--emoji", action="store_true", help="with expand: also substitute emoji")
+    parser.add_argument("--abbreviations", default=data_sources.DEFAULT_ABBREVIATIONS_PATH)
+    parser.add_argument("--artifact", help="map the tries from a trie artifact instead of compiling them")
+    parser.add_argument("--encoding", help="input encoding (default: detected from each file's first bytes)")
+    args = parser.parse_args(argv)
+
+    to_stdout = args.command != "punctuation" and not args.output_dir
+    if to_stdout and len(args.inputs) > 1:
+        parser.error("--output-dir is required with more than one input")
+    if args.output_dir:
+        names = [os.path.basename(output_path(path, args.output_dir)) for path in args.inputs]
+        if len(set(names)) < len(names):
+            parser.error("inputs with the same file name would overwrite each other in --output-dir")
+        os.makedirs(args.output_dir, exist_ok=True)
+
+    # Output is UTF-8, like the files written to --output-dir, whatever the
+    # locale: emoji would not survive most legacy code pages.
+    if hasattr(sys.stdout, "reconfigure"):
+        sys.stdout.reconfigure(encoding="utf-8")
+
+    try:
+        if to_stdout:
+            load_tries(args.abbreviations, args.artifact)
+            transform(args.command, args.inputs[0], sys.stdout, args.emoji, encoding=args.encoding)
+            return 0
+
+        total = 0
+        started = time.perf_counter()
+        for result in run(args.command, args.inputs, args.output_dir, args.jobs, args.emoji,
+                          args.abbreviations, args.artifact, encoding=args.encoding):
+            total += result["characters"]
+            if args.command == "punctuation":
+                print(json.dumps(result), flush=True)
+            else:
+                print(f"{result['path']} -> {result['output']} ({result['characters']:,} chars, "
+                      f"{result['seconds']:.2f} s)", file=sys.stderr)
+    except (OSError, ValueError) as error:
+        print(f"error: {error}", file=sys.stderr)
+        return 1
+    seconds = time.perf_counter() - started
+    print(f"{len(args.inputs)} inputs, {total:,} chars in {seconds:.2f} s "
+          f"({total / 2**20 / max(seconds, 1e-9):.1f} MiB/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
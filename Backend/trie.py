@@ -2,13 +2,24 @@
 # I. IMPORTS AND INITIAL SETUP
 # ==============================================================================
 
-import json
-import nltk
-from nltk.corpus import words
-from emoji_data import word_to_emoji
+import re
+import threading
+from collections import OrderedDict
+
+import data_sources
+from compact_trie import WORD, Payload
+
+# Word lists and emoji mappings are not loaded here; see data_sources.py. The
+# old module attributes `words` (the NLTK corpus reader) and `word_to_emoji`
+# still resolve, on first access.
+_LAZY_ATTRIBUTES = {"words": data_sources.words_corpus, "word_to_emoji": data_sources.load_emoji_mappings}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Download necessary NLTK data
-nltk.download("words")
 
 # Define a constant to mark the end of a word in the Trie
 END_OF_WORD = "*"
@@ -18,23 +29,34 @@ END_OF_WORD = "*"
 # II. CORE TRIE DATA STRUCTURE IMPLEMENTATION
 #
 # These are the fundamental functions for creating and interacting with a
-# Trie data structure.
+# Trie data structure. Array-backed engines (compact_trie.CompactTrie, and the
+# sections of a trie_artifact.TrieArtifact) are not dicts; the lookup functions
+# below hand those off to the engine's own method of the same name.
 # ==============================================================================
 
 def create_trie():
     return {}
 
 
-def insert(trie: dict, word: str):
+def _insert_value(trie: dict, word: str, value):
+    # Stores `value` at the end of `word`. Callers invalidate the suggestion
+    # cache: once per word for single inserts, once per bulk train_* build.
     current_node = trie
     for character in word.lower():
         if character not in current_node:
             current_node[character] = {}
         current_node = current_node[character]
-    current_node[END_OF_WORD] = True
+    current_node[END_OF_WORD] = value
+
+
+def insert(trie: dict, word: str):
+    suggestion_cache.invalidate(trie)
+    _insert_value(trie, word, True)
 
 
 def search(trie: dict, word: str) -> bool:
+    if not isinstance(trie, dict):
+        return trie.search(word)
     current_node = trie
     for character in word:
         if character not in current_node:
@@ -44,6 +66,8 @@ def search(trie: dict, word: str) -> bool:
 
 
 def starts_with(trie: dict, prefix: str) -> bool:
+    if not isinstance(trie, dict):
+        return trie.starts_with(prefix)
     current_node = trie
     for character in prefix:
         if character not in current_node:
@@ -87,6 +111,8 @@ def get_all_words_from_node(node: dict, prefix: str, max_suggestions: int = 10):
 
 
 def autocomplete(trie: dict, prefix: str, max_suggestions: int = 10):
+    if not isinstance(trie, dict):
+        return trie.autocomplete(prefix, max_suggestions)
     suggestions = []
     prefix_lower = prefix.lower()
     if not starts_with(trie, prefix_lower):
@@ -101,8 +127,9 @@ def autocomplete(trie: dict, prefix: str, max_suggestions: int = 10):
 
 
 def train_trie(trie: dict, word_list: list):
+    suggestion_cache.invalidate(trie)
     for word in word_list:
-        insert(trie, word)
+        _insert_value(trie, word, True)
     return trie
 
 
@@ -114,32 +141,50 @@ def train_trie(trie: dict, word_list: list):
 # ==============================================================================
 
 def insert_emoji(trie: dict, word: str, emoji: str):
-    current_node = trie
-    for character in word.lower():
-        if character not in current_node:
-            current_node[character] = {}
-        current_node = current_node[character]
-    current_node[END_OF_WORD] = emoji
+    suggestion_cache.invalidate(trie)
+    _insert_value(trie, word, emoji)
+
+
+def insert_payload(trie: dict, word: str, payload: Payload):
+    suggestion_cache.invalidate(trie)
+    _insert_value(trie, word, payload)
+
+
+def get_payload(trie: dict, word: str):
+    # Typed view of the terminal for `word`, or None. Terminals written by the
+    # untyped insert functions are converted: True is a word, a string an emoji.
+    if not isinstance(trie, dict):
+        return trie.payload(word)
+    node = get_node_at_prefix(trie, word.lower())
+    if node is None or END_OF_WORD not in node:
+        return None
+    value = node[END_OF_WORD]
+    if value.__class__ is Payload:
+        return value
+    if isinstance(value, str):
+        return Payload(emoji=value)
+    return WORD
 
 
 def search_emoji(trie: dict, word: str) -> str:
+    if not isinstance(trie, dict):
+        return trie.search_emoji(word)
     current_node = trie
     for character in word.lower():
         if character not in current_node:
             return ''
         current_node = current_node[character]
-    if END_OF_WORD in current_node and isinstance(current_node[END_OF_WORD], str):
-        return current_node[END_OF_WORD]
+    value = current_node.get(END_OF_WORD)
+    if value.__class__ is Payload:
+        return value.emoji or ''
+    if isinstance(value, str):
+        return value
     else:
         return ''
 
 
-def autocomplete_emoji(trie: dict, prefix: str, max_suggestions: int = 10):
+def get_all_emoji_words_from_node(node: dict, prefix: str, max_suggestions: int = 10):
     suggestions = []
-    prefix_lower = prefix.lower()
-    prefix_node = get_node_at_prefix(trie, prefix_lower)
-    if prefix_node is None:
-        return suggestions
 
     def collect_emoji_words(current_node, current_word):
         if len(suggestions) >= max_suggestions:
@@ -151,13 +196,26 @@ def autocomplete_emoji(trie: dict, prefix: str, max_suggestions: int = 10):
             if char != END_OF_WORD and len(suggestions) < max_suggestions:
                 collect_emoji_words(child_node, current_word + char)
 
-    collect_emoji_words(prefix_node, prefix_lower)
+    collect_emoji_words(node, prefix)
     return suggestions
 
 
+def autocomplete_emoji(trie: dict, prefix: str, max_suggestions: int = 10):
+    if not isinstance(trie, dict):
+        return trie.autocomplete_emoji(prefix, max_suggestions)
+    suggestions = []
+    prefix_lower = prefix.lower()
+    prefix_node = get_node_at_prefix(trie, prefix_lower)
+    if prefix_node is None:
+        return suggestions
+
+    return get_all_emoji_words_from_node(prefix_node, prefix_lower, max_suggestions)
+
+
 def train_emoji_trie(trie: dict, emoji_mappings: dict):
+    suggestion_cache.invalidate(trie)
     for word, emoji in emoji_mappings.items():
-        insert_emoji(trie, word, emoji)
+        _insert_value(trie, word, emoji)
     return trie
 
 
@@ -210,31 +268,545 @@ def analyze_sentence_punctuation(punct_trie: dict, sentence: str):
 # ==============================================================================
 
 def load_abbreviations_from_json(filepath: str) -> dict:
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-        return data
+    return data_sources.load_abbreviations(filepath)
+
+
+ABBREVIATION_PUNCTUATION = '.,!?;:"\'()[]{}'
+MAX_ABBREVIATION_TOKEN = 256
+_TOKEN = re.compile(r"\S+")
+_WHITESPACE = re.compile(r"\s")
 
 
 def search_and_expand(trie: dict, word: str) -> str:
+    if not isinstance(trie, dict):
+        return trie.search_and_expand(word)
 
     current_node = trie
-    lookup_word = word.lower().strip('.,!?;:"\'()[]{}')
+    lookup_word = word.lower().strip(ABBREVIATION_PUNCTUATION)
 
     for character in lookup_word:
         if character not in current_node:
             return word
         current_node = current_node[character]
 
-    if END_OF_WORD in current_node:
-        value = current_node[END_OF_WORD]
-        if isinstance(value, str):
-            return value
+    value = current_node.get(END_OF_WORD)
+    if value.__class__ is Payload:
+        return value.expansion or word
+    if isinstance(value, str):
+        return value
     return word
 
 
+def insert_abbreviation(trie: dict, abbreviation: str, expansion: str):
+    insert_payload(trie, abbreviation, Payload(expansion=expansion))
+
+
+def train_abbreviation_trie(trie: dict, abbreviations: dict):
+    # A dedicated abbreviation trie; the word dictionary stays words only.
+    suggestion_cache.invalidate(trie)
+    for abbreviation, expansion in abbreviations.items():
+        _insert_value(trie, abbreviation, Payload(expansion=expansion))
+    return trie
+
+
+def _token_edit(lookup, token: str, start: int, expansions: dict):
+    # Only the token's core is replaced, so surrounding punctuation survives.
+    # The length limit applies to the raw token, as it does to one a chunk
+    # boundary cuts, so the result never depends on where chunks end.
+    if len(token) > MAX_ABBREVIATION_TOKEN:
+        return None
+    core = token.strip(ABBREVIATION_PUNCTUATION)
+    if not core:
+        return None
+    expansion = expansions.get(core)
+    if expansion is None:
+        if len(expansions) >= 4096:
+            expansions.clear()
+        expansion = expansions[core] = lookup(core)
+    if expansion == core:
+        return None
+    core_start = start + len(token) - len(token.lstrip(ABBREVIATION_PUNCTUATION))
+    return core_start, core_start + len(core), expansion
+
+
+class _TokenScanner:
+    # The one streaming tokenizer behind iter_token_edits and
+    # iter_replaced_chunks. feed() takes the next chunk and returns
+    # (start, end, replacement) for every token it completed, with offsets into
+    # the concatenated text. Abbreviations only match whole whitespace-separated
+    # tokens, so one lookup per token is all the matching needed; only a token
+    # cut by a chunk boundary is carried over, and one longer than
+    # MAX_ABBREVIATION_TOKEN is skipped, which keeps memory bounded however
+    # large the input is. No later edit can start before `settled`.
+    def __init__(self, lookup):
+        self.lookup = lookup
+        self.expansions = {}
+        self.carry, self.carry_start = "", 0
+        self.skipping = False
+        self.offset = 0
+
+    @property
+    def settled(self) -> int:
+        return self.carry_start if self.carry else self.offset
+
+    def feed(self, chunk: str) -> list:
+        if not chunk:
+            return []
+        text, base = self.carry + chunk, self.settled
+        self.offset += len(chunk)
+        self.carry = ""
+
+        position = 0
+        if self.skipping:
+            # Still inside an over-long token that cannot be an abbreviation.
+            match = _WHITESPACE.search(text)
+            if match is None:
+                return []
+            self.skipping = False
+            position = match.end()
+
+        edits = []
+        for match in _TOKEN.finditer(text, position):
+            if match.end() == len(text):
+                if len(match.group()) > MAX_ABBREVIATION_TOKEN:
+                    self.skipping = True
+                else:
+                    self.carry, self.carry_start = match.group(), base + match.start()
+                break
+            edit = _token_edit(self.lookup, match.group(), base + match.start(), self.expansions)
+            if edit is not None:
+                edits.append(edit)
+        return edits
+
+    def finish(self) -> list:
+        carry, self.carry = self.carry, ""
+        edit = _token_edit(self.lookup, carry, self.carry_start, self.expansions) if carry else None
+        return [] if edit is None else [edit]
+
+
+def iter_token_edits(lookup, chunks):
+    # Single streaming pass over an iterable of text chunks. Yields
+    # (start, end, replacement) wherever lookup(core) differs from a token's
+    # core (lookup returns the core itself to leave it alone), so callers can
+    # patch just those spans.
+    scanner = _TokenScanner(lookup)
+    for chunk in chunks:
+        yield from scanner.feed(chunk)
+    yield from scanner.finish()
+
+
+def iter_abbreviation_edits(trie: dict, chunks):
+    return iter_token_edits(lambda core: search_and_expand(trie, core), chunks)
+
+
+def live_token_expansion(abbreviation_trie, emoji_trie, token: str):
+    # For as-you-type expansion of the token just finished: returns
+    # (core_start, core_end, replacement) relative to `token`, or None. The
+    # abbreviation wins over an emoji for the same word.
+    core = token.strip(ABBREVIATION_PUNCTUATION)
+    if not core or len(token) > MAX_ABBREVIATION_TOKEN:
+        return None
+    replacement = search_and_expand(abbreviation_trie, core)
+    if replacement == core and emoji_trie is not None:
+        replacement = search_emoji(emoji_trie, core) or core
+    if replacement == core:
+        return None
+    core_start = len(token) - len(token.lstrip(ABBREVIATION_PUNCTUATION))
+    return core_start, core_start + len(core), replacement
+
+
 def expand_abbreviations_in_sentence(trie: dict, sentence: str) -> str:
-    words_in_sentence = sentence.split()
-    expanded_words = []
-    for w in words_in_sentence:
-        expanded_words.append(search_and_expand(trie, w))
-    return " ".join(expanded_words)
+    return "".join(iter_replaced_chunks(lambda core: search_and_expand(trie, core), (sentence,)))
+
+
+def _apply_edits(text: str, base: int, edits: list, end: int):
+    # Yields text[:end - base] with the edits applied; offsets are absolute.
+    last = 0
+    for start, stop, replacement in edits:
+        yield text[last:start - base]
+        yield replacement
+        last = stop - base
+    yield text[last:end - base]
+
+
+def iter_replaced_chunks(lookup, chunks):
+    # Streams the text of `chunks` with the edits of iter_token_edits applied.
+    # Everything before the scanner's settled offset is final and passed on at
+    # once; only the carried partial token is held back.
+    scanner = _TokenScanner(lookup)
+    pending, base = "", 0
+    for chunk in chunks:
+        text = pending + chunk
+        yield from _apply_edits(text, base, scanner.feed(chunk), scanner.settled)
+        pending, base = text[scanner.settled - base:], scanner.settled
+    yield from _apply_edits(pending, base, scanner.finish(), scanner.settled)
+
+
+# ==============================================================================
+# VII. WORD FREQUENCY SCORES
+#
+# Scores rank autocomplete suggestions in the compact engines. Counts files
+# hold one "word count" pair per line (tab or space separated, either order).
+# ==============================================================================
+
+def load_word_counts(filepath: str) -> dict:
+    counts = {}
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            fields = line.split()
+            if len(fields) != 2:
+                continue
+            word, count = fields
+            if word.isdigit() and not count.isdigit():
+                word, count = count, word
+            if count.isdigit():
+                word = word.lower()
+                counts[word] = counts.get(word, 0) + int(count)
+    return counts
+
+
+def get_word_score(trie, word: str) -> int:
+    if isinstance(trie, dict):
+        return 0
+    return trie.get_score(word)
+
+
+def set_word_score(trie, word: str, score: int):
+    if isinstance(trie, dict):
+        raise TypeError("dict tries do not store word scores; use a compact engine")
+    suggestion_cache.invalidate(trie)
+    trie.set_score(word, score)
+
+
+# ==============================================================================
+# VIII. INCREMENTAL COMPLETION SESSIONS
+#
+# A session remembers the trie node reached by every prefix of the word being
+# typed, so adding or deleting one character costs a single child step (or a
+# pop) instead of a walk from the root. Nodes are dicts for dict tries and
+# integers for the compact engines; a node of None means the prefix has no
+# completions.
+# ==============================================================================
+
+def get_root_node(trie):
+    if isinstance(trie, dict):
+        return trie
+    return trie.root_node()
+
+
+def get_child_items(trie, node):
+    if isinstance(trie, dict):
+        return ((char, child) for char, child in node.items() if char != END_OF_WORD)
+    return trie.child_items(node)
+
+
+def is_word_node(trie, node) -> bool:
+    if isinstance(trie, dict):
+        return END_OF_WORD in node
+    return trie.is_word_node(node)
+
+
+def get_words_from_node(trie, node, prefix: str, max_suggestions: int = 10):
+    if isinstance(trie, dict):
+        return get_all_words_from_node(node, prefix, max_suggestions)
+    return trie.words_from_node(node, prefix, max_suggestions)
+
+
+def get_child_node(trie, node, character: str):
+    if node is None:
+        return None
+    if isinstance(trie, dict):
+        if character == END_OF_WORD:
+            return None
+        return node.get(character)
+    return trie.child_node(node, character)
+
+
+class CompletionSession:
+    def __init__(self, word_trie, emoji_trie=None, max_suggestions: int = 10, max_emoji_suggestions: int = 10,
+                 cache=None, max_typo_distance: int = 0):
+        self.word_trie = word_trie
+        self.emoji_trie = emoji_trie
+        self.max_suggestions = max_suggestions
+        self.max_emoji_suggestions = max_emoji_suggestions
+        self.cache = cache
+        # When the exact prefix has no completions, fall back to typo-tolerant
+        # matches within this many edits (0 disables the fallback).
+        self.max_typo_distance = max_typo_distance
+        self.reset()
+
+    def reset(self, prefix: str = ""):
+        self.prefix = ""
+        self._word_path = [get_root_node(self.word_trie)]
+        self._emoji_path = [get_root_node(self.emoji_trie)] if self.emoji_trie is not None else None
+        for character in prefix:
+            self.push(character)
+
+    def push(self, character: str):
+        character = character.lower()
+        self.prefix += character
+        self._word_path.append(get_child_node(self.word_trie, self._word_path[-1], character))
+        if self._emoji_path is not None:
+            self._emoji_path.append(get_child_node(self.emoji_trie, self._emoji_path[-1], character))
+
+    def pop(self):
+        if not self.prefix:
+            return
+        self.prefix = self.prefix[:-1]
+        self._word_path.pop()
+        if self._emoji_path is not None:
+            self._emoji_path.pop()
+
+    def _word_suggestions_at(self, prefix: str, node):
+        if node is None:
+            distance = min(self.max_typo_distance, default_typo_distance(prefix))
+            if distance <= 0:
+                return []
+
+            def compute():
+                return fuzzy_autocomplete(self.word_trie, prefix, distance, self.max_suggestions)
+
+            if self.cache is None:
+                return compute()
+            return self.cache.get_or_compute(self.word_trie, f"fuzzy{distance}", prefix, self.max_suggestions,
+                                             compute)
+
+        def compute():
+            return get_words_from_node(self.word_trie, node, prefix, self.max_suggestions)
+
+        if self.cache is None:
+            return compute()
+        return self.cache.get_or_compute(self.word_trie, "words", prefix, self.max_suggestions, compute)
+
+    def _emoji_suggestions_at(self, prefix: str, node):
+        if node is None:
+            return []
+
+        def compute():
+            if isinstance(self.emoji_trie, dict):
+                return get_all_emoji_words_from_node(node, prefix, self.max_emoji_suggestions)
+            return self.emoji_trie.emoji_words_from_node(node, prefix, self.max_emoji_suggestions)
+
+        if self.cache is None:
+            return compute()
+        return self.cache.get_or_compute(self.emoji_trie, "emoji", prefix, self.max_emoji_suggestions, compute)
+
+    def word_suggestions(self):
+        return self._word_suggestions_at(self.prefix, self._word_path[-1])
+
+    def emoji_suggestions(self):
+        if self._emoji_path is None:
+            return []
+        return self._emoji_suggestions_at(self.prefix, self._emoji_path[-1])
+
+    def suggestions(self):
+        return self.word_suggestions() + self.emoji_suggestions()
+
+    def suggestions_task(self):
+        # Freezes the current prefix and nodes into a callable, so suggestions
+        # can be computed on another thread while the session keeps moving.
+        prefix = self.prefix
+        word_node = self._word_path[-1]
+        emoji_node = self._emoji_path[-1] if self._emoji_path is not None else None
+        return lambda: self._word_suggestions_at(prefix, word_node) + self._emoji_suggestions_at(prefix, emoji_node)
+
+
+# ==============================================================================
+# IX. TYPO-TOLERANT COMPLETION
+#
+# Walks the trie while keeping one row of the edit-distance table per node:
+# row[i] is the distance between the first i typed characters and the path to
+# the node, counting insertions, deletions, substitutions and swaps of adjacent
+# characters. Only cells within max_distance of the diagonal can stay under the
+# limit, so each row costs O(max_distance) instead of O(len(prefix)), and a
+# subtree is abandoned as soon as its whole row exceeds the limit. From two
+# edits up the first letter is assumed correct, which cuts the search space by
+# the alphabet size and keeps it interactive on the full dictionary.
+# ==============================================================================
+
+def default_typo_distance(prefix: str) -> int:
+    if len(prefix) < 3:
+        return 0
+    return 1 if len(prefix) < 6 else 2
+
+
+def fuzzy_matches(trie, typed: str, max_distance: int):
+    # Yields (distance, path, node) for every node whose path is within
+    # max_distance edits of the whole of `typed`.
+    length = len(typed)
+    too_far = max_distance + 1
+    first_row = [min(i, too_far) for i in range(length + 1)]
+
+    stack = [(get_root_node(trie), "", first_row, None)]
+    while stack:
+        node, path, row, parent_row = stack.pop()
+        depth = len(path) + 1
+        low, high = max(1, depth - max_distance), min(length, depth + max_distance)
+        previous_char = path[-1] if path else None
+
+        for char, child in get_child_items(trie, node):
+            if depth == 1 and max_distance >= 2 and char != typed[0]:
+                continue
+            new_row = [too_far] * (length + 1)
+            new_row[0] = min(depth, too_far)
+            closest = new_row[0]
+            for i in range(low, high + 1):
+                cost = row[i - 1] + (typed[i - 1] != char)
+                if row[i] + 1 < cost:
+                    cost = row[i] + 1
+                if new_row[i - 1] + 1 < cost:
+                    cost = new_row[i - 1] + 1
+                if (i > 1 and parent_row is not None and typed[i - 1] == previous_char
+                        and typed[i - 2] == char and parent_row[i - 2] + 1 < cost):
+                    cost = parent_row[i - 2] + 1
+                new_row[i] = cost if cost < too_far else too_far
+                if cost < closest:
+                    closest = cost
+
+            if new_row[length] <= max_distance:
+                yield new_row[length], path + char, child
+            if closest <= max_distance:
+                stack.append((child, path + char, new_row, row))
+
+
+def _fuzzy_rank(typed: str, distance: int, path: str):
+    # Closest first; typos rarely hit the first letter; then prefer matches as
+    # long as what was typed.
+    return distance, path[0] != typed[0], abs(len(path) - len(typed))
+
+
+def fuzzy_autocomplete(trie, prefix: str, max_distance: int = 1, max_suggestions: int = 10):
+    typed = prefix.lower()
+    if not typed:
+        return []
+    candidates = [(_fuzzy_rank(typed, distance, path), path, node)
+                  for distance, path, node in fuzzy_matches(trie, typed, max_distance)]
+    candidates.sort(key=lambda candidate: candidate[:2])
+    suggestions = []
+    seen = set()
+    for _, path, node in candidates:
+        for word in get_words_from_node(trie, node, path, max_suggestions):
+            if word not in seen:
+                seen.add(word)
+                suggestions.append(word)
+                if len(suggestions) >= max_suggestions:
+                    return suggestions
+    return suggestions
+
+
+def spelling_suggestions(trie, word: str, max_distance: int = 2, max_suggestions: int = 5):
+    typed = word.lower()
+    if not typed:
+        return []
+    matches = sorted((_fuzzy_rank(typed, distance, path), path)
+                     for distance, path, node in fuzzy_matches(trie, typed, max_distance)
+                     if is_word_node(trie, node) and path != typed)
+    return [path for _, path in matches[:max_suggestions]]
+
+
+# ==============================================================================
+# X. SUGGESTION CACHE
+#
+# A bounded LRU cache in front of autocomplete and autocomplete_emoji, keyed by
+# (trie id, kind, lower-cased prefix, max_suggestions). insert, insert_emoji
+# and set_word_score drop every entry of the trie they modify. The cache is
+# shared with the background suggestion worker, so bookkeeping is locked.
+# ==============================================================================
+
+class SuggestionCache:
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._keys_by_trie = {}
+        self._tries = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_compute(self, trie, kind: str, prefix: str, max_suggestions: int, compute):
+        trie_id = id(trie)
+        key = (trie_id, kind, prefix.lower(), max_suggestions)
+        with self._lock:
+            if self._tries.get(trie_id, trie) is not trie:
+                # A trie that was garbage collected left its id behind.
+                self._drop(trie_id)
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(self._entries[key])
+            self.misses += 1
+            epoch = self._epoch
+
+        result = compute()
+        with self._lock:
+            # Skip the store if the trie changed while we were computing.
+            if epoch == self._epoch:
+                self._store(trie, key, tuple(result))
+        return result
+
+    def _store(self, trie, key, value):
+        trie_id = key[0]
+        entries = self._entries
+        entries[key] = value
+        self._tries[trie_id] = trie
+        self._keys_by_trie.setdefault(trie_id, set()).add(key)
+        while len(entries) > self.maxsize:
+            old_key, _ = entries.popitem(last=False)
+            trie_keys = self._keys_by_trie[old_key[0]]
+            trie_keys.discard(old_key)
+            if not trie_keys:
+                del self._keys_by_trie[old_key[0]]
+                del self._tries[old_key[0]]
+            self.evictions += 1
+
+    def _drop(self, trie_id: int):
+        keys = self._keys_by_trie.pop(trie_id, None)
+        if keys is None:
+            return
+        del self._tries[trie_id]
+        for key in keys:
+            del self._entries[key]
+        self.invalidations += 1
+
+    def invalidate(self, trie):
+        # Under the lock: the suggestion worker reads the epoch and the index
+        # from its own thread.
+        with self._lock:
+            self._epoch += 1
+            self._drop(id(trie))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_trie.clear()
+            self._tries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+            stats = {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": hits,
+                "misses": misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+        stats["hit_rate"] = hits / (hits + misses) if hits + misses else 0.0
+        return stats
+
+
+suggestion_cache = SuggestionCache()
+
+
+def cached_autocomplete(trie, prefix: str, max_suggestions: int = 10):
+    return suggestion_cache.get_or_compute(trie, "words", prefix, max_suggestions,
+                                           lambda: autocomplete(trie, prefix, max_suggestions))
+
+
+def cached_autocomplete_emoji(trie, prefix: str, max_suggestions: int = 10):
+    return suggestion_cache.get_or_compute(trie, "emoji", prefix, max_suggestions,
+                                           lambda: autocomplete_emoji(trie, prefix, max_suggestions))
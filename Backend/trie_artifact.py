@@ -0,0 +1,254 @@
+# ==============================================================================
+# I. IMPORTS AND CONSTANTS
+# ==============================================================================
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+import data_sources
+from compact_trie import STRING_EMOJI, STRING_EXPANSION, CompactTrie
+from dawg import Dawg
+from file_saver import atomic_write
+
+# On-disk layout (all integers little-endian):
+#
+#   header   : magic, format version, source fingerprint, section count
+#   sections : name, offset, length  (one entry per compiled trie)
+#   blob     : kind, flags, node_count, edge_count, string_count, string_bytes
+#              label[edge_count]          u32
+#              first_child[node_count+1]  u32
+#              target[edge_count]         u32  (DAWG sections only)
+#              payload[node_count]        i32
+#              score[node_count]          u32  (FLAG_SCORES only)
+#              best[node_count]           u32  (FLAG_SCORES only)
+#              string_offsets[count+1]    u32
+#              string bytes (utf-8; expansions if FLAG_EXPANSIONS, else emoji)
+#
+# The arrays are exactly those of compact_trie.CompactTrie / dawg.Dawg, so a
+# mapped section is used in place without copying. In a plain trie every node
+# but the root is the target of exactly one edge, so edge_count == node_count.
+# The file is mapped copy-on-write so runtime score updates stay private.
+ARTIFACT_MAGIC = b"TEDTRIE\0"
+ARTIFACT_VERSION = 4
+DEFAULT_ARTIFACT_PATH = os.path.join("build", "tries.bin")
+DEFAULT_COUNTS_PATH = "word_counts.txt"
+
+_HEADER = struct.Struct("<8sI32sI")
+_SECTION = struct.Struct("<16sQQ")
+_BLOB_HEADER = struct.Struct("<IIIIII")
+
+KIND_TRIE = 0
+KIND_DAWG = 1
+FLAG_SCORES = 1
+FLAG_EXPANSIONS = 2
+
+
+# ==============================================================================
+# II. SERIALIZING COMPACT TRIES
+# ==============================================================================
+
+def _pack_blob(t) -> bytes:
+    if not isinstance(t, CompactTrie):
+        t = CompactTrie.from_dict_trie(t)
+    kind = KIND_DAWG if isinstance(t, Dawg) else KIND_TRIE
+
+    strings = [t.strings[i] for i in range(len(t.strings))]
+    encoded = [s.encode("utf-8") for s in strings]
+    string_offsets = array("I", [0])
+    for value in encoded:
+        string_offsets.append(string_offsets[-1] + len(value))
+
+    flags = FLAG_SCORES if t.scores is not None else 0
+    if t.string_kind == STRING_EXPANSION:
+        flags |= FLAG_EXPANSIONS
+    parts = [_BLOB_HEADER.pack(kind, flags, len(t.payloads), len(t.labels), len(strings), string_offsets[-1])]
+    arrays = [t.labels, t.first_child]
+    if kind == KIND_DAWG:
+        arrays.append(t.targets)
+    arrays.append(t.payloads)
+    if flags & FLAG_SCORES:
+        arrays.extend([t.scores, t.best])
+    arrays.append(string_offsets)
+    for section in arrays:
+        if sys.byteorder != "little":
+            section = array(getattr(section, "typecode", None) or section.format, section)
+            section.byteswap()
+        parts.append(section.tobytes())
+    parts.extend(encoded)
+    blob = b"".join(parts)
+    return blob + b"\0" * (-len(blob) % 8)
+
+
+# ==============================================================================
+# III. WRITING AND MAPPING THE ARTIFACT
+# ==============================================================================
+
+def write_artifact(path: str, fingerprint: bytes, tries: dict):
+    blobs = [(name, _pack_blob(t)) for name, t in tries.items()]
+
+    offset = _HEADER.size + _SECTION.size * len(blobs)
+    offset += -offset % 8
+    table = []
+    for name, blob in blobs:
+        table.append(_SECTION.pack(name.encode("ascii"), offset, len(blob)))
+        offset += len(blob)
+
+    head = _HEADER.pack(ARTIFACT_MAGIC, ARTIFACT_VERSION, fingerprint, len(blobs)) + b"".join(table)
+    head += b"\0" * (-len(head) % 8)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # A unique, fsynced temp file: concurrent launches never share one, and a
+    # crash cannot leave a truncated artifact behind a valid header.
+    with atomic_write(path) as f:
+        f.write(head)
+        for _, blob in blobs:
+            f.write(blob)
+
+
+def read_header(path: str):
+    try:
+        with open(path, "rb") as f:
+            magic, version, fingerprint, _ = _HEADER.unpack(f.read(_HEADER.size))
+    except (OSError, struct.error):
+        return None
+    if magic != ARTIFACT_MAGIC:
+        return None
+    return version, fingerprint
+
+
+class _MappedStrings:
+    __slots__ = ("_offsets", "_data")
+
+    def __init__(self, offsets: memoryview, data: memoryview):
+        self._offsets = offsets
+        self._data = data
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return bytes(self._data[self._offsets[index]:self._offsets[index + 1]]).decode("utf-8")
+
+
+def map_section(buffer: memoryview, offset: int) -> CompactTrie:
+    kind, flags, node_count, edge_count, string_count, string_size = _BLOB_HEADER.unpack_from(buffer, offset)
+    offset += _BLOB_HEADER.size
+
+    def take(typecode, count):
+        nonlocal offset
+        view = buffer[offset:offset + 4 * count].cast(typecode)
+        offset += 4 * count
+        return view
+
+    labels = take("I", edge_count)
+    first_child = take("I", node_count + 1)
+    targets = take("I", edge_count) if kind == KIND_DAWG else None
+    payloads = take("i", node_count)
+    scores = take("I", node_count) if flags & FLAG_SCORES else None
+    best = take("I", node_count) if flags & FLAG_SCORES else None
+    strings = _MappedStrings(take("I", string_count + 1), buffer[offset:offset + string_size])
+
+    string_kind = STRING_EXPANSION if flags & FLAG_EXPANSIONS else STRING_EMOJI
+    if kind == KIND_DAWG:
+        return Dawg(labels, first_child, payloads, strings, targets, string_kind)
+    return CompactTrie(labels, first_child, payloads, strings, scores, best, string_kind)
+
+
+class TrieArtifact:
+    def __init__(self, path: str):
+        self._file = open(path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_COPY)
+        buffer = memoryview(self._map)
+        magic, self.version, self.fingerprint, count = _HEADER.unpack_from(buffer, 0)
+        if magic != ARTIFACT_MAGIC or self.version != ARTIFACT_VERSION:
+            raise ValueError(f"{path} is not a version {ARTIFACT_VERSION} trie artifact")
+        self.sections = {}
+        for i in range(count):
+            name, offset, _ = _SECTION.unpack_from(buffer, _HEADER.size + i * _SECTION.size)
+            self.sections[name.rstrip(b"\0").decode("ascii")] = map_section(buffer, offset)
+
+    def __getitem__(self, name: str) -> CompactTrie:
+        return self.sections[name]
+
+
+# ==============================================================================
+# IV. BUILDING FROM THE EDITOR'S DATA SOURCES
+#
+# The fingerprint covers the artifact format and every data source that is
+# expected to change, so editing the word corpus, abbreviations.json or
+# emoji_data.py triggers a rebuild on the next launch.
+# ==============================================================================
+
+def source_fingerprint(abbreviations_path: str, use_dawg: bool = False, counts_path: str = None) -> bytes:
+    digest = hashlib.sha256()
+    engine = "dawg" if use_dawg else "trie"
+    digest.update(f"format:{ARTIFACT_VERSION};words:{data_sources.WORDS_SOURCE};engine:{engine};".encode("utf-8"))
+    digest.update(data_sources.words_source_stamp().encode("utf-8"))
+    with open(abbreviations_path, "rb") as f:
+        digest.update(f.read())
+    digest.update(json.dumps(data_sources.load_emoji_mappings(), sort_keys=True).encode("utf-8"))
+    if counts_path and os.path.exists(counts_path):
+        with open(counts_path, "rb") as f:
+            digest.update(f.read())
+    return digest.digest()
+
+
+def build_artifact(path: str, abbreviations_path: str, use_dawg: bool = False, counts_path: str = None,
+                   on_progress=None):
+    import trie
+
+    report = on_progress or (lambda message: None)
+    report("Loading the word list...")
+    # Abbreviations get their own section so the dictionary only holds words.
+    items = [(word, True) for word in data_sources.load_words()]
+    report(f"Building dictionaries from {len(items):,} words...")
+    abbreviation_trie = CompactTrie.from_abbreviations(data_sources.load_abbreviations(abbreviations_path))
+    if use_dawg:
+        main_trie = Dawg.from_items(items)
+    else:
+        scores = {}
+        if counts_path and os.path.exists(counts_path):
+            scores = trie.load_word_counts(counts_path)
+        main_trie = CompactTrie.from_items(items, scores)
+    emoji_trie = CompactTrie.from_items(data_sources.load_emoji_mappings().items())
+
+    report("Writing the dictionary artifact...")
+    write_artifact(path, source_fingerprint(abbreviations_path, use_dawg, counts_path),
+                   {"words": main_trie, "abbreviations": abbreviation_trie, "emoji": emoji_trie})
+
+
+def load_or_build(path: str = DEFAULT_ARTIFACT_PATH, abbreviations_path: str = "abbreviations.json",
+                  use_dawg: bool = False, counts_path: str = None, on_progress=None) -> TrieArtifact:
+    # on_progress(message) is called from this thread as the work proceeds.
+    report = on_progress or (lambda message: None)
+    fingerprint = source_fingerprint(abbreviations_path, use_dawg, counts_path)
+    if read_header(path) != (ARTIFACT_VERSION, fingerprint):
+        report(f"Trie artifact {path} is missing or stale, rebuilding...")
+        build_artifact(path, abbreviations_path, use_dawg, counts_path, on_progress)
+    report("Mapping dictionaries...")
+    return TrieArtifact(path)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Compile the editor's tries into a memory-mappable artifact.")
+    parser.add_argument("--output", default=DEFAULT_ARTIFACT_PATH)
+    parser.add_argument("--abbreviations", default="abbreviations.json")
+    parser.add_argument("--dawg", action="store_true", help="store the word dictionary as a minimized DAWG")
+    parser.add_argument("--counts", default=DEFAULT_COUNTS_PATH, help="word frequency counts used to rank suggestions")
+    parser.add_argument("--force", action="store_true", help="rebuild even if the artifact is up to date")
+    args = parser.parse_args()
+
+    if args.force:
+        build_artifact(args.output, args.abbreviations, args.dawg, args.counts, print)
+    else:
+        load_or_build(args.output, args.abbreviations, args.dawg, args.counts, print)
+    print(f"Trie artifact ready at {args.output}")